@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark_generation.py
+
+Compara laberintos por segundo entre los backends de generate_maze:
+- numpy: generadores en proceso de maze_algorithms
+- node:  un proceso de Node por laberinto (scripts/*.js) + parseo de stdout
+
+Solo mide la generación de la matriz (build_maze), sin escritura en disco.
+
+Con --batch N mide además el escalado de generate_mazes (N laberintos por
+tamaño, escritos en una carpeta temporal) para cada número de procesos.
+
+Uso:
+    python benchmark_generation.py
+    python benchmark_generation.py --sizes 21 201 --backends numpy --min-time 2
+    python benchmark_generation.py --sizes 21 --backends --batch 20000 --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+
+import maze_algorithms
+from maze_generation import BACKENDS, build_maze, generate_mazes
+
+
+def mazes_per_second(algorithm: str, size: int, backend: str,
+                     min_time: float = 1.0, max_runs: int = 50) -> float:
+    """Repite la generación hasta acumular min_time segundos (o max_runs)."""
+    runs, elapsed = 0, 0.0
+    while runs < max_runs and (elapsed < min_time or runs == 0):
+        seed = runs if backend == "numpy" else None
+        t0 = time.perf_counter()
+        build_maze(algorithm, size, size, 3, 0.5, 0, 0.5, seed=seed, backend=backend)
+        elapsed += time.perf_counter() - t0
+        runs += 1
+    return runs / elapsed
+
+
+def batch_rate(n: int, size: int, workers: int) -> float:
+    """Laberintos por segundo de generate_mazes con n especificaciones."""
+    algs = maze_algorithms.ALGORITHMS
+    specs = [(algs[i % len(algs)], size, (3, 0.5, 0, 0.5), i) for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        generate_mazes(specs, workers=workers, output_dir=tmp)
+        return n / (time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[21, 201, 2001])
+    parser.add_argument("--algorithms", nargs="+", default=list(maze_algorithms.ALGORITHMS))
+    parser.add_argument("--backends", nargs="*", default=list(BACKENDS))
+    parser.add_argument("--min-time", type=float, default=1.0)
+    parser.add_argument("--batch", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    rates = {}
+    if args.backends:
+        print("algorithm\tsize\tbackend\tmazes_per_s")
+    for alg in args.algorithms:
+        for N in args.sizes:
+            for backend in args.backends:
+                try:
+                    rate = mazes_per_second(alg, N, backend, min_time=args.min_time)
+                    shown = f"{rate:.3f}"
+                except RuntimeError as e:
+                    rate, shown = float("nan"), "error"
+                    print(f"# {alg} {N}x{N} {backend}: {str(e).splitlines()[0]}")
+                rates[(alg, N, backend)] = rate
+                print(f"{alg}\t{N}x{N}\t{backend}\t{shown}", flush=True)
+
+    if {"numpy", "node"} <= set(args.backends):
+        print("\nalgorithm\tsize\tspeedup (numpy/node)")
+        for alg in args.algorithms:
+            for N in args.sizes:
+                ratio = rates[(alg, N, "numpy")] / rates[(alg, N, "node")]
+                print(f"{alg}\t{N}x{N}\t{ratio:.1f}x" if ratio == ratio else f"{alg}\t{N}x{N}\t-")
+
+    if args.batch:
+        print("\nsize\tworkers\tmazes_per_s\tscaling")
+        for N in args.sizes:
+            base = None
+            for w in args.workers:
+                rate = batch_rate(args.batch, N, w)
+                base = base or rate
+                print(f"{N}x{N}\t{w}\t{rate:.1f}\t{rate / base:.2f}x", flush=True)
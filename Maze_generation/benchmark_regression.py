@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark_regression.py
+
+Rendimiento de los solvers de maze_water_solver sobre un corpus fijo de
+laberintos con semilla (generate_maze), con línea base guardada y umbrales
+de regresión.
+
+Por solver se mide, sumando todo el corpus:
+- seconds:     tiempo de pared de solve (mínimo de --repeat ejecuciones por
+               laberinto, para filtrar ruido)
+- peak_bytes:  pico de memoria asignada durante un solve (tracemalloc, en
+               una pasada aparte para no alterar los tiempos)
+- cells_per_s: celdas visitadas / seconds
+
+Con --stats se añaden los contadores de la instrumentación de BaseSolver
+(expanded, pushes, stale_pops, neighbor_checks, steps, search_s, path_s),
+sumados sobre el corpus en otra pasada aparte.
+
+El MazeGraph de cada laberinto se construye antes de medir: solo cuenta el
+trabajo del solver. Las cachés compartidas entre instancias (las tablas de
+transiciones de WallFollower) se vacían antes de cada ejecución, así que
+todas las repeticiones y la pasada de memoria parten en frío.
+
+Con --save se escribe la línea base (JSON). Sin --save se compara contra
+ella y el proceso termina con código 1 si algún solver es más lento o usa
+más memoria que la base por encima del umbral.
+
+Uso:
+    python benchmark_regression.py --save
+    python benchmark_regression.py --threshold 0.2 --memory-threshold 0.1
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Sequence, Tuple
+
+from maze_graph import MazeGraph
+from maze_water_solver import (BaseSolver, WallFollower, find_entrance_exit, generate_maze,
+                               make_solvers)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "output", "solver_baseline.json")
+
+Case = Tuple[int, int, MazeGraph, tuple, tuple]  # (tamaño, semilla, G, start, goal)
+
+
+def build_corpus(sizes: Sequence[int], seeds: Sequence[int]) -> List[Case]:
+    corpus = []
+    for N in sizes:
+        for sd in seeds:
+            grid = generate_maze(N, N, seed=sd)
+            G = MazeGraph(grid)
+            G.lists()
+            G.dir_list()
+            corpus.append((N, sd, G, *find_entrance_exit(grid)))
+    return corpus
+
+def _solver(name: str, seed: int) -> BaseSolver:
+    # Instancia nueva por ejecución: RandomWalkSolver consume su RNG. La
+    # caché de tablas de WallFollower es de clase: sin vaciarla, las
+    # repeticiones y la pasada de tracemalloc reutilizarían la tabla
+    WallFollower._tables.clear()
+    return next(s for s in make_solvers(seed) if s.name == name)
+
+STAT_KEYS = ("expanded", "pushes", "stale_pops", "neighbor_checks", "steps", "search_s", "path_s")
+
+def measure(name: str, corpus: Sequence[Case], repeat: int = 3,
+            stats: bool = False) -> Dict[str, float]:
+    seconds, visited, peak = 0.0, 0, 0
+    totals: Dict[str, float] = {}
+    for N, sd, G, start, goal in corpus:
+        best = float("inf")
+        for _ in range(repeat):
+            solver = _solver(name, sd)
+            t0 = time.perf_counter()
+            res = solver.solve(G, start, goal)
+            best = min(best, time.perf_counter() - t0)
+        seconds += best
+        visited += res.visited_count
+
+        solver = _solver(name, sd)
+        tracemalloc.start()
+        solver.solve(G, start, goal)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        if stats:
+            res = _solver(name, sd).instrument().solve(G, start, goal)
+            for k in STAT_KEYS:
+                totals[k] = totals.get(k, 0) + res.stats.get(k, 0)
+    return {
+        "seconds": seconds,
+        "peak_bytes": peak,
+        "cells_per_s": visited / seconds if seconds > 0 else float("inf"),
+        **totals,
+    }
+
+def run_suite(sizes: Sequence[int], seeds: Sequence[int], solvers: Sequence[str],
+              repeat: int = 3, stats: bool = False) -> Dict:
+    corpus = build_corpus(sizes, seeds)
+    return {
+        "corpus": {"sizes": list(sizes), "seeds": list(seeds), "repeat": repeat},
+        "machine": f"{platform.node()} {platform.python_implementation()} {platform.python_version()}",
+        "solvers": {name: measure(name, corpus, repeat, stats) for name in solvers},
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.25,
+            memory_threshold: float = 0.25) -> List[str]:
+    """Mensajes de regresión (vacío si todo está dentro de los umbrales)."""
+    if current["corpus"]["sizes"] != baseline["corpus"]["sizes"] or \
+            current["corpus"]["seeds"] != baseline["corpus"]["seeds"]:
+        raise ValueError("El corpus no coincide con el de la línea base")
+    problems = []
+    for name, cur in current["solvers"].items():
+        base = baseline["solvers"].get(name)
+        if base is None:
+            continue
+        if cur["seconds"] > base["seconds"] * (1 + threshold):
+            problems.append(f"{name}: tiempo {cur['seconds']:.4f}s vs base "
+                            f"{base['seconds']:.4f}s (+{cur['seconds'] / base['seconds'] - 1:.0%})")
+        if cur["peak_bytes"] > base["peak_bytes"] * (1 + memory_threshold):
+            problems.append(f"{name}: memoria {cur['peak_bytes']} B vs base "
+                            f"{base['peak_bytes']} B (+{cur['peak_bytes'] / base['peak_bytes'] - 1:.0%})")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="guardar los resultados como línea base")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[51, 101, 201])
+    parser.add_argument("--seeds", type=int, nargs="+", default=[1, 7, 11, 23, 37])
+    parser.add_argument("--solvers", nargs="+", help="nombres de solver (por defecto, todos)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stats", action="store_true", help="incluir contadores de instrumentación")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="aumento de tiempo tolerado (0.25 = +25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="aumento de pico de memoria tolerado")
+    args = parser.parse_args()
+
+    names = args.solvers or [s.name for s in make_solvers(0)]
+    current = run_suite(args.sizes, args.seeds, names, args.repeat, args.stats)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    extra = STAT_KEYS if args.stats else ()
+    print("\t".join(("name", "seconds", "peak_kb", "cells_per_s", "vs_base") + extra))
+    for name, m in current["solvers"].items():
+        base = baseline["solvers"].get(name) if baseline else None
+        delta = f"{m['seconds'] / base['seconds'] - 1:+.0%}" if base else "-"
+        cols = [f"{m[k]:.4f}" if k.endswith("_s") else str(m[k]) for k in extra]
+        print("\t".join([name, f"{m['seconds']:.4f}", f"{m['peak_bytes'] / 1024:.0f}",
+                         f"{m['cells_per_s']:.0f}", delta] + cols))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"# línea base guardada en {args.baseline}")
+    elif baseline is None:
+        print(f"# no hay línea base en {args.baseline}; use --save", file=sys.stderr)
+    else:
+        if baseline.get("machine") != current["machine"]:
+            print(f"# aviso: base medida en {baseline.get('machine')}", file=sys.stderr)
+        problems = compare(current, baseline, args.threshold, args.memory_threshold)
+        for p in problems:
+            print(f"# REGRESIÓN {p}", file=sys.stderr)
+        sys.exit(1 if problems else 0)
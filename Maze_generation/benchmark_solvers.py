@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark_solvers.py
+
+Barrido de la comparación de solvers de maze_water_solver (tamaños ×
+semillas × solvers) en un pool de procesos, con resultados guardados de
+forma incremental y reanudable.
+
+Los resultados se guardan en un directorio columnar: un archivo binario por
+columna (RESULTS_DTYPE), al que se añaden filas a medida que terminan los
+trabajos. Si el proceso se interrumpe, al relanzarlo se leen las filas
+completas y solo se ejecutan los trabajos (tamaño, semilla, solver) que
+faltan. La agregación y el gráfico se hacen siempre desde el archivo.
+
+Cada tarea del pool es un laberinto (tamaño, semilla) con la lista de
+solvers pendientes: el laberinto y su MazeGraph se construyen una sola vez.
+
+Uso:
+    python benchmark_solvers.py --results output/solver_bench --sizes 11 101 1001 --seeds 30
+    python benchmark_solvers.py --results output/solver_bench --no-run --plot eficiencia.png
+"""
+
+from __future__ import annotations
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+RESULTS_DTYPE = np.dtype([
+    ("size", "<i4"),
+    ("seed", "<i8"),
+    ("solver", "S48"),
+    ("reached", "u1"),
+    ("visited", "<i8"),
+    ("open_cells", "<i8"),
+    ("visited_ratio", "<f8"),
+    ("efficiency", "<f8"),
+    ("path_length", "<f8"),   # inf si no se alcanza la salida
+    ("seconds", "<f8"),       # tiempo de solve + métricas
+])
+
+Job = Tuple[int, int, str]  # (tamaño, semilla, solver)
+
+
+class ResultsFile:
+    """
+    Resultados en columnas: path/<campo>.bin con los valores de cada campo
+    de RESULTS_DTYPE, en el mismo orden de filas en todos los archivos.
+
+    Una escritura interrumpida puede dejar columnas más largas que otras;
+    al leer se descartan las filas incompletas (se truncan al mínimo).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _column_path(self, field: str) -> str:
+        return os.path.join(self.path, f"{field}.bin")
+
+    def __len__(self) -> int:
+        return min(
+            os.path.getsize(self._column_path(f)) // RESULTS_DTYPE[f].itemsize
+            if os.path.exists(self._column_path(f)) else 0
+            for f in RESULTS_DTYPE.names
+        )
+
+    def append(self, rows: Sequence[tuple]) -> None:
+        if not rows:
+            return
+        n = len(self)
+        table = np.array(rows, dtype=RESULTS_DTYPE)
+        for field in RESULTS_DTYPE.names:
+            with open(self._column_path(field), "r+b" if os.path.exists(self._column_path(field)) else "wb") as f:
+                # Descarta restos de una escritura interrumpida antes de añadir
+                f.truncate(n * RESULTS_DTYPE[field].itemsize)
+                f.seek(0, os.SEEK_END)
+                table[field].tofile(f)
+
+    def column(self, field: str) -> np.ndarray:
+        n = len(self)
+        if n == 0:
+            return np.zeros(0, dtype=RESULTS_DTYPE[field])
+        return np.fromfile(self._column_path(field), dtype=RESULTS_DTYPE[field], count=n)
+
+    def load(self, fields: Iterable[str] = RESULTS_DTYPE.names) -> Dict[str, np.ndarray]:
+        """Columnas pedidas como dict de arrays (solo las filas completas)."""
+        return {f: self.column(f) for f in fields}
+
+    def done(self) -> Set[Job]:
+        cols = self.load(("size", "seed", "solver"))
+        return {(int(n), int(s), name.decode())
+                for n, s, name in zip(cols["size"], cols["seed"], cols["solver"])}
+
+
+# ---------------------------------------------------------------------
+# Trabajos
+# ---------------------------------------------------------------------
+
+def solver_names() -> List[str]:
+    from maze_water_solver import make_solvers
+    return [s.name for s in make_solvers(0)]
+
+def pending_jobs(sizes: Sequence[int], seeds: Sequence[int], solvers: Sequence[str],
+                 done: Set[Job]) -> List[Tuple[int, int, Tuple[str, ...]]]:
+    """Tareas (tamaño, semilla, solvers que faltan), de mayor a menor tamaño."""
+    tasks = []
+    for N in sorted(sizes, reverse=True):  # las largas primero: mejor reparto
+        for sd in seeds:
+            missing = tuple(name for name in solvers if (N, sd, name) not in done)
+            if missing:
+                tasks.append((N, sd, missing))
+    return tasks
+
+def run_task(N: int, seed: int, names: Tuple[str, ...]) -> List[tuple]:
+    """Genera el laberinto (N, seed) y evalúa los solvers pedidos."""
+    from maze_graph import MazeGraph
+    from maze_water_solver import evaluate_solver, find_entrance_exit, generate_maze, make_solvers
+    grid = generate_maze(N, N, seed=seed)
+    start, goal = find_entrance_exit(grid)
+    G = MazeGraph(grid)
+    rows = []
+    for solver in make_solvers(seed):
+        if solver.name not in names:
+            continue
+        t0 = time.perf_counter()
+        m = evaluate_solver(G, solver, start, goal)
+        rows.append((N, seed, solver.name.encode(), int(m["reached"]), m["visited"],
+                     m["open_cells"], m["visited_ratio"], m["efficiency"],
+                     m["path_length"], time.perf_counter() - t0))
+    return rows
+
+def run(results: ResultsFile, sizes: Sequence[int], seeds: Sequence[int],
+        solvers: Sequence[str], workers: int = None) -> int:
+    """Ejecuta los trabajos pendientes y devuelve cuántas filas se añadieron."""
+    tasks = pending_jobs(sizes, seeds, solvers, results.done())
+    total = sum(len(t[2]) for t in tasks)
+    print(f"# {total} trabajos pendientes en {len(tasks)} laberintos", file=sys.stderr)
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = {ex.submit(run_task, *t): t for t in tasks}
+        for fut in as_completed(futures):
+            N, sd, _ = futures[fut]
+            try:
+                rows = fut.result()
+            except Exception as e:
+                print(f"# {N}x{N} seed={sd}: {e}", file=sys.stderr)
+                continue
+            results.append(rows)
+            written += len(rows)
+            print(f"# {written}/{total}  {N}x{N} seed={sd}", file=sys.stderr, flush=True)
+    return written
+
+
+# ---------------------------------------------------------------------
+# Agregación y gráfico (desde el archivo)
+# ---------------------------------------------------------------------
+
+def aggregate(results: ResultsFile) -> Dict[str, Dict[int, Dict[str, float]]]:
+    """
+    Medias por solver y tamaño: {solver: {tamaño: {métrica: valor}}}.
+    path_length se promedia solo sobre las ejecuciones que llegan a la salida.
+    """
+    cols = results.load()
+    out: Dict[str, Dict[int, Dict[str, float]]] = {}
+    for name in np.unique(cols["solver"]):
+        sel = cols["solver"] == name
+        for N in np.unique(cols["size"][sel]):
+            m = sel & (cols["size"] == N)
+            ok = m & (cols["reached"] == 1)
+            out.setdefault(name.decode(), {})[int(N)] = {
+                "runs": int(m.sum()),
+                "reached": float(cols["reached"][m].mean()),
+                "efficiency": float(cols["efficiency"][m].mean()),
+                "visited_ratio": float(cols["visited_ratio"][m].mean()),
+                "path_length": float(cols["path_length"][ok].mean()) if ok.any() else math.inf,
+                "seconds": float(cols["seconds"][m].mean()),
+            }
+    return out
+
+def print_summary(summary: Dict[str, Dict[int, Dict[str, float]]]) -> None:
+    print("name\tsize\truns\treached\tefficiency\tvisited_ratio\tpath_length\tseconds")
+    for name, by_size in summary.items():
+        for N, m in sorted(by_size.items()):
+            print(f"{name}\t{N}x{N}\t{m['runs']}\t{m['reached']:.3f}\t{m['efficiency']:.3f}\t"
+                  f"{m['visited_ratio']:.3f}\t{m['path_length']:.1f}\t{m['seconds']:.4f}")
+
+def plot_summary(summary: Dict[str, Dict[int, Dict[str, float]]], out: str = None) -> None:
+    """Eficiencia media vs tamaño (como el gráfico de maze_water_solver)."""
+    import matplotlib
+    if out:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 5))
+    for name, by_size in summary.items():
+        sizes = sorted(by_size)
+        effs = [by_size[N]["efficiency"] for N in sizes]
+        plt.plot(sizes, effs, alpha=0.4, label=name)
+        plt.scatter(sizes, effs, marker="x")
+    plt.xlabel("Tamaño del laberinto $(N × N)$")
+    plt.ylabel("Eficiencia")
+    plt.title("Eficiencia por algoritmo")
+    plt.grid(True, linestyle="--", alpha=0.7)
+    plt.legend()
+    plt.tight_layout()
+    if out:
+        plt.savefig(out, dpi=150)
+    else:
+        plt.show()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--results", required=True, help="directorio de resultados (se reanuda si existe)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[11, 21, 51, 101, 201, 501, 1001])
+    parser.add_argument("--seeds", type=int, default=10, help="semillas 0..N-1")
+    parser.add_argument("--solvers", nargs="+", help="nombres de solver (por defecto, todos)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-run", action="store_true", help="solo agregar y graficar")
+    parser.add_argument("--plot", nargs="?", const="", default=None,
+                        help="graficar (a este archivo si se indica)")
+    args = parser.parse_args()
+
+    from maze_water_solver import ensure_odd
+    results = ResultsFile(args.results)
+    if not args.no_run:
+        names = args.solvers or solver_names()
+        unknown = set(names) - set(solver_names())
+        if unknown:
+            parser.error(f"solvers desconocidos: {sorted(unknown)}")
+        run(results, [ensure_odd(n) for n in args.sizes], range(args.seeds), names, args.workers)
+
+    summary = aggregate(results)
+    print_summary(summary)
+    if args.plot is not None:
+        plot_summary(summary, args.plot or None)
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+distance_cache.py
+
+Caché de campos de distancia para consultas repetidas sobre un mismo
+laberinto (por ejemplo, varias regiones de aparición de partículas).
+
+Cada entrada es un árbol BFS completo desde una celda: distancias (int32) y
+padres (int32) de todas las celdas, indexado por (hash del contenido,
+celda origen). Una consulta (start, goal) se responde sin buscar si hay un
+árbol desde start o, como la rejilla es no dirigida, desde goal: basta
+recorrer los padres. Las entradas se descartan por LRU cuando se supera el
+presupuesto de memoria.
+
+Uso:
+    cached = CachedSolver(BFSSolver(), DistanceCache(max_bytes=64 << 20))
+    for start in spawns:
+        res = cached.solve(G, start, goal)
+    print(cached.cache.stats())
+"""
+
+from __future__ import annotations
+from array import array
+from collections import Counter, OrderedDict, deque
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from maze_graph import NONE, ROOT, MazeGraph, as_graph
+from maze_store import content_hash
+from maze_water_solver import BaseSolver, SolveResult
+
+Coord = Tuple[int, int]  # (fila, columna)
+
+
+class DistanceField:
+    """Árbol BFS completo desde `source` (id plano) sobre un laberinto."""
+    __slots__ = ("source", "dist", "parent")
+
+    def __init__(self, source: int, dist: np.ndarray, parent: np.ndarray):
+        self.source = source
+        self.dist = dist        # int32 (size,), -1 = inalcanzable
+        self.parent = parent    # int32 (size,), NONE / ROOT como en MazeGraph
+
+    @property
+    def nbytes(self) -> int:
+        return self.dist.nbytes + self.parent.nbytes
+
+    def path_from_source(self, v: int) -> List[int]:
+        """Camino source -> v (ids); vacío si v no es alcanzable."""
+        path = self.path_to_source(v)
+        path.reverse()
+        return path
+
+    def path_to_source(self, v: int) -> List[int]:
+        """Camino v -> source (ids); vacío si v no es alcanzable."""
+        if self.dist[v] < 0:
+            return []
+        parent = self.parent
+        path = []
+        cur = int(v)
+        while cur != ROOT:
+            path.append(cur)
+            cur = int(parent[cur])
+        return path
+
+
+def distance_field(G: MazeGraph, source: int) -> DistanceField:
+    """
+    Árbol BFS completo desde `source`, con el mismo orden de expansión que
+    BFSSolver. path_from_source(v) coincide con el camino de BFSSolver de
+    source a v; path_to_source(v) (árbol enraizado en la salida) es un
+    camino mínimo de la misma longitud, pero en general otro.
+    """
+    ptr, ind = G.lists()
+    parent = G.parent_buffer()
+    dist = array("i", [-1]) * G.size
+    parent[source] = ROOT
+    dist[source] = 0
+    q = deque([source])
+    while q:
+        u = q.popleft()
+        du = dist[u] + 1
+        for v in ind[ptr[u]:ptr[u + 1]]:
+            if parent[v] == NONE:
+                parent[v] = u
+                dist[v] = du
+                q.append(v)
+    return DistanceField(source, np.frombuffer(dist, dtype=np.int32),
+                         np.frombuffer(parent, dtype=np.int32))
+
+
+class DistanceCache:
+    """
+    Campos de distancia por (hash del laberinto, celda origen) con
+    expulsión LRU cuando la suma de bytes supera max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 256 << 20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: "OrderedDict[Tuple[str, int], DistanceField]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"DistanceCache({len(self)} campos, {self.nbytes} / {self.max_bytes} bytes)"
+
+    def get(self, key: str, source: int) -> Optional[DistanceField]:
+        """Campo cacheado (y lo marca como usado recientemente) o None. No cuenta aciertos."""
+        field = self._entries.get((key, source))
+        if field is not None:
+            self._entries.move_to_end((key, source))
+        return field
+
+    def put(self, key: str, field: DistanceField) -> None:
+        if field.nbytes > self.max_bytes:
+            return  # nunca cabría: no vaciar la caché por él
+        k = (key, field.source)
+        old = self._entries.pop(k, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self._entries[k] = field
+        self.nbytes += field.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def mazes(self) -> Set[str]:
+        """Hashes de laberinto con algún campo en la caché."""
+        return {key for key, _ in self._entries}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else float("nan"),
+            "evictions": self.evictions,
+            "entries": len(self),
+            "bytes": self.nbytes,
+        }
+
+
+class CachedSolver(BaseSolver):
+    """
+    Envoltorio de un solver con caché de campos de distancia.
+
+    Solo se cachean solvers con shortest_paths=True (BFS, A*): para ellos la
+    respuesta del campo (un camino mínimo) es equivalente en longitud,
+    aunque no tiene por qué ser el mismo camino. Los demás
+    (agua, mano, caminata aleatoria) no devuelven caminos mínimos y se
+    delegan sin caché (contados en `bypassed`). También se delegan las
+    consultas con la entrada o la salida cerrada: el campo invertido solo
+    equivale a la búsqueda original si los dos extremos están abiertos.
+
+    En un fallo se calcula el campo completo desde el extremo (start o
+    goal) que más se ha repetido en consultas anteriores sobre ese
+    laberinto (goal en caso de empate): con muchas entradas y una sola
+    salida, la salida se convierte en raíz y las siguientes consultas son
+    aciertos. Las cuentas de un laberinto se olvidan cuando la caché ya no
+    guarda ningún campo suyo.
+
+    El resultado informa como visitadas todas las celdas alcanzadas en un
+    fallo y solo las del camino en un acierto: refleja el trabajo hecho en
+    cada consulta.
+    """
+
+    def __init__(self, solver: BaseSolver, cache: Optional[DistanceCache] = None):
+        self.solver = solver
+        self.cache = cache if cache is not None else DistanceCache()
+        self.name = f"{solver.name} [cached]"
+        self.shortest_paths = solver.shortest_paths
+        self.bypassed = 0
+        self._demand: Dict[str, Counter] = {}  # hash -> consultas por celda
+
+    def solve(self, grid, start, goal):
+        t0 = self._begin(start, goal)
+        if not self.solver.shortest_paths:
+            return self._bypass(grid, start, goal, t0)
+        G = as_graph(grid)
+        s, t = G.id(start), G.id(goal)
+        if not (G.open[s] and G.open[t]):
+            return self._bypass(G, start, goal, t0)
+        key = content_hash(G.grid)
+        cache = self.cache
+        demand = self._demand.setdefault(key, Counter())
+        demand[s] += 1
+        demand[t] += 1
+
+        field = cache.get(key, s) or cache.get(key, t)
+        if field is not None:
+            cache.hits += 1
+            outcome = "hit"
+        else:
+            cache.misses += 1
+            outcome = "miss"
+            field = distance_field(G, t if demand[t] >= demand[s] else s)
+            cache.put(key, field)
+            # Olvidar la demanda de los laberintos que ya no tienen campos
+            live = cache.mazes()
+            for k in [k for k in self._demand if k not in live]:
+                del self._demand[k]
+        t1 = time.perf_counter() if self.instrumented else 0.0
+
+        path = field.path_from_source(t) if field.source == s else field.path_to_source(s)
+        coords = np.stack(np.divmod(np.array(path, dtype=np.int32), G.W), axis=1)
+        if outcome == "hit":
+            visited = np.zeros(G.size, dtype=bool)
+            visited[path] = True
+        else:
+            visited = field.dist >= 0
+        res = SolveResult(coords, visited.reshape(G.H, G.W), bool(path))
+        if self.instrumented:
+            # Un fallo recorre todo lo alcanzable desde la raíz; un acierto, nada
+            res.stats = {"solver": self.name, "cache": outcome,
+                         "expanded": int(visited.sum()) if outcome == "miss" else 0,
+                         "search_s": t1 - t0, "path_s": time.perf_counter() - t1}
+            self._emit("end", res.stats)
+        return res
+
+    def _bypass(self, grid, start, goal, t0: float) -> SolveResult:
+        """Delegar en el solver envuelto; sus stats (si las tiene) se conservan."""
+        self.bypassed += 1
+        res = self.solver.solve(grid, start, goal)
+        if self.instrumented:
+            res.stats = {"search_s": time.perf_counter() - t0, **(res.stats or {}),
+                         "solver": self.name, "cache": "bypass"}
+            self._emit("end", res.stats)
+        return res
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+incremental_solver.py
+
+Solver incremental (LPA*) para laberintos que se editan abriendo o cerrando
+unas pocas celdas entre consulta y consulta.
+
+LPAStarSolver.solve resuelve como A* (Manhattan) y conserva el estado de la
+búsqueda: g (distancia desde la entrada), rhs (mejor distancia según las
+vecinas) y la cola de prioridad. update(cambios) aplica los cambios a su
+copia del laberinto y solo vuelve a expandir las celdas cuya distancia
+cambia y que pueden afectar al camino hasta la salida; el resto de la
+búsqueda anterior se reutiliza. Si ninguna celda del camino anterior se
+cierra y la distancia a la salida no cambia, el camino se reutiliza tal
+cual.
+
+El camino devuelto siempre es mínimo en pasos (igual longitud que BFSSolver
+y AStarSolver sobre el laberinto editado). `visited` son las celdas
+expandidas en esa llamada: refleja el trabajo de cada consulta.
+
+Uso:
+    solver = LPAStarSolver()
+    res = solver.solve(grid, start, goal)
+    res = solver.update([((r, c), 1), ((r2, c2), 0)])   # 1=abrir, 0=cerrar
+
+Ejecutado como script, mide la latencia edición -> respuesta de ediciones
+de una celda en laberintos de 1001x1001 frente a un BFS / A* desde cero.
+"""
+
+from __future__ import annotations
+import argparse
+import heapq
+import time
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from maze_graph import as_graph
+from maze_water_solver import (AStarSolver, BaseSolver, BFSSolver, SolveResult,
+                               find_entrance_exit, generate_maze)
+
+Coord = Tuple[int, int]  # (fila, columna)
+Change = Tuple[Coord, int]  # (celda, nuevo valor: 1=espacio, 0=pared)
+
+INF = float("inf")
+
+
+class LPAStarSolver(BaseSolver):
+    """
+    Lifelong Planning A* con entrada y salida fijas.
+
+    Como en BFSSolver, la entrada es siempre el origen aunque se cierre (la
+    búsqueda sale de ella hacia sus vecinas abiertas); una salida cerrada no
+    es alcanzable.
+
+    Estado entre llamadas (sobre ids planos fila * W + columna):
+        open   bytearray, 1 = celda abierta (copia editable del laberinto)
+        g      distancia desde la entrada de cada celda expandida (inf si no)
+        rhs    1 + mínimo de g de las vecinas abiertas (0 en la entrada)
+        heap   celdas inconsistentes (g != rhs) con clave
+               (min(g, rhs) + h, min(g, rhs)); las entradas obsoletas se
+               descartan al sacarlas
+    """
+    name = "LPA* (incremental)"
+    shortest_paths = True
+
+    def __init__(self):
+        self.W = self.H = 0
+        self.s = self.t = -1
+        self.open = bytearray()
+        self.g: List[float] = []
+        self.rhs: List[float] = []
+        self.heap: List[Tuple[float, float, int]] = []
+        self._path: List[int] = []
+
+    @property
+    def grid(self) -> np.ndarray:
+        """Laberinto actual (1=espacio) con los cambios aplicados."""
+        return np.frombuffer(self.open, dtype=np.uint8).reshape(self.H, self.W).copy()
+
+    @property
+    def distance(self) -> float:
+        """Pasos del camino mínimo actual (inf si la salida no es alcanzable)."""
+        return self.g[self.t]
+
+    def _h(self, v: int) -> int:
+        r, c = divmod(v, self.W)
+        return abs(r - self.gr) + abs(c - self.gc)
+
+    def _neighbors(self, v: int) -> List[int]:
+        W = self.W
+        c = v % W
+        out = []
+        if v >= W:
+            out.append(v - W)
+        if v < self.size - W:
+            out.append(v + W)
+        if c > 0:
+            out.append(v - 1)
+        if c < W - 1:
+            out.append(v + 1)
+        return out
+
+    def _update_vertex(self, v: int) -> None:
+        g, rhs, op, s = self.g, self.rhs, self.open, self.s
+        if v == s:
+            r = 0.0
+        elif not op[v]:
+            r = INF
+        else:
+            r = INF
+            for n in self._neighbors(v):
+                if (op[n] or n == s) and g[n] < r:
+                    r = g[n]
+            r += 1
+        rhs[v] = r
+        gv = g[v]
+        if gv != r:
+            m = gv if gv < r else r
+            heapq.heappush(self.heap, (m + self._h(v), m, v))
+
+    def solve(self, grid, start, goal):
+        """Búsqueda inicial (equivalente a A*); guarda el estado para update."""
+        G = as_graph(grid)
+        self.H, self.W, self.size = G.H, G.W, G.size
+        self.s, self.t = G.id(start), G.id(goal)
+        self.start, self.goal = start, goal
+        self.gr, self.gc = goal
+        self.open = bytearray(G.open.view(np.uint8).tobytes())
+        self.g = [INF] * G.size
+        self.rhs = [INF] * G.size
+        self.heap = []
+        self._path = []
+        t0 = self._begin(start, goal)
+        self._update_vertex(self.s)
+        return self._compute(t0, [])
+
+    def update(self, changes: Iterable[Change]) -> SolveResult:
+        """
+        Aplica cambios de celdas ((fila, columna), 1=abrir / 0=cerrar) y
+        repara la búsqueda anterior. Requiere un solve previo.
+        """
+        if self.s < 0:
+            raise RuntimeError("update requiere un solve previo")
+        t0 = self._begin(self.start, self.goal)
+        W, op = self.W, self.open
+        changed = []
+        for (r, c), value in changes:
+            v = r * W + c
+            value = 1 if value else 0
+            if op[v] != value:
+                op[v] = value
+                changed.append(v)
+        # Cambia el coste de las aristas de v: v y sus vecinas recalculan rhs
+        for v in changed:
+            self._update_vertex(v)
+            for n in self._neighbors(v):
+                self._update_vertex(n)
+        return self._compute(t0, changed)
+
+    def _compute(self, t0: float, changed: List[int]) -> SolveResult:
+        g, rhs, heap, t = self.g, self.rhs, self.heap, self.t
+        h = self._h
+        old_distance = g[t]
+        expanded = []
+        pushes0 = len(heap)
+        stale = 0
+        while heap:
+            k1, k2, u = heap[0]
+            gu, ru = g[u], rhs[u]
+            m = gu if gu < ru else ru
+            if gu == ru or k2 != m or k1 != m + h(u):
+                heapq.heappop(heap)  # obsoleta: u ya es consistente o cambió de clave
+                stale += 1
+                continue
+            gt, rt = g[t], rhs[t]
+            mt = gt if gt < rt else rt
+            if gt == rt and (k1 > mt or (k1 == mt and k2 >= mt)):
+                break
+            heapq.heappop(heap)
+            expanded.append(u)
+            if gu > ru:
+                g[u] = ru
+                for n in self._neighbors(u):
+                    if self.open[n]:
+                        self._update_vertex(n)
+            else:
+                g[u] = INF
+                self._update_vertex(u)
+                for n in self._neighbors(u):
+                    if self.open[n]:
+                        self._update_vertex(n)
+        t1 = time.perf_counter() if self.instrumented else 0.0
+
+        op = self.open
+        path = self._path
+        if g[t] == INF:
+            path = []
+        elif not path or g[t] != old_distance or any(not op[v] for v in path[1:]):
+            path = self._extract_path()
+        self._path = path
+
+        ids = np.array(path, dtype=np.int32)
+        visited = np.zeros(self.size, dtype=bool)
+        visited[expanded] = True
+        res = SolveResult(np.stack(np.divmod(ids, self.W), axis=1),
+                          visited.reshape(self.H, self.W), g[t] != INF)
+        if self.instrumented:
+            res.stats = {
+                "solver": self.name,
+                "changes": len(changed),
+                "expanded": len(expanded),
+                "pushes": len(heap) + stale + len(expanded) - pushes0,
+                "stale_pops": stale,
+                "search_s": t1 - t0,
+                "path_s": time.perf_counter() - t1,
+            }
+            self._emit("end", res.stats)
+        return res
+
+    def _extract_path(self) -> List[int]:
+        """Camino entrada -> salida bajando por la vecina abierta de menor g."""
+        g, op, s = self.g, self.open, self.s
+        u = self.t
+        path = [u]
+        while u != s:
+            best, bg = -1, INF
+            for n in self._neighbors(u):
+                if (op[n] or n == s) and g[n] < bg:
+                    best, bg = n, g[n]
+            u = best
+            path.append(u)
+        path.reverse()
+        return path
+
+
+# ---------------------------------------------------------------------
+# Latencia edición -> respuesta
+# ---------------------------------------------------------------------
+
+def random_edits(grid: np.ndarray, n: int, rng: np.random.Generator,
+                 kind: str) -> List[Change]:
+    """
+    n ediciones de una celda: "open" abre muros interiores entre dos
+    espacios (crea un atajo); "close" cierra celdas abiertas interiores.
+    """
+    H, W = grid.shape
+    inner = np.zeros_like(grid, dtype=bool)
+    inner[1:-1, 1:-1] = True
+    if kind == "open":
+        between = ((grid[:-2, 1:-1] == 1) & (grid[2:, 1:-1] == 1)) | \
+                  ((grid[1:-1, :-2] == 1) & (grid[1:-1, 2:] == 1))
+        cand = np.zeros_like(inner)
+        cand[1:-1, 1:-1] = between & (grid[1:-1, 1:-1] == 0)
+        value = 1
+    else:
+        cand = inner & (grid == 1)
+        value = 0
+    cells = np.argwhere(cand)
+    pick = cells[rng.choice(len(cells), size=n, replace=False)]
+    return [((int(r), int(c)), value) for r, c in pick]
+
+
+def measure_latency(N: int = 1001, seed: int = 0, edits: int = 50, check: int = 5) -> None:
+    """
+    Mide edición -> respuesta de ediciones de una celda (la mitad abren, la
+    mitad cierran) sobre un mismo laberinto, y la compara con resolver desde
+    cero. Cada `check` ediciones se comprueba la longitud contra BFS.
+    """
+    grid = generate_maze(N, N, seed=seed)
+    start, goal = find_entrance_exit(grid)
+    rng = np.random.default_rng(seed)
+
+    solver = LPAStarSolver()
+    t0 = time.perf_counter()
+    res = solver.solve(grid, start, goal)
+    print(f"# {N}x{N} seed={seed}: solve inicial {time.perf_counter() - t0:.3f}s, "
+          f"camino {res.path_length}")
+    for fresh in (BFSSolver(), AStarSolver()):
+        t0 = time.perf_counter()
+        fresh.solve(grid, start, goal)
+        print(f"# {fresh.name} desde cero: {time.perf_counter() - t0:.3f}s")
+
+    print("kind\tedits\tmedian_ms\tp95_ms\tmax_ms\tmedian_expanded\tchecked")
+    for kind in ("open", "close"):
+        times, work = [], []
+        checked = 0
+        for i, change in enumerate(random_edits(solver.grid, edits // 2, rng, kind)):
+            t0 = time.perf_counter()
+            res = solver.update([change])
+            times.append(time.perf_counter() - t0)
+            work.append(res.visited_count)
+            if check and i % check == 0:
+                ref = BFSSolver().solve(solver.grid, start, goal)
+                if ref.reached != res.reached or ref.path_length != res.path_length:
+                    raise AssertionError(f"{kind} {change}: LPA* {res.path_length} vs BFS {ref.path_length}")
+                checked += 1
+        ms = np.array(times) * 1000
+        print(f"{kind}\t{len(times)}\t{np.median(ms):.2f}\t{np.percentile(ms, 95):.2f}\t"
+              f"{ms.max():.2f}\t{int(np.median(work))}\t{checked}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--size", type=int, default=1001)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--check", type=int, default=5,
+                        help="comprobar contra BFS cada N ediciones (0 = nunca)")
+    args = parser.parse_args()
+    measure_latency(args.size, args.seed, args.edits, args.check)
@@ -0,0 +1,469 @@
+# -*- coding: utf-8 -*-
+"""
+maze_algorithms.py
+
+Versiones nativas (Python/NumPy) de los generadores JavaScript de scripts/.
+
+Cada generador reproduce la semántica del script JS equivalente:
+- mismas dimensiones (se fuerzan a impares),
+- misma codificación de celdas (binary-tree usa 1=camino, el resto 1=muro),
+- mismas reglas para abrir la entrada y la salida a partir de (lado, posición
+  relativa), incluidas las particularidades de cada script.
+
+A diferencia de los scripts, reciben una semilla y devuelven directamente un
+np.ndarray (uint8), sin pasar por un proceso de Node ni por texto.
+
+Además, eller (sin script JS equivalente) genera la matriz fila a fila con
+memoria acotada por el ancho; eller_rows permite escribirla en disco sin
+tenerla entera en memoria (maze_generation.stream_maze).
+"""
+
+from __future__ import annotations
+import math
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+Coord = Tuple[int, int]  # (fila, columna)
+
+# Mismo orden que los scripts en scripts/ (orden alfabético); eller no tiene
+# script y solo se elige por nombre
+ALGORITHMS = ("aldous-broder", "backtracking", "binary-tree", "prims")
+
+# Valor que representa un muro en la matriz de cada algoritmo
+WALL_VALUE: Dict[str, int] = {
+    "aldous-broder": 1,
+    "backtracking": 1,
+    "binary-tree": 0,
+    "prims": 1,
+    "eller": 1,
+}
+
+
+def odd_size(n: int) -> int:
+    """Igual que `n -= n % 2; n++` en los scripts JS."""
+    return n - n % 2 + 1
+
+
+def _check_side(side: int) -> None:
+    if side not in (0, 1, 2, 3):
+        raise ValueError(f"Lado inválido: {side} (se espera 0, 1, 2 o 3)")
+
+
+# ---------------------------------------------------------------------
+# Aldous-Broder
+# ---------------------------------------------------------------------
+
+def _fold(y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Pliega una caminata libre sobre Z al intervalo [0, n). Un paso que se
+    saldría del intervalo se convierte en "quedarse quieto".
+    """
+    m = y % (2 * n)
+    return np.where(m >= n, 2 * n - 1 - m, m)
+
+
+def aldous_broder(width: int, height: int, start_side: int = 0, start_rel: float = 0,
+                  end_side: int = 3, end_rel: float = 0,
+                  seed: Optional[int] = None) -> np.ndarray:
+    """
+    Aldous-Broder (equivalente a scripts/aldous-broder.js). 1=muro, 0=camino.
+
+    La caminata aleatoria se calcula por bloques: cada eje es una caminata
+    libre (suma acumulada) plegada al rango de celdas, y los pasos rechazados
+    en el borde se quedan quietos, lo que equivale a elegir uniformemente
+    entre los vecinos válidos. Solo las primeras visitas tallan pasillos.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = odd_size(width), odd_size(height)
+    maze = np.ones((height, width), dtype=np.uint8)
+    ch, cw = height // 2, width // 2
+    total = ch * cw
+
+    visited = np.zeros(total, dtype=bool)
+    a, b = int(rng.integers(ch)), int(rng.integers(cw))
+    visited[a * cw + b] = True
+    maze[2 * a + 1, 2 * b + 1] = 0
+    remaining = total - 1
+
+    ya, xb = a, b  # posición "desplegada" de la caminata libre
+    chunk = min(max(4 * total, 1 << 12), 1 << 21)
+    while remaining > 0:
+        axis = rng.integers(0, 2, chunk, dtype=np.int8)
+        step = rng.integers(0, 2, chunk, dtype=np.int8) * 2 - 1
+        dy = np.where(axis == 0, step, 0)
+        dx = np.where(axis == 1, step, 0)
+        uy = np.concatenate(([ya], ya + np.cumsum(dy, dtype=np.int64)))
+        ux = np.concatenate(([xb], xb + np.cumsum(dx, dtype=np.int64)))
+        ya, xb = int(uy[-1]) % (2 * ch), int(ux[-1]) % (2 * cw)
+        pa, pb = _fold(uy, ch), _fold(ux, cw)
+
+        ids = pa[1:] * cw + pb[1:]
+        new = np.flatnonzero(~visited[ids])
+        if new.size == 0:
+            continue
+        _, first = np.unique(ids[new], return_index=True)
+        t = new[first] + 1  # índice en pa/pb de cada primera visita
+        visited[pa[t] * cw + pb[t]] = True
+        remaining -= t.size
+        maze[2 * pa[t] + 1, 2 * pb[t] + 1] = 0
+        maze[pa[t - 1] + pa[t] + 1, pb[t - 1] + pb[t] + 1] = 0
+
+    for side, rel in ((start_side, start_rel), (end_side, end_rel)):
+        cell = _opening_aldous_broder(side, rel, height, width)
+        if cell is not None:
+            maze[cell] = 0
+    return maze
+
+
+def _opening_aldous_broder(side: int, rel: float, height: int, width: int) -> Optional[Coord]:
+    def clamp(v: float, mx: int) -> int:
+        return max(0, min(mx - 1, math.floor(v)))
+    if side == 0:
+        return 0, clamp(1 + (width - 3) * rel, width)
+    if side == 1:
+        return clamp(1 + (height - 3) * rel, height), width - 1
+    if side == 2:
+        return clamp(1 + (height - 3) * rel, height), 0
+    if side == 3:
+        return height - 1, clamp(1 + (width - 3) * rel, width)
+    return None  # el script ignora lados inválidos
+
+
+# ---------------------------------------------------------------------
+# Backtracking (DFS)
+# ---------------------------------------------------------------------
+
+def _carve(maze: np.ndarray, cw: int, cells: list, walls: list) -> None:
+    """Talla en bloque las celdas y los muros intermedios registrados."""
+    cells_a = np.asarray(cells, dtype=np.int64)
+    maze[2 * (cells_a // cw) + 1, 2 * (cells_a % cw) + 1] = 0
+    if walls:
+        w = np.asarray(walls, dtype=np.int64)
+        src, dst = w[:, 0], w[:, 1]
+        maze[src // cw + dst // cw + 1, src % cw + dst % cw + 1] = 0
+
+
+class _Uniform:
+    """Números uniformes en [0, 1) sacados del RNG por lotes."""
+    def __init__(self, rng: np.random.Generator, batch: int = 1 << 16):
+        self.rng = rng
+        self.batch = batch
+        self.buf: list = []
+
+    def pick(self, n: int) -> int:
+        if not self.buf:
+            self.buf = self.rng.random(self.batch).tolist()
+        return int(self.buf.pop() * n)
+
+
+def backtracking(width: int, height: int, start_side: int = 0, start_rel: float = 0.5,
+                 end_side: int = 0, end_rel: float = 0.5,
+                 seed: Optional[int] = None) -> np.ndarray:
+    """Backtracking recursivo (equivalente a scripts/backtracking.js). 1=muro, 0=camino."""
+    _check_side(start_side)
+    _check_side(end_side)
+    rng = np.random.default_rng(seed)
+    width, height = odd_size(width), odd_size(height)
+    maze = np.ones((height, width), dtype=np.uint8)
+    ch, cw = height // 2, width // 2
+
+    maze[_opening_backtracking(start_side, start_rel, height, width)] = 0
+
+    uni = _Uniform(rng)
+    vis = bytearray(ch * cw)
+    first = int(rng.integers(ch)) * cw + int(rng.integers(cw))
+    vis[first] = 1
+    stack = [first]
+    cells, walls = [first], []
+    last_row = (ch - 1) * cw
+    while stack:
+        c = stack[-1]
+        q = c % cw
+        n = []
+        if c >= cw and not vis[c - cw]:
+            n.append(c - cw)
+        if c < last_row and not vis[c + cw]:
+            n.append(c + cw)
+        if q > 0 and not vis[c - 1]:
+            n.append(c - 1)
+        if q < cw - 1 and not vis[c + 1]:
+            n.append(c + 1)
+        if not n:
+            stack.pop()
+            continue
+        nxt = n[uni.pick(len(n))] if len(n) > 1 else n[0]
+        vis[nxt] = 1
+        stack.append(nxt)
+        cells.append(nxt)
+        walls.append((c, nxt))
+
+    _carve(maze, cw, cells, walls)
+    maze[_opening_backtracking(end_side, end_rel, height, width)] = 0
+    return maze
+
+
+def _opening_backtracking(side: int, rel: float, height: int, width: int) -> Coord:
+    def clamp(mx: int) -> int:
+        return max(1, min(mx - 2, math.floor(rel * (mx - 2) / 2) * 2 + 1))
+    if side == 0:
+        return height - 1, clamp(width)
+    if side == 1:
+        return clamp(height), width - 1
+    if side == 2:
+        return clamp(height), 0
+    return 0, clamp(width)
+
+
+# ---------------------------------------------------------------------
+# Binary tree
+# ---------------------------------------------------------------------
+
+def binary_tree(width: int, height: int, start_side: int = 0, start_rel: float = 0.5,
+                end_side: int = 3, end_rel: float = 0.5,
+                seed: Optional[int] = None) -> np.ndarray:
+    """
+    Binary tree (equivalente a scripts/binary-tree.js). 0=muro, 1=camino.
+    Completamente vectorizado: una tirada aleatoria por celda.
+    """
+    _check_side(start_side)
+    _check_side(end_side)
+    rng = np.random.default_rng(seed)
+    width, height = odd_size(width), odd_size(height)
+    maze = np.zeros((height, width), dtype=np.uint8)
+    maze[1::2, 1::2] = 1
+    ch, cw = height // 2, width // 2
+
+    south = rng.integers(0, 2, (ch, cw), dtype=np.uint8).astype(bool)
+    south[-1, :] = False   # última fila: hacia la derecha
+    south[:, -1] = True    # última columna: hacia abajo
+    down = south.copy()
+    down[-1, -1] = False   # la esquina final no talla nada
+    right = ~south
+    maze[2::2, 1::2][down] = 1
+    maze[1::2, 2::2][right] = 1
+
+    for side, rel in ((start_side, start_rel), (end_side, end_rel)):
+        maze[_opening_binary_tree(side, rel, height, width)] = 1
+    return maze
+
+
+def _opening_binary_tree(side: int, rel: float, height: int, width: int) -> Coord:
+    def coord(dim: int) -> int:
+        pos = math.floor(rel * dim)
+        if pos % 2 == 0:
+            pos += 1
+        return max(1, min(dim - 2, pos))
+
+    # El script JS usa `side % 2` para elegir la dimensión, lo que en
+    # laberintos no cuadrados se sale de la matriz; aquí se usa la dimensión
+    # del lado (idéntico al script cuando width == height).
+    x = (coord(width), 0, width - 1, coord(width))[side]
+    y = (height - 1, coord(height), coord(height), 0)[side]
+    return y, x
+
+
+# ---------------------------------------------------------------------
+# Prim (modificado)
+# ---------------------------------------------------------------------
+
+def prims(width: int, height: int, start_side: int = 0, start_rel: float = 0.5,
+          end_side: int = 0, end_rel: float = 0.5,
+          seed: Optional[int] = None) -> np.ndarray:
+    """Prim aleatorio (equivalente a scripts/prims.js). 1=muro, 0=camino."""
+    rng = np.random.default_rng(seed)
+    width, height = odd_size(width), odd_size(height)
+    maze = np.ones((height, width), dtype=np.uint8)
+    ch, cw = height // 2, width // 2
+
+    uni = _Uniform(rng)
+    vis = bytearray(ch * cw)
+    first = int(rng.integers(ch)) * cw + int(rng.integers(cw))
+    vis[first] = 1
+    open_cells = [first]
+    cells, walls = [first], []
+    last_row = (ch - 1) * cw
+
+    def remove(i: int) -> None:
+        # El orden de open_cells no importa: se elige siempre al azar
+        last = open_cells.pop()
+        if i < len(open_cells):
+            open_cells[i] = last
+
+    while open_cells:
+        i = uni.pick(len(open_cells))
+        c = open_cells[i]
+        q = c % cw
+        n = []
+        if c >= cw and not vis[c - cw]:
+            n.append(c - cw)
+        if c < last_row and not vis[c + cw]:
+            n.append(c + cw)
+        if q > 0 and not vis[c - 1]:
+            n.append(c - 1)
+        if q < cw - 1 and not vis[c + 1]:
+            n.append(c + 1)
+        if not n:
+            remove(i)
+            continue
+        nxt = n[uni.pick(len(n))] if len(n) > 1 else n[0]
+        vis[nxt] = 1
+        open_cells.append(nxt)
+        if len(n) == 1:
+            remove(i)
+        cells.append(nxt)
+        walls.append((c, nxt))
+
+    _carve(maze, cw, cells, walls)
+
+    inward = {0: (-1, 0), 1: (0, -1), 2: (0, 1), 3: (1, 0)}
+    for side, rel in ((start_side, start_rel), (end_side, end_rel)):
+        i, j = _opening_prims(side, rel, height, width)
+        maze[i, j] = 0
+        # También abrir una celda vecina para asegurar conexión
+        if side in inward:
+            di, dj = inward[side]
+            maze[i + di, j + dj] = 0
+    return maze
+
+
+def _opening_prims(side: int, rel: float, height: int, width: int) -> Coord:
+    if side == 0:
+        return height - 1, 1 + 2 * math.floor(((width - 2) / 2) * rel)
+    if side == 1:
+        return 1 + 2 * math.floor(((height - 2) / 2) * rel), width - 1
+    if side == 2:
+        return 1 + 2 * math.floor(((height - 2) / 2) * rel), 0
+    if side == 3:
+        return 0, 1 + 2 * math.floor(((width - 2) / 2) * rel)
+    return 0, 1
+
+
+# ---------------------------------------------------------------------
+# Eller (por filas, memoria acotada)
+# ---------------------------------------------------------------------
+
+def _eller_join(sets: np.ndarray, join: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Une conjuntos vecinos de una fila. `join` marca los pares (j, j+1) que se
+    quieren unir; solo se talla un par si sus celdas siguen en conjuntos
+    distintos al recorrer la fila de izquierda a derecha (Kruskal con el
+    índice del par como peso). Devuelve (pares tallados, conjuntos unidos).
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+
+    n = sets.size
+    carve = np.zeros(n - 1, dtype=bool)
+    pos = np.flatnonzero(join & (sets[:-1] != sets[1:]))
+    if pos.size == 0:
+        return carve, sets
+    a, b = sets[pos], sets[pos + 1]
+    # Entre dos conjuntos solo cuenta el primer par (el de menor índice)
+    _, first = np.unique(np.minimum(a, b) * n + np.maximum(a, b), return_index=True)
+    pos, a, b = pos[first], a[first], b[first]
+    graph = coo_matrix((pos + 1.0, (a, b)), shape=(n, n)).tocsr()
+    tree = minimum_spanning_tree(graph)
+    carve[tree.data.astype(np.int64) - 1] = True
+    _, comp = connected_components(tree, directed=False)
+    return carve, comp[sets]
+
+
+def eller_rows(width: int, height: int, start_side: int = 0, start_rel: float = 0.5,
+               end_side: int = 0, end_rel: float = 0.5,
+               seed: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Algoritmo de Eller fila a fila. 1=muro, 0=camino.
+
+    Genera las filas de la matriz (uint8, ancho impar) de arriba abajo sin
+    guardar las anteriores: el estado es solo el conjunto de cada celda de
+    la fila actual, así que la memoria depende del ancho y no del alto. La
+    entrada y la salida siguen las reglas de backtracking (lado 0: abajo,
+    1: derecha, 2: izquierda, 3: arriba; posición en una celda impar).
+    """
+    _check_side(start_side)
+    _check_side(end_side)
+    rng = np.random.default_rng(seed)
+    width, height = odd_size(width), odd_size(height)
+    ch, cw = height // 2, width // 2
+    openings = [_opening_backtracking(side, rel, height, width)
+                for side, rel in ((start_side, start_rel), (end_side, end_rel))]
+
+    def emit(r: int, row: np.ndarray) -> np.ndarray:
+        for i, j in openings:
+            if i == r:
+                row[j] = 0
+        return row
+
+    row = np.ones(width, dtype=np.uint8)
+    yield emit(0, row)
+    sets = np.arange(cw)
+    for i in range(ch):
+        last = i == ch - 1
+        join = np.ones(cw - 1, dtype=bool) if last else rng.random(cw - 1) < 0.5
+        carve, sets = _eller_join(sets, join)
+        row = np.ones(width, dtype=np.uint8)
+        row[1::2] = 0
+        row[2:-1:2][carve] = 0
+        yield emit(2 * i + 1, row)
+
+        row = np.ones(width, dtype=np.uint8)
+        if not last:
+            # Cada conjunto baja al menos por una celda (la primera del
+            # conjunto en un orden aleatorio); el resto, con probabilidad 1/2
+            down = rng.random(cw) < 0.5
+            perm = rng.permutation(cw)
+            _, first = np.unique(sets[perm], return_index=True)
+            down[perm[first]] = True
+            row[1::2][down] = 0
+            # Las celdas que no bajan empiezan un conjunto nuevo
+            sets = np.where(down, sets, cw + np.arange(cw))
+            sets = np.unique(sets, return_inverse=True)[1].reshape(-1)
+        yield emit(2 * i + 2, row)
+
+
+def eller(width: int, height: int, start_side: int = 0, start_rel: float = 0.5,
+          end_side: int = 0, end_rel: float = 0.5,
+          seed: Optional[int] = None) -> np.ndarray:
+    """Eller en memoria (ver eller_rows). 1=muro, 0=camino."""
+    return np.array(list(eller_rows(width, height, start_side, start_rel,
+                                    end_side, end_rel, seed=seed)), dtype=np.uint8)
+
+
+GENERATORS: Dict[str, Callable[..., np.ndarray]] = {
+    "aldous-broder": aldous_broder,
+    "backtracking": backtracking,
+    "binary-tree": binary_tree,
+    "prims": prims,
+    "eller": eller,
+}
+
+
+_OPENINGS = {
+    "aldous-broder": _opening_aldous_broder,
+    "backtracking": _opening_backtracking,
+    "binary-tree": _opening_binary_tree,
+    "prims": _opening_prims,
+    "eller": _opening_backtracking,
+}
+
+
+def opening_cells(algorithm: str, rows: int, cols: int, start_side: int, start_rel: float,
+                  end_side: int, end_rel: float) -> Tuple[Optional[Coord], Optional[Coord]]:
+    """
+    Celdas (fila, columna) de la entrada y la salida que abre el algoritmo
+    en una matriz de rows x cols (dimensiones ya impares). None si el
+    algoritmo no abre nada para ese lado.
+    """
+    opening = _OPENINGS[algorithm]
+    return (opening(start_side, start_rel, rows, cols),
+            opening(end_side, end_rel, rows, cols))
+
+
+def algorithm_name(choice) -> str:
+    """Acepta el índice (0..3) o el nombre del algoritmo."""
+    if isinstance(choice, str):
+        if choice not in GENERATORS:
+            raise ValueError(f"Algoritmo desconocido: {choice}")
+        return choice
+    return ALGORITHMS[choice]
@@ -0,0 +1,528 @@
+# -*- coding: utf-8 -*-
+"""
+maze_contract.py
+
+Preproceso de laberintos (1=espacio) para resolverlos sin recorrer pasillos
+celda a celda:
+
+1. Relleno de callejones (fill_dead_ends): se cierran iterativamente las
+   celdas abiertas con un solo vecino abierto (o ninguno). Cada iteración
+   es vectorizada y solo revisa los vecinos de las celdas recién cerradas.
+   Las celdas rellenadas forman un bosque colgado de las que quedan (cada
+   una recuerda su vecina abierta al cerrarse).
+
+2. Contracción (JunctionGraph): las celdas restantes con grado != 2 son
+   nodos; cada pasillo entre dos nodos es una arista con peso = pasos y la
+   lista de celdas interiores, para poder expandir el camino de vuelta a
+   celdas.
+
+El grafo no depende de la entrada ni de la salida. En cada consulta, cada
+extremo sube por el bosque del relleno hasta un nodo o un pasillo y se
+enlaza con los nodos de ese pasillo, como el origen virtual de
+ClusterGraph.search (maze_hpa). ContractedSolver resuelve con Dijkstra
+sobre el grafo y devuelve un SolveResult normal. El grafo se guarda en
+memoria por hash del laberinto (unos pocos) y, con cache_dir, en un .npz
+junto al laberinto (por ejemplo, MazeStore.path/junctions).
+
+Uso:
+    cg = JunctionGraph.build(grid)
+    cells = cg.shortest_path(start, goal)
+    res = ContractedSolver(cache_dir="output/store/junctions").solve(grid, start, goal)
+"""
+
+from __future__ import annotations
+import heapq
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from maze_graph import NONE, ROOT, as_graph
+from maze_store import content_hash
+from maze_water_solver import BaseSolver
+
+Coord = Tuple[int, int]  # (fila, columna)
+FILL_ROOT = -2  # fill_parent de una celda rellenada sin vecina abierta
+
+
+# ---------------------------------------------------------------------
+# Relleno de callejones
+# ---------------------------------------------------------------------
+
+def fill_dead_ends(grid: np.ndarray, keep: Iterable[Coord] = (), with_parent: bool = False):
+    """
+    Devuelve (máscara bool de celdas que siguen abiertas, iteraciones) y,
+    con with_parent=True, también fill_parent: int32 (H * W) con, para cada
+    celda rellenada, la vecina abierta que tenía al cerrarse (hacia el resto
+    del laberinto); FILL_ROOT si no tenía ninguna (su componente se rellenó
+    entera) y -1 en las celdas no rellenadas. Las rellenadas forman así un
+    bosque colgado de las celdas que quedan.
+
+    Las celdas de `keep` nunca se cierran. Se trabaja sobre una copia con
+    borde de pared para que los cuatro vecinos sean desplazamientos fijos
+    del índice plano.
+    """
+    grid = np.asarray(grid)
+    H, W = grid.shape
+    Wp = W + 2
+    padded = np.zeros((H + 2, Wp), dtype=bool)
+    padded[1:-1, 1:-1] = grid == 1
+    deg2d = np.zeros(padded.shape, dtype=np.int8)
+    deg2d[1:-1, 1:-1] = (padded[:-2, 1:-1].astype(np.int8) + padded[2:, 1:-1]
+                         + padded[1:-1, :-2] + padded[1:-1, 2:])
+    is_open = padded.ravel()
+    deg = deg2d.ravel()
+    protected = np.zeros(is_open.size, dtype=bool)
+    for r, c in keep:
+        protected[(r + 1) * Wp + c + 1] = True
+    offsets = np.array([-Wp, Wp, -1, 1])
+    if with_parent:
+        parent = np.full(is_open.size, -1, dtype=np.int64)
+        in_batch = np.zeros(is_open.size, dtype=bool)
+
+    owner = np.zeros(is_open.size, dtype=np.int32)
+    cand = np.flatnonzero(is_open & (deg <= 1) & ~protected)
+    iterations = 0
+    while cand.size:
+        iterations += 1
+        if with_parent:
+            around = cand[:, None] + offsets
+            alive = is_open[around]
+            par = np.where(alive.any(axis=1), around[np.arange(cand.size), alive.argmax(axis=1)],
+                           FILL_ROOT)
+            # Dos celdas de grado 1 vecinas entre sí se cierran a la vez: la de
+            # menor id queda como raíz para no formar un ciclo
+            in_batch[cand] = True
+            pair = (par >= 0) & in_batch[np.maximum(par, 0)] & (cand < par)
+            par[pair] = FILL_ROOT
+            in_batch[cand] = False
+            parent[cand] = par
+        is_open[cand] = False
+        nb = (cand[:, None] + offsets).ravel()
+        nb = nb[is_open[nb]]
+        np.subtract.at(deg, nb, 1)
+        # Quitar duplicados sin ordenar: solo sobrevive la última escritura
+        idx = np.arange(nb.size, dtype=np.int32)
+        owner[nb] = idx
+        nb = nb[owner[nb] == idx]
+        cand = nb[(deg[nb] <= 1) & ~protected[nb]]
+    mask = padded[1:-1, 1:-1].copy()
+    if not with_parent:
+        return mask, iterations
+    # Ids con borde -> ids de la rejilla
+    parent = parent.reshape(H + 2, Wp)[1:-1, 1:-1].ravel()
+    fill_parent = np.where(parent >= 0, (parent // Wp - 1) * W + parent % Wp - 1, parent)
+    return mask, iterations, fill_parent.astype(np.int32)
+
+
+# ---------------------------------------------------------------------
+# Grafo de cruces
+# ---------------------------------------------------------------------
+
+class JunctionGraph:
+    """
+    Grafo ponderado de cruces de un laberinto (tras el relleno de callejones).
+
+    No depende de la entrada ni de la salida: en la consulta (search) cada
+    extremo sube por el bosque de celdas rellenadas hasta la parte que
+    queda (un nodo o el interior de un pasillo) y se enlaza desde ahí con
+    los nodos, como un nodo virtual.
+
+    Atributos (arrays, guardables con save/load)
+    ---------
+    H, W : int
+    nodes : int32 (n,)            id plano (fila * W + columna) de cada nodo
+    indptr, adj_node, adj_edge    CSR int32: aristas incidentes por nodo
+    edge_ends : int32 (m, 2)      nodos (a, b) de cada arista
+    edge_weight : int32 (m,)      pasos de a a b
+    edge_ptr, edge_cells          celdas interiores de la arista e, de a hacia
+                                  b: edge_cells[edge_ptr[e]:edge_ptr[e + 1]]
+    fill_parent : int32 (H * W)   bosque del relleno (ver fill_dead_ends)
+    """
+    FIELDS = ("nodes", "indptr", "adj_node", "adj_edge", "edge_ends",
+              "edge_weight", "edge_ptr", "edge_cells", "fill_parent")
+
+    def __init__(self, H: int, W: int, **arrays: np.ndarray):
+        self.H, self.W = H, W
+        for name in self.FIELDS:
+            setattr(self, name, arrays[name])
+        self.node_of: Dict[int, int] = {int(c): i for i, c in enumerate(self.nodes.tolist())}
+        self._cell_edge: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __repr__(self) -> str:
+        return f"JunctionGraph({self.H}x{self.W}, {len(self.nodes)} nodos, {len(self.edge_weight)} aristas)"
+
+    @classmethod
+    def build(cls, grid: np.ndarray, keep: Iterable[Coord] = (), prune: bool = True) -> "JunctionGraph":
+        """
+        Contrae el laberinto. Con prune=True se rellenan antes los callejones;
+        las celdas abiertas de `keep` son siempre nodos (y nunca se
+        rellenan); las cerradas se ignoran. No hace falta proteger la
+        entrada ni la salida: search enlaza cualquier celda.
+
+        Los ciclos sin ningún cruce (grado 2 en todas sus celdas) reciben un
+        nodo en una de sus celdas, con una arista de él a sí mismo.
+        """
+        grid = np.asarray(grid)
+        keep = [p for p in (tuple(map(int, p)) for p in keep) if grid[p] == 1]
+        if prune:
+            mask, _, fill_parent = fill_dead_ends(grid, keep, with_parent=True)
+        else:
+            mask = grid == 1
+            fill_parent = np.full(grid.size, -1, dtype=np.int32)
+        G = as_graph(mask.astype(np.uint8))
+        H, W = G.H, G.W
+        dirs = G.dirs
+        deg = (dirs >= 0).sum(axis=1)
+        is_node = G.open & (deg != 2)
+        for r, c in keep:
+            is_node[r * W + c] = True
+        nodes = np.flatnonzero(is_node).tolist()
+        node_of = {c: i for i, c in enumerate(nodes)}
+        # Vecinos solo de las celdas abiertas (tras el relleno quedan pocas)
+        open_ids = np.flatnonzero(G.open)
+        step = dict(zip(open_ids.tolist(), dirs[open_ids].tolist()))
+
+        ends: List[Tuple[int, int]] = []
+        weights: List[int] = []
+        cells: List[List[int]] = []
+
+        def trace(a: int, u: int) -> None:
+            for v in step[u]:
+                if v == NONE:
+                    continue
+                # Seguir el pasillo hasta el siguiente nodo
+                prev, cur, inner = u, v, []
+                while cur not in node_of:
+                    inner.append(cur)
+                    n0, n1 = (x for x in step[cur] if x != NONE)
+                    prev, cur = cur, (n1 if n0 == prev else n0)
+                b = node_of[cur]
+                # Cada pasillo se recorre desde sus dos extremos: quedarse con uno
+                forward = (a, inner[0] if inner else cur)
+                backward = (b, inner[-1] if inner else u)
+                if forward < backward:
+                    ends.append((a, b))
+                    weights.append(len(inner) + 1)
+                    cells.append(inner)
+
+        for a, u in enumerate(nodes):
+            trace(a, u)
+        # Ciclos sin cruces: ninguna arista los recorre
+        covered = np.zeros(G.size, dtype=bool)
+        covered[nodes] = True
+        covered[[x for c in cells for x in c]] = True
+        for u in np.flatnonzero(G.open & ~covered).tolist():
+            if covered[u]:
+                continue
+            node_of[u] = len(nodes)
+            nodes.append(u)
+            covered[u] = True
+            first = len(cells)
+            trace(node_of[u], u)
+            for c in cells[first:]:
+                covered[c] = True
+
+        nodes = np.array(nodes, dtype=np.int32)
+        m = len(ends)
+        edge_ends = np.array(ends, dtype=np.int32).reshape(m, 2)
+        edge_ptr = np.zeros(m + 1, dtype=np.int32)
+        np.cumsum([len(c) for c in cells], out=edge_ptr[1:])
+        edge_cells = np.array([x for c in cells for x in c], dtype=np.int32)
+
+        # CSR de incidencia (cada arista aparece en sus dos extremos; un bucle, dos veces)
+        src = np.concatenate([edge_ends[:, 0], edge_ends[:, 1]])
+        dst = np.concatenate([edge_ends[:, 1], edge_ends[:, 0]])
+        eid = np.concatenate([np.arange(m), np.arange(m)]).astype(np.int32)
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+        return cls(H, W, nodes=nodes, indptr=indptr, adj_node=dst[order].astype(np.int32),
+                   adj_edge=eid[order], edge_ends=edge_ends,
+                   edge_weight=np.array(weights, dtype=np.int32), edge_ptr=edge_ptr,
+                   edge_cells=edge_cells, fill_parent=fill_parent)
+
+    # -----------------------------------------------------------------
+    # Guardado
+    # -----------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, shape=np.array([self.H, self.W]),
+                 **{name: getattr(self, name) for name in self.FIELDS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "JunctionGraph":
+        with np.load(path) as data:
+            H, W = data["shape"].tolist()
+            return cls(H, W, **{name: data[name] for name in cls.FIELDS})
+
+    # -----------------------------------------------------------------
+    # Búsqueda
+    # -----------------------------------------------------------------
+
+    def edge_path(self, e: int, from_node: int) -> List[int]:
+        """Celdas interiores de la arista e recorrida desde from_node."""
+        inner = self.edge_cells[self.edge_ptr[e]:self.edge_ptr[e + 1]].tolist()
+        return inner if self.edge_ends[e, 0] == from_node else inner[::-1]
+
+    def cell_edge(self, cell: int) -> Tuple[int, int]:
+        """(arista, posición desde su extremo a) de una celda interior de pasillo; (-1, -1) si no."""
+        if self._cell_edge is None:
+            edge = np.full(self.H * self.W, -1, dtype=np.int32)
+            pos = np.zeros(self.H * self.W, dtype=np.int32)
+            lengths = np.diff(self.edge_ptr)
+            edge[self.edge_cells] = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+            pos[self.edge_cells] = np.arange(len(self.edge_cells)) - np.repeat(self.edge_ptr[:-1], lengths)
+            self._cell_edge = (edge, pos)
+        edge, pos = self._cell_edge
+        return int(edge[cell]), int(pos[cell])
+
+    def climb(self, cell: int) -> List[int]:
+        """Celdas de cell hasta la parte no rellenada (o la raíz de su árbol)."""
+        fp = self.fill_parent
+        walk = [cell]
+        while fp[cell] >= 0:
+            cell = int(fp[cell])
+            walk.append(cell)
+        return walk
+
+    def _anchor(self, walk: List[int], offset: int):
+        """
+        Enlaces de la celda final de `walk` con los nodos:
+        [(nodo, distancia, celdas de walk[0] hasta antes del nodo)].
+        """
+        cell = walk[-1]
+        if self.fill_parent[cell] == FILL_ROOT:
+            return []
+        base = offset + len(walk) - 1
+        if cell in self.node_of:
+            return [(self.node_of[cell], base, walk[:-1])]
+        e, i = self.cell_edge(cell)
+        if e < 0:
+            return []
+        inner = self.edge_cells[self.edge_ptr[e]:self.edge_ptr[e + 1]].tolist()
+        a, b = self.edge_ends[e].tolist()
+        return [(a, base + i + 1, walk + inner[:i][::-1]),
+                (b, base + len(inner) - i, walk + inner[i + 1:])]
+
+    def dijkstra(self, sources: Dict[int, int], targets: Dict[int, int], bound: float = float("inf")):
+        """
+        Dijkstra con varios orígenes (nodo -> distancia inicial) hasta el
+        mejor de los destinos (nodo -> distancia restante), si mejora bound.
+        Devuelve (mejor nodo destino o -1, distancia total, parent_edge,
+        settled, stats): parent_edge[n] = (nodo previo, arista) o None en
+        un origen.
+        """
+        ptr, adj, aedge = self.indptr.tolist(), self.adj_node.tolist(), self.adj_edge.tolist()
+        weight = self.edge_weight.tolist()
+        dist = dict(sources)
+        parent: Dict[int, Optional[Tuple[int, int]]] = {u: None for u in sources}
+        settled = set()
+        heap = [(d, u) for u, d in sources.items()]
+        heapq.heapify(heap)
+        best, best_node = bound, -1
+        pushes, stale, relaxed = len(heap), 0, 0
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in settled:
+                stale += 1
+                continue
+            if d >= best:
+                break
+            settled.add(u)
+            rest = targets.get(u)
+            if rest is not None and d + rest < best:
+                best, best_node = d + rest, u
+            for k in range(ptr[u], ptr[u + 1]):
+                v, e = adj[k], aedge[k]
+                relaxed += 1
+                nd = d + weight[e]
+                if nd < dist.get(v, nd + 1):
+                    dist[v] = nd
+                    parent[v] = (u, e)
+                    heapq.heappush(heap, (nd, v))
+                    pushes += 1
+        stats = {"expanded": len(settled), "neighbor_checks": relaxed,
+                 "pushes": pushes, "stale_pops": stale}
+        return best_node, best, parent, settled, stats
+
+    def expand(self, parent, target: int) -> List[int]:
+        """Camino de celdas (ids planos) desde su origen hasta el nodo target."""
+        chain = []
+        n = target
+        while parent[n] is not None:
+            prev, e = parent[n]
+            chain.append((prev, e, n))
+            n = prev
+        path = [int(self.nodes[n])]
+        for prev, e, nxt in reversed(chain):
+            path.extend(self.edge_path(e, prev))
+            path.append(int(self.nodes[nxt]))
+        return path
+
+    def search(self, starts: List[Tuple[int, int]], t: int):
+        """
+        Camino mínimo desde alguna de las celdas `starts` [(celda, pasos ya
+        dados)] hasta la celda abierta t. Devuelve (camino de ids planos,
+        vacío si no hay; array de celdas tocadas; stats).
+
+        Si un origen y t cuelgan del mismo árbol de relleno, el camino es el
+        del árbol (subir hasta el ancestro común y bajar). Si no, cada
+        extremo se enlaza con los nodos por su pasillo (_anchor) y se
+        compara además el tramo directo cuando ambos caen en el mismo
+        pasillo.
+        """
+        walk_t = self.climb(t)
+        index_t = {c: i for i, c in enumerate(walk_t)}
+        touched = list(walk_t)
+        best, best_path = float("inf"), []
+        sources: Dict[int, int] = {}
+        prefix: Dict[int, List[int]] = {}
+        targets: Dict[int, int] = {}
+        suffix: Dict[int, List[int]] = {}
+        # En un pasillo en bucle los dos extremos son el mismo nodo: el más corto
+        for node, d, cells in sorted(self._anchor(walk_t, 0), key=lambda x: -x[1]):
+            targets[node] = d
+            suffix[node] = cells[::-1]
+        edge_t = self.cell_edge(walk_t[-1]) if walk_t[-1] not in self.node_of else (-1, -1)
+        for cell, offset in starts:
+            walk = self.climb(cell)
+            touched.extend(walk)
+            meet = next((j for j, c in enumerate(walk) if c in index_t), -1)
+            if meet >= 0:
+                # Mismo árbol (o mismo punto de enlace): camino por el árbol
+                d = offset + meet + index_t[walk[meet]]
+                if d < best:
+                    best = d
+                    best_path = walk[:meet] + walk_t[:index_t[walk[meet]] + 1][::-1]
+                continue
+            if edge_t[0] >= 0 and walk[-1] not in self.node_of:
+                e, i = self.cell_edge(walk[-1])
+                if e == edge_t[0]:
+                    d = offset + len(walk) - 1 + abs(i - edge_t[1]) + len(walk_t) - 1
+                    if d < best:
+                        inner = self.edge_cells[self.edge_ptr[e]:self.edge_ptr[e + 1]].tolist()
+                        lo, hi = sorted((i, edge_t[1]))
+                        between = inner[lo + 1:hi] if i < edge_t[1] else inner[lo + 1:hi][::-1]
+                        best = d
+                        best_path = walk + between + walk_t[::-1]
+            for node, d, cells in self._anchor(walk, offset):
+                if d < sources.get(node, d + 1):
+                    sources[node] = d
+                    prefix[node] = cells
+
+        stats = {"expanded": 0, "neighbor_checks": 0, "pushes": 0, "stale_pops": 0}
+        settled = set()
+        if sources and targets:
+            end, d, parent, settled, stats = self.dijkstra(sources, targets, best)
+            if end >= 0:
+                nodes_path = self.expand(parent, end)
+                root = self.node_of[nodes_path[0]]
+                best_path = prefix[root] + nodes_path + suffix[end]
+        # Tocadas: nodos cerrados y los pasillos que salen de ellos
+        closed = np.zeros(len(self.nodes), dtype=bool)
+        closed[list(settled)] = True
+        used = np.zeros(len(self.edge_weight), dtype=bool)
+        used[self.adj_edge[np.repeat(closed, np.diff(self.indptr))]] = True
+        owner = np.repeat(used, np.diff(self.edge_ptr))
+        touched = np.concatenate([np.array(touched, dtype=np.int64), self.nodes[closed],
+                                  self.edge_cells[owner]])
+        return best_path, touched, stats
+
+    def shortest_path(self, start: Coord, goal: Coord) -> List[Coord]:
+        """Camino mínimo (celdas) entre dos celdas abiertas; vacío si no hay."""
+        path, _, _ = self.search([(start[0] * self.W + start[1], 0)], goal[0] * self.W + goal[1])
+        return [divmod(i, self.W) for i in path]
+
+
+# ---------------------------------------------------------------------
+# Solver
+# ---------------------------------------------------------------------
+
+class ContractedSolver(BaseSolver):
+    """
+    Dijkstra sobre el JunctionGraph (callejones rellenados, pasillos
+    contraídos) y expansión del camino a celdas. El camino es mínimo en
+    pasos, como el de BFS.
+
+    El grafo no depende de la entrada ni de la salida: se construye una vez
+    por laberinto y se guarda en memoria por hash del contenido (los
+    max_graphs últimos) y, con cache_dir, en un .npz por laberinto.
+
+    Como BFSSolver, una entrada cerrada sigue siendo el origen (se sale por
+    sus vecinas abiertas) y una salida cerrada no es alcanzable.
+
+    Visitadas: celdas recorridas al enlazar entrada y salida, nodos
+    cerrados y pasillos que salen de ellos, es decir, lo que la búsqueda
+    llega a tocar. El preproceso de un laberinto nuevo se mide aparte en
+    stats["preprocess_s"].
+    """
+    name = "Junction graph (dead-end fill + Dijkstra)"
+    shortest_paths = True
+
+    def __init__(self, prune: bool = True, cache_dir: Optional[str] = None, max_graphs: int = 4):
+        self.prune = prune
+        self.cache_dir = cache_dir
+        self.max_graphs = max_graphs
+        self._graphs: Dict[str, JunctionGraph] = {}
+
+    def contraction(self, grid: np.ndarray) -> JunctionGraph:
+        """JunctionGraph de grid, de memoria, de disco o nuevo."""
+        key = content_hash(grid)
+        cg = self._graphs.get(key)
+        if cg is not None:
+            return cg
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, f"{key}{'' if self.prune else '_full'}.npz")
+        if path is not None and os.path.exists(path):
+            cg = JunctionGraph.load(path)
+        else:
+            cg = JunctionGraph.build(grid, prune=self.prune)
+            if path is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                cg.save(path)
+        while len(self._graphs) >= self.max_graphs:
+            self._graphs.pop(next(iter(self._graphs)))
+        self._graphs[key] = cg
+        return cg
+
+    def solve(self, grid, start, goal):
+        G = as_graph(grid)
+        start, goal = tuple(start), tuple(goal)
+        t_pre = time.perf_counter() if self.instrumented else 0.0
+        cg = self.contraction(G.grid)
+        t0 = self._begin(start, goal)
+        pre_s = t0 - t_pre
+
+        s, t = G.id(start), G.id(goal)
+        cells: List[int] = [s] if s == t else []
+        touched, counts = [], {}
+        if s == t or not G.open[t]:
+            pass  # salida cerrada: no alcanzable
+        elif G.open[s]:
+            cells, touched, counts = cg.search([(s, 0)], t)
+        else:
+            # Entrada cerrada: orígenes en sus vecinas abiertas, a un paso
+            starts = [(int(v), 1) for v in G.dirs[s] if v != NONE]
+            if starts:
+                cells, touched, counts = cg.search(starts, t)
+            if cells:
+                cells = [s] + cells
+
+        visited = np.zeros(G.size, dtype=bool)
+        visited[touched] = True
+        visited[s] = True
+        parent = G.parent_buffer()
+        parent[s] = ROOT
+        if cells:
+            for a, b in zip(cells, cells[1:]):
+                parent[b] = a
+            visited[cells] = True
+        res = self._finish(G, parent, t, visited, t0)
+        if res.stats is not None:
+            res.stats.update(counts, preprocess_s=pre_s)
+        return res
@@ -1,20 +1,238 @@
 import subprocess
 import os
+import json
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import numpy as np
 import ast
 from scipy.ndimage import zoom
 
-def generate_maze(choice, width, height, start_side, start_rel, end_side, end_rel):
+import maze_algorithms
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, "scripts")
+OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+
+BACKENDS = ("numpy", "node")
+
+
+def run_node_script(algorithm, width, height, start_side, start_rel, end_side, end_rel):
+    """
+    Ejecuta el script JS del algoritmo con Node y devuelve la matriz.
+
+    Backend opcional: lanza un proceso por laberinto y parsea la salida de
+    texto. Los scripts usan Math.random, por lo que no admiten semilla.
+    """
+    script_path = os.path.join(SCRIPTS_DIR, f"{algorithm}.js")
+    try:
+        # Ejecuta el script con todos los argumentos necesarios
+        result = subprocess.run(
+            [
+                "node", script_path,
+                str(width), str(height),
+                str(start_side), str(start_rel),
+                str(end_side), str(end_rel)
+            ],
+            capture_output=True,
+            text=True
+        )
+    except FileNotFoundError:
+        raise FileNotFoundError("Node.js no está instalado o no se encuentra en el PATH.")
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Error ejecutando script JS:\n{result.stderr}")
+    try:
+        return np.array(ast.literal_eval(result.stdout), dtype=np.uint8)
+    except (ValueError, SyntaxError) as e:
+        raise RuntimeError(f"Salida del script JS ilegible ({algorithm} {width}x{height}): {e}")
+
+
+def build_maze(choice, width, height, start_side, start_rel, end_side, end_rel,
+               seed=None, backend="numpy"):
+    """
+    Genera la matriz de un laberinto sin escribir nada en disco.
+
+    Devuelve (algoritmo, matriz). Con backend="numpy" se usan los generadores
+    de maze_algorithms (con semilla); con backend="node" los scripts JS.
     """
-    Genera un laberinto utilizando algoritmos de JavaScript.
+    algorithm = maze_algorithms.algorithm_name(choice)
+    if backend == "numpy":
+        gen = maze_algorithms.GENERATORS[algorithm]
+        return algorithm, gen(width, height, start_side, start_rel, end_side, end_rel, seed=seed)
+    if backend == "node":
+        if seed is not None:
+            raise ValueError("El backend 'node' no admite semilla (usa Math.random).")
+        return algorithm, run_node_script(algorithm, width, height,
+                                          start_side, start_rel, end_side, end_rel)
+    raise ValueError(f"Backend desconocido: {backend} (opciones: {BACKENDS})")
+
+
+def maze_metadata(algorithm, width, height, start_side, start_rel, end_side, end_rel):
+    """Cabecera de 5 líneas de los archivos .txt."""
+    return (
+        f"algorithm: {algorithm}\n"
+        f"width: {width}\n"
+        f"height: {height}\n"
+        f"start: side {start_side}, relative {start_rel}\n"
+        f"end: side {end_side}, relative {end_rel}\n"
+    )
+
+
+# ---------------------------------------------------------------------
+# Formato binario (.maze)
+# ---------------------------------------------------------------------
+# Cabecera estructurada de 128 bytes seguida de la matriz fila a fila:
+# uint8 (una celda por byte, abrible con np.memmap sin copia) o, con
+# packed=1, np.packbits por fila (8 celdas por byte).
+
+MAZE_MAGIC = b"MAZE"
+MAZE_VERSION = 1
+FORMATS = ("maze", "txt")
+
+_HEADER_FIELDS = [
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("packed", "u1"),
+    ("wall", "u1"),
+    ("algorithm", "S16"),
+    ("width", "<u4"),
+    ("height", "<u4"),
+    ("rows", "<u4"),
+    ("cols", "<u4"),
+    ("start_side", "u1"),
+    ("end_side", "u1"),
+    ("start_rel", "<f8"),
+    ("end_rel", "<f8"),
+    ("seed", "<i8"),
+]
+HEADER_SIZE = 128
+HEADER_DTYPE = np.dtype(_HEADER_FIELDS + [
+    ("reserved", f"V{HEADER_SIZE - np.dtype(_HEADER_FIELDS).itemsize}"),
+])
+
+
+def make_header(maze, algorithm, width, height, start_side, start_rel, end_side, end_rel,
+                seed=None, packed=False):
+    """Construye la cabecera binaria de un laberinto (seed=None se guarda como -1)."""
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header["magic"] = MAZE_MAGIC
+    header["version"] = MAZE_VERSION
+    header["packed"] = int(packed)
+    header["wall"] = maze_algorithms.WALL_VALUE.get(algorithm, 1)
+    header["algorithm"] = algorithm.encode()
+    header["width"], header["height"] = width, height
+    header["rows"], header["cols"] = maze.shape
+    header["start_side"], header["start_rel"] = start_side, start_rel
+    header["end_side"], header["end_rel"] = end_side, end_rel
+    header["seed"] = -1 if seed is None else seed
+    return header
+
+
+def header_to_dict(header):
+    """Cabecera binaria -> dict con tipos de Python."""
+    d = {name: header[name].item() for name, _ in _HEADER_FIELDS}
+    d["magic"] = d["magic"].decode()
+    d["algorithm"] = d["algorithm"].decode()
+    d["packed"] = bool(d["packed"])
+    d["seed"] = None if d["seed"] < 0 else d["seed"]
+    return d
+
+
+def read_maze_header(maze_file):
+    """Lee solo la cabecera de un archivo .maze y la devuelve como dict."""
+    header = np.fromfile(maze_file, dtype=HEADER_DTYPE, count=1)
+    if header.size == 0 or header[0]["magic"] != MAZE_MAGIC:
+        raise ValueError(f"{maze_file} no es un archivo .maze")
+    return header_to_dict(header[0])
+
+
+def write_maze(ruta, maze, algorithm, width, height, start_side, start_rel, end_side, end_rel,
+               seed=None, packed=False, mode="w"):
+    """
+    Escribe un laberinto en ruta. El formato lo decide la extensión:
+    .maze (binario) o .txt (metadatos de 5 líneas + lista anidada).
+    mode="x" falla con FileExistsError si el archivo ya existe.
+    """
+    if ruta.endswith(".txt"):
+        with open(ruta, mode, encoding="utf-8") as f:
+            f.write(maze_metadata(algorithm, width, height, start_side, start_rel, end_side, end_rel))
+            f.write(json.dumps(np.asarray(maze).tolist()))
+        return
+    header = make_header(maze, algorithm, width, height, start_side, start_rel,
+                         end_side, end_rel, seed=seed, packed=packed)
+    data = np.ascontiguousarray(maze, dtype=np.uint8)
+    if packed:
+        data = np.packbits(data, axis=1)
+    with open(ruta, mode + "b") as f:
+        f.write(header.tobytes())
+        data.tofile(f)
+
+
+def _read_binary(maze_file):
+    h = read_maze_header(maze_file)
+    shape = (h["rows"], h["cols"])
+    if h["packed"]:
+        bits = np.memmap(maze_file, dtype=np.uint8, mode="r", offset=HEADER_SIZE,
+                         shape=(shape[0], (shape[1] + 7) // 8))
+        matriz = np.unpackbits(bits, axis=1, count=shape[1])
+    else:
+        # Sin copia: las páginas se leen del disco al acceder a ellas
+        matriz = np.memmap(maze_file, dtype=np.uint8, mode="r", offset=HEADER_SIZE, shape=shape)
+    metadata = maze_metadata(h["algorithm"], h["width"], h["height"],
+                             h["start_side"], h["start_rel"], h["end_side"], h["end_rel"])
+    return metadata, matriz
+
+
+def parse_metadata(metadata):
+    """Interpreta la cabecera de texto de 5 líneas de los archivos .txt."""
+    fields = {}
+    for line in metadata.splitlines():
+        key, _, value = line.partition(":")
+        fields[key.strip()] = value.strip()
+    start = fields["start"].replace("side", "").replace("relative", "").split(",")
+    end = fields["end"].replace("side", "").replace("relative", "").split(",")
+    return dict(
+        algorithm=fields["algorithm"],
+        width=int(fields["width"]), height=int(fields["height"]),
+        start_side=int(start[0]), start_rel=float(start[1]),
+        end_side=int(end[0]), end_rel=float(end[1]),
+    )
+
+
+def convert_to_binary(txt_file, packed=False, remove=False):
+    """Convierte un laberinto .txt al formato .maze (misma ruta, otra extensión)."""
+    metadata, matriz = read_maze(txt_file)
+    ruta = os.path.splitext(txt_file)[0] + ".maze"
+    write_maze(ruta, matriz, packed=packed, **parse_metadata(metadata))
+    if remove:
+        os.remove(txt_file)
+    return ruta
+
+
+def convert_output_dir(output_dir=OUTPUT_DIR, packed=False, remove=False):
+    """
+    Migra todos los .txt de output_dir al formato .maze.
+    Por defecto conserva los .txt originales (remove=True los borra).
+    """
+    return [convert_to_binary(os.path.join(output_dir, f), packed=packed, remove=remove)
+            for f in sorted(os.listdir(output_dir)) if f.endswith(".txt")]
+
+
+def generate_maze(choice, width, height, start_side, start_rel, end_side, end_rel,
+                  seed=None, backend="numpy", output_dir=OUTPUT_DIR, fmt="maze", packed=False,
+                  store=None, cache=None):
+    """
+    Genera un laberinto y lo guarda en output_dir.
 
     Esta función permite seleccionar un algoritmo de generación de laberintos,
     especificar sus dimensiones y definir las coordenadas relativas de entrada y salida.
 
     Parámetros
     ----------
-    choice : int
-        Algoritmo seleccionado (0, 1, 2, ...)
+    choice : int | str
+        Algoritmo seleccionado (0, 1, 2, ... o su nombre)
             [0] aldous-broder
             [1] backtracking
             [2] binary-tree
@@ -32,73 +250,392 @@ def generate_maze(choice, width, height, start_side, start_rel, end_side, end_re
         Lado de salida (0: abajo, 1: derecha, 2: izquierda, 3: arriba)
     end_rel : float
         Posición relativa en el lado de salida (entre 0 y 1)
+    seed : int, opcional
+        Semilla del generador (solo backend "numpy")
+    backend : str
+        "numpy" (por defecto, en proceso) o "node" (scripts JS en scripts/)
+    output_dir : str
+        Carpeta de salida
+    fmt : str
+        "maze" (binario, por defecto) o "txt" (formato de texto heredado)
+    packed : bool
+        Solo "maze": guarda la matriz empaquetada a 1 bit por celda
+    store : MazeStore | str, opcional
+        Si se indica, el laberinto se añade a este almacén (maze_store) en
+        lugar de escribirse en output_dir
+    cache : MazeCache | str | True, opcional
+        Si se indica (requiere semilla), el laberinto se busca en la caché en
+        disco (True = CACHE_DIR) y solo se genera si no está; no se escribe
+        ningún maze_{n}
+
+    Retorna
+    -------
+    tuple: (ruta, matriz) del laberinto generado; con store, (id, matriz);
+    con cache, (clave, matriz)
 
     Archivos generados
     ------------------
-    Ubicación: Mazes/output/maze_{n}.txt
-    Formato: Metadatos (algoritmo, dimensiones, entrada/salida) + matriz
+    Ubicación: output/maze_{n}.maze (o .txt)
+    Formato: Cabecera binaria de 128 bytes (HEADER_DTYPE) + matriz uint8,
+    o en .txt: Metadatos (algoritmo, dimensiones, entrada/salida) + matriz
 
     Requisitos
     ----------
-    - Node.js instalado
-    - Scripts JS ubicados en Mazes/scripts/
-    - Carpeta Mazes/output/ existente
+    - Node.js instalado y scripts JS en scripts/ (solo backend "node")
+    - Carpeta output/ existente
 
     Excepciones
     -----------
     - FileNotFoundError: Node.js no está instalado
     - Exception: Otros errores de ejecución
     """
-
-    scripts_dir = "C:/Users/JD/Desktop/fluid_sim/Maze_generation/scripts"
-    output_dir = "C:/Users/JD/Desktop/fluid_sim/Maze_generation/output"
-
-    
-    mazes = len([f for f in os.listdir(output_dir) if f.endswith(".txt")])
-
-
-    scripts = [f for f in os.listdir(scripts_dir) if f.endswith(".js")]
-    script_path = os.path.join(scripts_dir, scripts[choice])
-    
     try:
-        # Ejecuta el script con todos los argumentos necesarios
-        result = subprocess.run(
-            [
-                "node", script_path,
-                str(width), str(height),
-                str(start_side), str(start_rel),
-                str(end_side), str(end_rel)
-            ],
-            capture_output=True,
-            text=True
-        )
+        if cache is not None:
+            return cached_maze(choice, width, height, start_side, start_rel,
+                               end_side, end_rel, seed, cache=cache)
 
-        if result.returncode != 0:
-            raise Exception(f"Error ejecutando script JS:\n{result.stderr}")
+        algorithm, maze = build_maze(choice, width, height, start_side, start_rel,
+                                     end_side, end_rel, seed=seed, backend=backend)
 
-        maze = result.stdout
-        metadata = (
-            f"algorithm: {scripts[choice][:-3]}\n"
-            f"width: {width}\n"
-            f"height: {height}\n"
-            f"start: side {start_side}, relative {start_rel}\n"
-            f"end: side {end_side}, relative {end_rel}\n"
-        )
+        if store is not None:
+            ruta = open_store(store).append(maze, algorithm, width, height, start_side, start_rel,
+                                            end_side, end_rel, seed=seed)
+            print("Laberinto generado correctamente")
+            return ruta, maze
 
-        with open(f"{output_dir}/maze_{mazes}.txt", "w", encoding="utf-8") as f:
-            f.write(metadata)
-            f.write(maze)
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato desconocido: {fmt} (opciones: {FORMATS})")
+
+        # Reserva el nombre con creación exclusiva: dos llamadas concurrentes
+        # nunca escriben sobre el mismo maze_{n}
+        stems = {os.path.splitext(f)[0] for f in os.listdir(output_dir)
+                 if f.endswith((".txt", ".maze"))}
+        mazes = len(stems)
+        while True:
+            base = os.path.join(output_dir, f"maze_{mazes}")
+            ruta = f"{base}.{fmt}"
+            if not any(os.path.exists(f"{base}.{ext}") for ext in FORMATS):
+                try:
+                    write_maze(ruta, maze, algorithm, width, height, start_side, start_rel,
+                               end_side, end_rel, seed=seed, packed=packed, mode="x")
+                    break
+                except FileExistsError:
+                    pass
+            mazes += 1
 
     except FileNotFoundError:
-        raise FileNotFoundError("Node.js no está instalado o no se encuentra en el PATH.")
+        raise
     except Exception as e:
         raise RuntimeError(f"Ocurrió un error al generar el laberinto: {e}")
     print("Laberinto generado correctamente")
+    return ruta, maze
+
+def stream_maze(ruta, width, height, start_side, start_rel, end_side, end_rel,
+                seed=None, packed=False, block_bytes=16 << 20):
+    """
+    Genera un laberinto de Eller directamente en un archivo .maze, fila a fila.
+
+    La matriz nunca está entera en memoria: el archivo se crea con su tamaño
+    final y las filas de maze_algorithms.eller_rows se escriben por ventanas
+    de np.memmap de block_bytes como máximo. Sirve para laberintos enormes
+    (p. ej. 20000x20000) que luego se leen con read_maze sin copia.
+
+    Args:
+        ruta (str): Archivo .maze de salida (se sobrescribe)
+        width, height (int): Dimensiones (se fuerzan a impares)
+        start_side, start_rel, end_side, end_rel: Como en generate_maze
+        seed (int): Semilla
+        packed (bool): Guardar a 1 bit por celda
+        block_bytes (int): Tamaño máximo de cada ventana de escritura
+
+    Returns:
+        str: ruta del archivo
+    """
+    rows, cols = maze_algorithms.odd_size(height), maze_algorithms.odd_size(width)
+    # Solo se necesita la forma para la cabecera
+    shape_only = np.broadcast_to(np.uint8(0), (rows, cols))
+    header = make_header(shape_only, "eller", width, height, start_side, start_rel,
+                         end_side, end_rel, seed=seed, packed=packed)
+    row_bytes = (cols + 7) // 8 if packed else cols
+    with open(ruta, "wb") as f:
+        f.write(header.tobytes())
+        f.truncate(HEADER_SIZE + rows * row_bytes)
+
+    block_rows = max(1, block_bytes // row_bytes)
+    it = maze_algorithms.eller_rows(width, height, start_side, start_rel,
+                                    end_side, end_rel, seed=seed)
+    for r0 in range(0, rows, block_rows):
+        n = min(block_rows, rows - r0)
+        window = np.memmap(ruta, dtype=np.uint8, mode="r+",
+                           offset=HEADER_SIZE + r0 * row_bytes, shape=(n, row_bytes))
+        for k in range(n):
+            row = next(it)
+            window[k] = np.packbits(row) if packed else row
+        window.flush()
+        del window
+    return ruta
+
+
+# ---------------------------------------------------------------------
+# Generación por lotes
+# ---------------------------------------------------------------------
+
+MazeSpec = namedtuple(
+    "MazeSpec",
+    ["algorithm", "width", "height", "start_side", "start_rel", "end_side", "end_rel", "seed"],
+)
+
+
+def as_spec(spec):
+    """
+    Normaliza una especificación de laberinto a MazeSpec.
+
+    Acepta un MazeSpec o una tupla (algorithm, size, sides, seed) donde
+    size es un int o (width, height) y sides es
+    (start_side, start_rel, end_side, end_rel).
+    """
+    if isinstance(spec, MazeSpec):
+        algorithm, width, height, ss, sr, es, er, seed = spec
+    else:
+        algorithm, size, sides, seed = spec
+        width, height = (size, size) if np.ndim(size) == 0 else size
+        ss, sr, es, er = sides
+    if seed is None:
+        raise ValueError("Los lotes requieren semilla para que el resultado sea determinista.")
+    return MazeSpec(maze_algorithms.algorithm_name(algorithm), int(width), int(height),
+                    int(ss), float(sr), int(es), float(er), int(seed))
+
+
+def spec_name(spec):
+    """
+    Nombre de archivo único y determinista para una especificación.
+
+    La parte legible (algoritmo, tamaño, semilla) se completa con un hash
+    corto de todos los parámetros, así que dos especificaciones distintas
+    nunca comparten nombre y la misma siempre produce el mismo.
+    """
+    digest = hashlib.sha1(repr(tuple(spec)).encode()).hexdigest()[:10]
+    return f"maze_{spec.algorithm}_{spec.width}x{spec.height}_s{spec.seed}_{digest}"
+
+
+def _generate_spec(spec, output_dir, fmt="maze"):
+    """Trabajo de un proceso del pool: genera, escribe y devuelve su entrada del manifiesto."""
+    maze = _build_spec(spec)
+    ruta = os.path.join(output_dir, f"{spec_name(spec)}.{fmt}")
+    write_maze(ruta, maze, *spec)
+    return dict(spec._asdict(), path=ruta)
+
+
+def _build_spec(spec):
+    """Trabajo de un proceso del pool cuando el destino es un MazeStore."""
+    return build_maze(spec.algorithm, spec.width, spec.height, spec.start_side,
+                      spec.start_rel, spec.end_side, spec.end_rel, seed=spec.seed)[1]
+
+
+def _pool_map(fn, items, workers):
+    """map perezoso, en un pool de procesos si workers > 1."""
+    if workers == 1:
+        yield from map(fn, items)
+        return
+    # Bloques grandes: con decenas de miles de laberintos pequeños el coste
+    # de comunicación entre procesos domina si se envían de uno en uno
+    chunksize = max(1, len(items) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(fn, items, chunksize=chunksize)
+
+
+def open_store(store):
+    """Acepta un MazeStore o la ruta de uno (se crea si no existe)."""
+    from maze_store import MazeStore
+    return store if isinstance(store, MazeStore) else MazeStore(store)
+
+
+def generate_mazes(specs, workers=None, output_dir=OUTPUT_DIR, fmt="maze", store=None):
+    """
+    Genera un lote de laberintos repartidos en un pool de procesos.
+
+    Parámetros
+    ----------
+    specs : iterable
+        MazeSpec o tuplas (algorithm, size, sides, seed), ver as_spec
+    workers : int, opcional
+        Número de procesos (por defecto os.cpu_count()); 1 = sin pool
+    output_dir : str
+        Carpeta de salida
+    fmt : str
+        "maze" (binario, por defecto) o "txt"
+    store : MazeStore | str, opcional
+        Si se indica, los laberintos se añaden a este almacén en lugar de
+        escribirse como archivos sueltos (contenidos repetidos no se duplican)
+
+    Retorna
+    -------
+    list[dict]: manifiesto con los parámetros y la ruta (o el id en el
+    almacén) de cada laberinto, en el mismo orden que specs. Especificaciones
+    repetidas se generan una sola vez.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt} (opciones: {FORMATS})")
+    specs = [as_spec(s) for s in specs]
+    unique = list(dict.fromkeys(specs))
+    workers = workers or os.cpu_count() or 1
+
+    if store is None:
+        os.makedirs(output_dir, exist_ok=True)
+        entries = list(_pool_map(partial(_generate_spec, output_dir=output_dir, fmt=fmt),
+                                 unique, workers))
+    else:
+        # Solo este proceso escribe en el almacén; se añade por tandas para
+        # no acumular todas las matrices en memoria
+        store = open_store(store)
+        entries, pending = [], []
+
+        def flush():
+            ids = store.extend([dict(maze=m, **s._asdict()) for s, m in pending], unique=True)
+            entries.extend(dict(s._asdict(), id=i) for (s, _), i in zip(pending, ids))
+            pending.clear()
+
+        for spec, maze in zip(unique, _pool_map(_build_spec, unique, workers)):
+            pending.append((spec, maze))
+            if len(pending) >= 256:
+                flush()
+        flush()
+
+    by_spec = dict(zip(unique, entries))
+    return [by_spec[s] for s in specs]
+
+
+# ---------------------------------------------------------------------
+# Caché en disco
+# ---------------------------------------------------------------------
+# Con semilla, un laberinto depende solo de sus parámetros: se guarda una
+# vez como CACHE_DIR/<clave>.maze y las peticiones repetidas lo leen del
+# disco. La clave es el sha1 de los parámetros normalizados (as_spec) y de
+# CACHE_VERSION, que se incrementa si cambia algún generador.
+
+CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
+CACHE_VERSION = 1
+
+
+def cache_key(spec):
+    """Clave de caché (sha1 hex) de un MazeSpec o tupla aceptada por as_spec."""
+    spec = as_spec(spec)
+    return hashlib.sha1(repr((CACHE_VERSION,) + tuple(spec)).encode()).hexdigest()
+
+
+class MazeCache:
+    """
+    Laberintos generados por clave en un directorio, con un límite de bytes.
+
+    Al superar max_bytes se borran los archivos usados hace más tiempo (la
+    fecha de modificación se actualiza en cada acierto). Las escrituras son
+    atómicas (archivo temporal + os.replace), así que varios procesos pueden
+    compartir el directorio.
+    """
+
+    def __init__(self, path=CACHE_DIR, max_bytes=512 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(path, exist_ok=True)
+
+    def __repr__(self):
+        return f"MazeCache({self.path!r}, max_bytes={self.max_bytes})"
+
+    def _path(self, key):
+        return os.path.join(self.path, f"{key}.maze")
+
+    def get(self, key):
+        """Matriz guardada con esa clave o None."""
+        ruta = self._path(key)
+        try:
+            _, matriz = read_maze(ruta)
+            os.utime(ruta)
+        except Exception:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return matriz
+
+    def put(self, key, maze, spec):
+        spec = as_spec(spec)
+        ruta = self._path(key)
+        tmp = f"{ruta}.{os.getpid()}.tmp"
+        write_maze(tmp, maze, *spec)
+        os.replace(tmp, ruta)
+        self.evict()
+        return ruta
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta quedar por debajo de max_bytes."""
+        entries = []
+        for f in os.listdir(self.path):
+            if f.endswith(".maze"):
+                try:
+                    st = os.stat(os.path.join(self.path, f))
+                except FileNotFoundError:
+                    continue  # borrado por otro proceso
+                entries.append((st.st_mtime, st.st_size, f))
+        total = sum(e[1] for e in entries)
+        for _, size, f in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.path, f))
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else float("nan"),
+            "evictions": self.evictions,
+        }
+
+
+def open_cache(cache):
+    """Acepta un MazeCache, la ruta de uno o True (CACHE_DIR)."""
+    if isinstance(cache, MazeCache):
+        return cache
+    return MazeCache(CACHE_DIR if cache is True else cache)
+
+
+def cached_maze(choice, width, height, start_side, start_rel, end_side, end_rel, seed,
+                cache=True):
+    """
+    Laberinto con semilla desde la caché en disco, generándolo solo si falta.
+
+    Returns:
+        tuple: (clave, matriz); la matriz de un acierto es un np.memmap de
+        solo lectura
+    """
+    if seed is None:
+        raise ValueError("La caché requiere semilla para que el resultado sea determinista.")
+    cache = open_cache(cache)
+    spec = as_spec(MazeSpec(maze_algorithms.algorithm_name(choice), width, height,
+                            start_side, start_rel, end_side, end_rel, seed))
+    key = cache_key(spec)
+    maze = cache.get(key)
+    if maze is None:
+        maze = _build_spec(spec)
+        cache.put(key, maze, spec)
+    return key, maze
+
 
 def read_maze(maze_file):
     """
     Lee un archivo de laberinto y devuelve su metadata y matriz
 
+    Acepta el formato binario (.maze, detectado por su cabecera) y el
+    formato de texto heredado (.txt).
+
     Args:
         maze_file (str): Ruta al archivo del laberinto
 
@@ -106,11 +643,17 @@ def read_maze(maze_file):
         tuple: (metadata, matriz) donde:
             - metadata (str): Información sobre el algoritmo y dimensiones
             - matriz (np.array): Matriz binaria representando el laberinto
+              (np.memmap de solo lectura para .maze sin empaquetar)
 
     Raises:
         Exception: Si hay error al leer el archivo
     """
     try:
+        with open(f"{maze_file}", "rb") as f:
+            magic = f.read(len(MAZE_MAGIC))
+        if magic == MAZE_MAGIC:
+            return _read_binary(maze_file)
+
         with open(f"{maze_file}", "r") as f:
             lineas = f.readlines()
 
@@ -123,6 +666,248 @@ def read_maze(maze_file):
         raise Exception("Error al leer el laberinto")
 
 
+# ---------------------------------------------------------------------
+# Exportación a CSV de obstáculos (Unity, ObstacleLoader.LoadMazeFromCSV)
+# ---------------------------------------------------------------------
+
+CSV_HEADER = ("class", "pos_x", "pos_y", "width", "height")
+
+
+def resize_nearest(matriz, width, height):
+    """
+    Reescala una matriz por vecino más cercano (equivale a cv2.resize con
+    INTER_NEAREST: la celda destino i toma la fila floor(i * H / height)).
+    """
+    matriz = np.asarray(matriz)
+    H, W = matriz.shape
+    rows = (np.arange(height) * H) // height
+    cols = (np.arange(width) * W) // width
+    return matriz[rows[:, None], cols]
+
+
+def mesh_rectangles(mask):
+    """
+    Cubre las celdas True de una máscara con rectángulos alineados a los ejes.
+
+    Primero se calculan los tramos horizontales máximos de cada fila
+    (run-length vectorizado con np.diff) y después se fusionan tramos con las
+    mismas columnas en filas consecutivas (mallado voraz por columnas).
+
+    Args:
+        mask (np.ndarray): Matriz booleana (alto, ancho)
+
+    Returns:
+        np.ndarray: int (n, 4) con (fila0, col0, fila1, col1), ambos incluidos
+    """
+    mask = np.asarray(mask, dtype=bool)
+    H, W = mask.shape
+    padded = np.zeros((H, W + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    r_start, c_start = np.nonzero(edges == 1)
+    _, c_end = np.nonzero(edges == -1)        # mismo orden (fila a fila)
+    c_end = c_end - 1
+    if r_start.size == 0:
+        return np.zeros((0, 4), dtype=np.int64)
+
+    # Tramos iguales en filas consecutivas forman un rectángulo
+    order = np.lexsort((r_start, c_end, c_start))
+    r, c0, c1 = r_start[order], c_start[order], c_end[order]
+    new = np.ones(r.size, dtype=bool)
+    new[1:] = (c0[1:] != c0[:-1]) | (c1[1:] != c1[:-1]) | (r[1:] != r[:-1] + 1)
+    first = np.flatnonzero(new)
+    last = np.append(first[1:], r.size) - 1
+    return np.stack([r[first], c0[first], r[last], c1[last]], axis=1)
+
+
+def export_obstacles_csv(matriz, ruta, wall=1, scale=1.0, spawns=True,
+                         delimiter=",", decimals=3, size=None):
+    """
+    Escribe el CSV de obstáculos para Unity con muros y espacios fusionados
+    en rectángulos, en lugar de una fila por celda.
+
+    Cada fila es `clase,pos_x,pos_y,width,height`: clase 'o' (obstáculo) o
+    's' (región de aparición), pos = centro del rectángulo. Las celdas se
+    colocan como en el notebook: la celda (y, x) tiene centro
+    ((x - centro_x) * escala, (centro_y - y) * escala) y lado `escala`.
+
+    Args:
+        matriz (np.ndarray): Laberinto
+        ruta (str): Archivo CSV de salida
+        wall (int): Valor que representa un muro en la matriz (1 en los
+            generadores salvo binary-tree, ver maze_algorithms.WALL_VALUE)
+        scale (float o tuple): Lado de cada celda en Unity (o (escala_x, escala_y))
+        spawns (bool): Escribir también los espacios como regiones 's'
+        delimiter (str): Separador; LoadMazeFromCSV separa por comas
+        decimals (int): Decimales de las coordenadas
+        size (tuple): (ancho, alto) para reescalar antes, como el
+            cv2.resize del notebook
+
+    Returns:
+        dict: filas escritas por clase, filas que tendría el CSV celda a
+        celda y factor de reducción
+    """
+    matriz = np.asarray(matriz)
+    if size is not None:
+        matriz = resize_nearest(matriz, *size)
+    sx, sy = scale if isinstance(scale, (tuple, list)) else (scale, scale)
+    alto, ancho = matriz.shape
+    centro_x = (ancho - 1) / 2.0
+    centro_y = (alto - 1) / 2.0
+
+    clases = [("o", matriz == wall)]
+    if spawns:
+        clases.append(("s", matriz != wall))
+
+    filas = [delimiter.join(CSV_HEADER)]
+    report = {"cells": int(matriz.size)}
+    naive = 0
+    for clase, mask in clases:
+        rects = mesh_rectangles(mask).astype(float)
+        r0, c0, r1, c1 = rects.T
+        pos_x = ((c0 + c1) / 2 - centro_x) * sx
+        pos_y = (centro_y - (r0 + r1) / 2) * sy
+        width = (c1 - c0 + 1) * sx
+        height = (r1 - r0 + 1) * sy
+        fmt = f"{{:.{decimals}f}}"
+        for vals in zip(pos_x.tolist(), pos_y.tolist(), width.tolist(), height.tolist()):
+            filas.append(delimiter.join([clase] + [fmt.format(v) for v in vals]))
+        report[clase] = len(rects)
+        naive += int(mask.sum())
+
+    with open(ruta, "w", newline="") as f:
+        f.write("\n".join(filas) + "\n")
+
+    rows = len(filas) - 1
+    report.update(rows=rows, rows_per_cell=naive,
+                  reduction=naive / rows if rows else float("inf"))
+    return report
+
+
+# ---------------------------------------------------------------------
+# Exportación a PNG (sin matplotlib)
+# ---------------------------------------------------------------------
+# La imagen RGBA se construye con NumPy a partir de la matriz: cada celda
+# toma el color de muro o de espacio (por defecto muro negro opaco y espacio
+# transparente, como el imshow(cmap="gray_r") + blanco transparente del
+# notebook) y se amplía por vecino más cercano. El PNG se escribe con zlib.
+
+WALL_RGBA = (0, 0, 0, 255)
+OPEN_RGBA = (255, 255, 255, 0)
+
+
+def maze_rgba(matriz, wall=1, scale=1, size=None, wall_color=WALL_RGBA, open_color=OPEN_RGBA):
+    """
+    Imagen RGBA (alto, ancho, 4) uint8 de un laberinto.
+
+    Args:
+        matriz (np.ndarray): Laberinto
+        wall (int): Valor que representa un muro (ver maze_algorithms.WALL_VALUE)
+        scale (int): Píxeles por celda
+        size (tuple): (ancho, alto) en píxeles; sustituye a scale y reescala
+            por vecino más cercano como zoom(..., order=0)
+        wall_color, open_color (tuple): Colores RGBA de muros y espacios
+    """
+    palette = np.array([open_color, wall_color], dtype=np.uint8)
+    matriz = np.asarray(matriz)
+    if size is not None:
+        matriz = resize_nearest(matriz, *size)
+    img = palette[(matriz == wall).view(np.uint8)]
+    if scale != 1:
+        img = img.repeat(scale, axis=0).repeat(scale, axis=1)
+    return img
+
+
+def write_png(ruta, img, level=6):
+    """Escribe un array (alto, ancho, 4) uint8 como PNG RGBA de 8 bits."""
+    import struct
+    import zlib
+
+    img = np.ascontiguousarray(img, dtype=np.uint8)
+    alto, ancho, canales = img.shape
+    if canales != 4:
+        raise ValueError("write_png espera una imagen RGBA (alto, ancho, 4)")
+    # Cada fila va precedida de su tipo de filtro (0 = ninguno)
+    raw = np.zeros((alto, ancho * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = img.reshape(alto, ancho * 4)
+
+    def chunk(tag, data):
+        return (struct.pack(">I", len(data)) + tag + data
+                + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+    with open(ruta, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", ancho, alto, 8, 6, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), level)))
+        f.write(chunk(b"IEND", b""))
+
+
+def export_png(matriz, ruta, wall=1, scale=1, size=None,
+               wall_color=WALL_RGBA, open_color=OPEN_RGBA):
+    """
+    Guarda un laberinto como PNG con transparencia (ver maze_rgba).
+
+    Returns:
+        str: ruta del PNG
+    """
+    write_png(ruta, maze_rgba(matriz, wall, scale, size, wall_color, open_color))
+    return ruta
+
+
+def _wall_of(metadata):
+    return maze_algorithms.WALL_VALUE.get(parse_metadata(metadata)["algorithm"], 1)
+
+
+def _export_file_png(maze_file, output_dir, **kwargs):
+    """Trabajo de un proceso del pool: un archivo .maze/.txt -> PNG."""
+    metadata, matriz = read_maze(maze_file)
+    name = os.path.splitext(os.path.basename(maze_file))[0]
+    return export_png(matriz, os.path.join(output_dir, f"{name}.png"), wall=_wall_of(metadata), **kwargs)
+
+
+_open_stores = {}
+
+
+def _export_store_png(i, store_path, output_dir, **kwargs):
+    """Trabajo de un proceso del pool: laberinto i de un MazeStore -> PNG."""
+    store = _open_stores.get(store_path)
+    if store is None:
+        # Un MazeStore por proceso: el índice se lee una sola vez
+        store = _open_stores[store_path] = open_store(store_path)
+    rec = store.record(i)
+    name = f"maze_{rec['algorithm']}_{rec['cols']}x{rec['rows']}_{i}"
+    return export_png(store.load(i), os.path.join(output_dir, f"{name}.png"), wall=rec["wall"], **kwargs)
+
+
+def export_pngs(source, output_dir, ids=None, workers=None, **kwargs):
+    """
+    Exporta a PNG todos los laberintos de un directorio (.maze y .txt) o de
+    un MazeStore, repartidos en un pool de procesos.
+
+    Args:
+        source (str | MazeStore): Directorio de laberintos o almacén (o su ruta)
+        output_dir (str): Carpeta de salida de los PNG
+        ids (iterable): Solo estos ids del almacén (por defecto, todos)
+        workers (int): Número de procesos (por defecto os.cpu_count()); 1 = sin pool
+        **kwargs: Parámetros de export_png (scale, size, colores)
+
+    Returns:
+        list[str]: rutas de los PNG, en el orden de los laberintos
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    is_store = not isinstance(source, str) or os.path.exists(os.path.join(source, "index.npy"))
+    if is_store:
+        store_path = source if isinstance(source, str) else source.path
+        items = [int(i) for i in (range(len(open_store(store_path))) if ids is None else ids)]
+        fn = partial(_export_store_png, store_path=store_path, output_dir=output_dir, **kwargs)
+    else:
+        items = [os.path.join(source, f) for f in sorted(os.listdir(source))
+                 if f.endswith((".maze", ".txt"))]
+        fn = partial(_export_file_png, output_dir=output_dir, **kwargs)
+    return list(_pool_map(fn, items, workers))
+
+
 if __name__ == "__main__":
     # # Algoritmo
     # choice=0
@@ -150,7 +935,7 @@ if __name__ == "__main__":
     # print([f for f in os.listdir(scripts_dir) if f.endswith(".js")])
 
     import matplotlib.pyplot as plt
-    metadata, matriz = read_maze("Maze_generation/output/maze_4.txt")
+    metadata, matriz = read_maze(os.path.join(OUTPUT_DIR, "maze_4.txt"))
 
     scale = 1000 / matriz.shape[0]
 
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+maze_graph.py
+
+Grafo de adyacencia precalculado de un laberinto (1=espacio, 0=pared).
+
+Cada celda se identifica por un id plano int32 (fila * W + columna). Los
+vecinos 4-conexos se calculan una sola vez, con operaciones vectorizadas, y
+se guardan en formato CSR (indptr/indices) en el mismo orden que
+neighbors4: arriba, abajo, izquierda, derecha. Los solvers recorren el grafo
+con buffers planos (bytearray / array) en lugar de dicts y sets de tuplas.
+"""
+
+from __future__ import annotations
+from array import array
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+Coord = Tuple[int, int]  # (fila, columna)
+
+# Orden de las columnas de MazeGraph.dirs (el mismo que neighbors4)
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+
+NONE = -1   # sin padre / sin vecino
+ROOT = -2   # padre de la celda inicial
+
+
+class MazeGraph:
+    """
+    Adyacencia CSR de un laberinto.
+
+    Atributos
+    ---------
+    grid : np.ndarray     matriz original (1=espacio)
+    H, W, size : int      dimensiones y número de celdas
+    open : np.ndarray     bool (size,), celdas abiertas
+    dirs : np.ndarray     int32 (size, 4), vecino abierto por dirección o -1
+    indptr, indices       CSR int32: vecinos de i = indices[indptr[i]:indptr[i+1]]
+
+    Los vecinos se calculan para todas las celdas (también las paredes),
+    igual que neighbors4, que no comprueba la celda de origen.
+    """
+
+    def __init__(self, grid: np.ndarray):
+        grid = np.asarray(grid)
+        self.grid = grid
+        self.H, self.W = H, W = grid.shape
+        self.size = H * W
+        self.open = (grid == 1).ravel()
+
+        ids = np.arange(self.size, dtype=np.int32).reshape(H, W)
+        dirs = np.full((H, W, 4), NONE, dtype=np.int32)
+        dirs[1:, :, UP] = ids[:-1, :]
+        dirs[:-1, :, DOWN] = ids[1:, :]
+        dirs[:, 1:, LEFT] = ids[:, :-1]
+        dirs[:, :-1, RIGHT] = ids[:, 1:]
+        dirs = dirs.reshape(self.size, 4)
+        valid = dirs >= 0
+        valid[valid] = self.open[dirs[valid]]
+        dirs[~valid] = NONE
+        self.dirs = dirs
+
+        self.indptr = np.zeros(self.size + 1, dtype=np.int32)
+        np.cumsum(valid.sum(axis=1), out=self.indptr[1:])
+        self.indices = dirs[valid]  # fila a fila: conserva el orden por celda
+        self._lists: Optional[Tuple[List[int], List[int]]] = None
+        self._dir_list: Optional[List[int]] = None
+
+    def __repr__(self) -> str:
+        return f"MazeGraph({self.H}x{self.W}, {int(self.open.sum())} abiertas)"
+
+    # -----------------------------------------------------------------
+    # Conversión de coordenadas
+    # -----------------------------------------------------------------
+
+    def id(self, p: Coord) -> int:
+        return p[0] * self.W + p[1]
+
+    def coord(self, i: int) -> Coord:
+        return divmod(int(i), self.W)
+
+    def coords(self, ids) -> List[Coord]:
+        """Ids planos -> lista de tuplas (fila, columna)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        return list(zip((ids // self.W).tolist(), (ids % self.W).tolist()))
+
+    @property
+    def open_cells(self) -> int:
+        return int(self.open.sum())
+
+    # -----------------------------------------------------------------
+    # Acceso desde bucles de Python
+    # -----------------------------------------------------------------
+
+    def lists(self) -> Tuple[List[int], List[int]]:
+        """
+        (indptr, indices) como listas de Python, calculadas una sola vez.
+        Indexar listas es bastante más rápido que indexar un ndarray
+        elemento a elemento en los bucles de los solvers.
+        """
+        if self._lists is None:
+            self._lists = (self.indptr.tolist(), self.indices.tolist())
+        return self._lists
+
+    def dir_list(self) -> List[int]:
+        """dirs aplanado como lista: vecino de i en la dirección k = [4 * i + k]."""
+        if self._dir_list is None:
+            self._dir_list = self.dirs.ravel().tolist()
+        return self._dir_list
+
+    def neighbors(self, i: int) -> List[int]:
+        ptr, ind = self.lists()
+        return ind[ptr[i]:ptr[i + 1]]
+
+    # -----------------------------------------------------------------
+    # Buffers por búsqueda
+    # -----------------------------------------------------------------
+
+    def visited_buffer(self) -> bytearray:
+        return bytearray(self.size)
+
+    def parent_buffer(self) -> array:
+        return array("i", [NONE]) * self.size
+
+    def cost_buffer(self, fill: float = float("inf")) -> array:
+        return array("d", [fill]) * self.size
+
+    def path_to(self, parent: array, goal: int) -> List[int]:
+        """Reconstruye el camino (ids) desde la raíz hasta goal siguiendo parent."""
+        path = []
+        cur = goal
+        while cur != ROOT:
+            path.append(cur)
+            cur = parent[cur]
+        path.reverse()
+        return path
+
+
+def as_graph(grid) -> MazeGraph:
+    """Devuelve grid si ya es un MazeGraph; si no, lo construye."""
+    return grid if isinstance(grid, MazeGraph) else MazeGraph(grid)
@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+"""
+maze_hpa.py
+
+HPA* (búsqueda jerárquica) para laberintos muy grandes (1=espacio).
+
+Preproceso, una vez por laberinto (ClusterGraph.build):
+
+1. La rejilla se divide en clusters de C x C celdas.
+2. Entradas: en cada frontera entre dos clusters vecinos, cada tramo
+   continuo de pares de celdas abiertas enfrentadas aporta un par (el del
+   centro del tramo). Las dos celdas del par son nodos del grafo abstracto,
+   unidos por una arista de peso 1.
+3. Aristas internas: distancia entre cada par de nodos de un mismo cluster
+   moviéndose solo dentro del cluster. Se calculan con wavefront_bfs sobre
+   lotes de bloques C x C (un BFS por nodo, todos a la vez).
+
+Consulta (HPASolver.solve): la entrada y la salida se conectan a los nodos
+de su cluster con un BFS local, se busca con Dijkstra (scipy) sobre el
+grafo abstracto y cada arista interna del resultado se refina a celdas con
+otro BFS local (memorizado: las consultas siguientes reutilizan los tramos
+ya refinados). El coste de la búsqueda depende del grafo abstracto, no del
+número de celdas del laberinto.
+
+El camino es válido pero no siempre mínimo (los tramos internos no pueden
+salir de su cluster): shortest_paths = False. El grafo abstracto no depende
+de la entrada ni de la salida, así que se reutiliza entre consultas y se
+puede guardar (save/load, .npz).
+
+Uso:
+    hpa = HPASolver(cluster_size=16, cache_dir="output/store/hpa")
+    res = hpa.solve(grid, start, goal)
+
+Ejecutado como script, mide latencia y subóptimo frente a BFSSolver en
+laberintos de 2001x2001.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from incremental_solver import random_edits
+from maze_graph import MazeGraph
+from maze_store import content_hash
+from maze_water_solver import BaseSolver, BFSSolver, SolveResult, find_entrance_exit, generate_maze
+from wavefront import wavefront_bfs
+
+Coord = Tuple[int, int]  # (fila, columna)
+
+
+def _segment_middles(pair: np.ndarray, C: int) -> np.ndarray:
+    """Centro de cada tramo de True de `pair`, cortando los tramos cada C posiciones."""
+    idx = np.arange(pair.size)
+    prev = np.concatenate(([False], pair[:-1]))
+    nxt = np.concatenate((pair[1:], [False]))
+    first = np.flatnonzero(pair & (~prev | (idx % C == 0)))
+    last = np.flatnonzero(pair & (~nxt | ((idx + 1) % C == 0)))
+    return (first + last) // 2
+
+
+def _local_bfs(grid: np.ndarray, C: int, source: int, target: int = -1):
+    """
+    BFS desde `source` (id plano) sin salir de su cluster. Devuelve
+    (dist, parent, r0, c0, w) sobre el bloque del cluster (listas planas,
+    -1 = no alcanzada); con target se detiene al alcanzarlo.
+    """
+    H, W = grid.shape
+    r, c = divmod(source, W)
+    r0, c0 = r - r % C, c - c % C
+    block = grid[r0:r0 + C, c0:c0 + C]
+    h, w = block.shape
+    is_open = (block == 1).ravel().tolist()
+    dist = [-1] * (h * w)
+    parent = [-1] * (h * w)
+    s = (r - r0) * w + (c - c0)
+    t = -1
+    if target >= 0:
+        tr, tc = divmod(target, W)
+        t = (tr - r0) * w + (tc - c0)
+    dist[s] = 0
+    q = deque([s])
+    while q:
+        u = q.popleft()
+        if u == t:
+            break
+        du = dist[u] + 1
+        uc = u % w
+        for v, ok in ((u - w, u >= w), (u + w, u < (h - 1) * w),
+                      (u - 1, uc > 0), (u + 1, uc < w - 1)):
+            if ok and is_open[v] and dist[v] < 0:
+                dist[v] = du
+                parent[v] = u
+                q.append(v)
+    return dist, parent, r0, c0, w
+
+
+def _local_path(parent: List[int], r0: int, c0: int, w: int, W: int, end_local: int) -> List[int]:
+    """Ids planos (globales) de la raíz del BFS local hasta end_local."""
+    path = []
+    cur = end_local
+    while cur >= 0:
+        path.append((r0 + cur // w) * W + c0 + cur % w)
+        cur = parent[cur]
+    path.reverse()
+    return path
+
+
+class ClusterGraph:
+    """
+    Grafo abstracto de HPA* de un laberinto.
+
+    Atributos (arrays, guardables con save/load)
+    ---------
+    H, W, C : int                 dimensiones y lado de los clusters
+    nodes : int32 (n,)            id plano de cada nodo (ordenados por id)
+    node_cluster : int32 (n,)     cluster de cada nodo (fila_c * clusters_ancho + col_c)
+    cluster_ptr, cluster_nodes    CSR: nodos del cluster k =
+                                  cluster_nodes[cluster_ptr[k]:cluster_ptr[k + 1]]
+    indptr, adj_node, adj_weight  CSR int32 de aristas (internas y entre clusters)
+    """
+    FIELDS = ("nodes", "node_cluster", "cluster_ptr", "cluster_nodes",
+              "indptr", "adj_node", "adj_weight")
+
+    def __init__(self, H: int, W: int, C: int, **arrays: np.ndarray):
+        self.H, self.W, self.C = H, W, C
+        for name in self.FIELDS:
+            setattr(self, name, arrays[name])
+        self.clusters_w = -(-W // C)
+        self._lists: Optional[Tuple[List[int], ...]] = None
+        self._segments: Dict[Tuple[int, int], List[int]] = {}  # tramos internos ya refinados
+
+    def __repr__(self) -> str:
+        return (f"ClusterGraph({self.H}x{self.W}, clusters {self.C}x{self.C}, "
+                f"{len(self.nodes)} nodos, {len(self.adj_node)} aristas)")
+
+    def cluster_of(self, cell: int) -> int:
+        r, c = divmod(cell, self.W)
+        return (r // self.C) * self.clusters_w + c // self.C
+
+    def lists(self) -> Tuple[List[int], ...]:
+        """(indptr, adj_node, adj_weight, nodes, cluster_ptr, cluster_nodes) como listas."""
+        if self._lists is None:
+            self._lists = tuple(getattr(self, f).tolist() for f in (
+                "indptr", "adj_node", "adj_weight", "nodes", "cluster_ptr", "cluster_nodes"))
+        return self._lists
+
+    @classmethod
+    def build(cls, grid: np.ndarray, cluster_size: int = 16, batch: int = 8192) -> "ClusterGraph":
+        grid = np.asarray(grid)
+        H, W = grid.shape
+        C = cluster_size
+        is_open = grid == 1
+
+        # Entradas entre clusters: pares (a, b) de celdas enfrentadas
+        a_list, b_list = [], []
+        for cb in range(C, W, C):
+            rows = _segment_middles(is_open[:, cb - 1] & is_open[:, cb], C)
+            a_list.append(rows * W + cb - 1)
+            b_list.append(rows * W + cb)
+        for rb in range(C, H, C):
+            cols = _segment_middles(is_open[rb - 1, :] & is_open[rb, :], C)
+            a_list.append((rb - 1) * W + cols)
+            b_list.append(rb * W + cols)
+        a = np.concatenate(a_list or [np.zeros(0, dtype=np.int64)])
+        b = np.concatenate(b_list or [np.zeros(0, dtype=np.int64)])
+        nodes = np.unique(np.concatenate([a, b])).astype(np.int32)
+        ia, ib = np.searchsorted(nodes, a), np.searchsorted(nodes, b)
+
+        nr, nc = np.divmod(nodes.astype(np.int64), W)
+        clusters_h, clusters_w = -(-H // C), -(-W // C)
+        node_cluster = ((nr // C) * clusters_w + nc // C).astype(np.int32)
+        cluster_nodes = np.argsort(node_cluster, kind="stable").astype(np.int32)
+        cluster_ptr = np.zeros(clusters_h * clusters_w + 1, dtype=np.int32)
+        np.cumsum(np.bincount(node_cluster, minlength=clusters_h * clusters_w), out=cluster_ptr[1:])
+
+        # Bloques C x C de todos los clusters (con pared fuera de la rejilla)
+        padded = np.zeros((clusters_h * C, clusters_w * C), dtype=np.uint8)
+        padded[:H, :W] = is_open
+        blocks = padded.reshape(clusters_h, C, clusters_w, C).transpose(0, 2, 1, 3) \
+                       .reshape(-1, C, C)
+
+        # Aristas internas: un BFS por nodo dentro de su bloque, por lotes
+        src_all, dst_all, w_all = [], [], []
+        sizes = np.diff(cluster_ptr)
+        lr, lc = nr % C, nc % C
+        for i0 in range(0, len(nodes), batch):
+            src = np.arange(i0, min(i0 + batch, len(nodes)))
+            k = node_cluster[src]
+            res = wavefront_bfs(blocks[k], np.stack([lr[src], lc[src]], axis=1))
+            counts = sizes[k]
+            rep = np.repeat(np.arange(src.size), counts)
+            offset = np.arange(rep.size) - np.repeat(np.cumsum(counts) - counts, counts)
+            dst = cluster_nodes[cluster_ptr[k][rep] + offset]
+            d = res.dist[rep, lr[dst], lc[dst]]
+            keep = d > 0
+            src_all.append(src[rep[keep]])
+            dst_all.append(dst[keep])
+            w_all.append(d[keep])
+
+        src = np.concatenate(src_all + [ia, ib]).astype(np.int64)
+        dst = np.concatenate(dst_all + [ib, ia]).astype(np.int32)
+        weight = np.concatenate(w_all + [np.ones(2 * ia.size, dtype=np.int32)]).astype(np.int32)
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+        return cls(H, W, C, nodes=nodes, node_cluster=node_cluster, cluster_ptr=cluster_ptr,
+                   cluster_nodes=cluster_nodes, indptr=indptr, adj_node=dst[order],
+                   adj_weight=weight[order])
+
+    # -----------------------------------------------------------------
+    # Guardado
+    # -----------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, shape=np.array([self.H, self.W, self.C]),
+                 **{name: getattr(self, name) for name in self.FIELDS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ClusterGraph":
+        with np.load(path) as data:
+            H, W, C = data["shape"].tolist()
+            return cls(H, W, C, **{name: data[name] for name in cls.FIELDS})
+
+    # -----------------------------------------------------------------
+    # Consulta
+    # -----------------------------------------------------------------
+
+    def search(self, grid: np.ndarray, s: int, t: int):
+        """
+        Camino entre las celdas s y t (ids planos). Devuelve (camino de
+        celdas, celdas tocadas, stats); camino vacío si no hay.
+
+        La entrada se añade como nodo virtual S (fila extra del CSR, con
+        aristas a los nodos de su cluster) y Dijkstra (scipy, en C) calcula
+        la distancia desde S a todos los nodos; la salida se cierra con las
+        distancias de su BFS local. Tocadas: celdas de los BFS locales de la
+        entrada y la salida y nodos a distancia menor que la de la salida
+        (los que habría cerrado un Dijkstra con parada temprana).
+        """
+        _, _, _, nodes, cptr, cnodes = self.lists()
+        W, C = self.W, self.C
+        n = len(nodes)
+        tr, tc = divmod(t, W)
+        if s != t and grid[tr, tc] != 1:
+            # Como BFSSolver: una salida cerrada no es alcanzable
+            return [], [], {"expanded": 0, "abstract_nodes": n}
+        touched: List[int] = []
+
+        def local_edges(cell):
+            dist, parent, r0, c0, w = _local_bfs(grid, C, cell)
+            k = self.cluster_of(cell)
+            out = {}
+            for j in cnodes[cptr[k]:cptr[k + 1]]:
+                r, c = divmod(nodes[j], W)
+                d = dist[(r - r0) * w + c - c0]
+                if d >= 0:
+                    out[j] = d
+            touched.extend((r0 + v // w) * W + c0 + v % w for v, d in enumerate(dist) if d >= 0)
+            return out, (dist, parent, r0, c0, w)
+
+        from_s, bfs_s = local_edges(s)
+        to_t, bfs_t = local_edges(t)
+
+        best, via = np.inf, -1  # via = último nodo antes de T (-1: tramo directo)
+        if self.cluster_of(s) == self.cluster_of(t):
+            dist, _, r0, c0, w = bfs_s
+            d = dist[(tr - r0) * w + tc - c0]
+            if d >= 0:
+                best = d
+        dist = np.full(n, np.inf)
+        pred = np.full(n, -9999, dtype=np.int32)
+        if from_s and to_t:
+            A = csr_matrix((np.concatenate([self.adj_weight, list(from_s.values())]),
+                            np.concatenate([self.adj_node, list(from_s.keys())]),
+                            np.append(self.indptr, self.indptr[-1] + len(from_s))),
+                           shape=(n + 1, n + 1))
+            dist, pred = dijkstra(A, indices=n, return_predecessors=True)
+            dist, pred = dist[:n], pred[:n]
+            ends = np.fromiter(to_t.keys(), dtype=np.int64, count=len(to_t))
+            total = dist[ends] + np.fromiter(to_t.values(), dtype=np.float64, count=len(to_t))
+            k = int(np.argmin(total))
+            if total[k] < best:
+                best, via = total[k], int(ends[k])
+        closed = np.flatnonzero(dist < best)
+        touched.extend(self.nodes[closed].tolist())
+        stats = {"expanded": int(closed.size), "abstract_nodes": n}
+        if best == np.inf:
+            return [], touched, stats
+
+        chain = []
+        u = via
+        while u != n and u >= 0:
+            chain.append(u)
+            u = int(pred[u])
+        chain.reverse()
+        return self._refine(grid, chain, t, bfs_s, bfs_t), touched, stats
+
+    def _segment(self, a: int, b: int, grid: np.ndarray) -> List[int]:
+        """Celdas de a a b (mismo cluster) sin salir del cluster; memorizado."""
+        key = (a, b)
+        seg = self._segments.get(key)
+        if seg is None:
+            seg = self._segments.get((b, a))
+            if seg is not None:
+                seg = seg[::-1]
+            else:
+                _, parent, r0, c0, w = _local_bfs(grid, self.C, a, b)
+                br, bc = divmod(b, self.W)
+                seg = _local_path(parent, r0, c0, w, self.W, (br - r0) * w + bc - c0)
+                self._segments[key] = seg
+        return seg
+
+    def _refine(self, grid, chain, t, bfs_s, bfs_t) -> List[int]:
+        """Convierte la secuencia de nodos abstractos (sin S ni T) en celdas."""
+        nodes = self.lists()[3]
+        W = self.W
+
+        def tree_path(bfs, cell):
+            _, parent, r0, c0, w = bfs
+            r, c = divmod(cell, W)
+            return _local_path(parent, r0, c0, w, W, (r - r0) * w + c - c0)
+
+        if not chain:
+            return tree_path(bfs_s, t)
+        path = tree_path(bfs_s, nodes[chain[0]])
+        for u, v in zip(chain, chain[1:]):
+            a, b = nodes[u], nodes[v]
+            if self.cluster_of(a) != self.cluster_of(b):
+                path.append(b)  # arista entre clusters: celdas vecinas
+            else:
+                path.extend(self._segment(a, b, grid)[1:])
+        # Último tramo: del árbol BFS de la salida, recorrido al revés
+        path.extend(tree_path(bfs_t, nodes[chain[-1]])[::-1][1:])
+        return path
+
+
+# ---------------------------------------------------------------------
+# Solver
+# ---------------------------------------------------------------------
+
+class HPASolver(BaseSolver):
+    """
+    HPA* con grafo abstracto por laberinto (ClusterGraph), guardado en
+    memoria por hash del contenido y, con cache_dir, en un .npz.
+
+    Visitadas: celdas de los BFS locales de entrada y salida, nodos
+    abstractos cerrados y el camino refinado. El preproceso de un laberinto nuevo se
+    mide aparte en stats["preprocess_s"].
+    """
+    shortest_paths = False
+
+    def __init__(self, cluster_size: int = 16, cache_dir: Optional[str] = None):
+        self.cluster_size = cluster_size
+        self.cache_dir = cache_dir
+        self.name = f"HPA* (clusters {cluster_size}x{cluster_size})"
+        self._graphs: Dict[str, ClusterGraph] = {}
+
+    def abstraction(self, grid: np.ndarray) -> ClusterGraph:
+        """ClusterGraph de grid, de memoria, de disco o nuevo."""
+        key = content_hash(grid)
+        cg = self._graphs.get(key)
+        if cg is not None:
+            return cg
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, f"{key}_c{self.cluster_size}.npz")
+        if path is not None and os.path.exists(path):
+            cg = ClusterGraph.load(path)
+        else:
+            cg = ClusterGraph.build(grid, self.cluster_size)
+            if path is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                cg.save(path)
+        self._graphs[key] = cg
+        return cg
+
+    def solve(self, grid, start, goal):
+        # Sin as_graph: la consulta solo lee bloques de la matriz
+        grid = grid.grid if isinstance(grid, MazeGraph) else np.asarray(grid)
+        H, W = grid.shape
+        start, goal = tuple(start), tuple(goal)
+        t_pre = time.perf_counter() if self.instrumented else 0.0
+        cg = self.abstraction(grid)
+        t0 = self._begin(start, goal)
+        pre_s = t0 - t_pre
+
+        ids, touched, counts = cg.search(grid, start[0] * W + start[1], goal[0] * W + goal[1])
+        t1 = time.perf_counter() if self.instrumented else 0.0
+        visited = np.zeros(H * W, dtype=bool)
+        visited[touched] = True
+        visited[ids] = True
+        ids = np.array(ids, dtype=np.int32)
+        res = SolveResult(np.stack(np.divmod(ids, W), axis=1), visited.reshape(H, W), bool(len(ids)))
+        if self.instrumented:
+            res.stats = {"solver": self.name, **counts, "search_s": t1 - t0,
+                         "path_s": time.perf_counter() - t1, "preprocess_s": pre_s}
+            self._emit("end", res.stats)
+        return res
+
+
+# ---------------------------------------------------------------------
+# Latencia y subóptimo frente a BFS
+# ---------------------------------------------------------------------
+
+def measure(N: int = 2001, seeds=(0,), queries: int = 10, cluster_sizes=(16, 32),
+            braid: int = 0) -> None:
+    """
+    Por laberinto: preproceso, tamaño del grafo abstracto y, para la
+    entrada/salida y `queries` pares aleatorios de celdas abiertas, latencia
+    de HPA* y de BFSSolver y longitud relativa (HPA* / BFS). Las consultas
+    van seguidas sobre el mismo solver: la primera refina en frío (máximo)
+    y las siguientes reutilizan tramos ya refinados.
+
+    En un laberinto perfecto el camino es único y el subóptimo siempre 1;
+    braid abre ese número de muros entre espacios para crear ciclos.
+    """
+    print("seed\tC\tbuild_s\tnodes\tedges\tqueries\thpa_ms_median\thpa_ms_max\tbfs_ms_median\t"
+          "speedup\tsubopt_mean\tsubopt_max")
+    for seed in seeds:
+        grid = generate_maze(N, N, seed=seed)
+        rng = np.random.default_rng(seed)
+        if braid:
+            for (r, c), value in random_edits(grid, braid, rng, "open"):
+                grid[r, c] = value
+        G = MazeGraph(grid)
+        G.lists()
+        open_ids = np.flatnonzero(G.open)
+        pairs = [find_entrance_exit(grid)] + [
+            tuple(G.coord(i) for i in rng.choice(open_ids, 2, replace=False))
+            for _ in range(queries)]
+        bfs_ms, bfs_len = [], []
+        for start, goal in pairs:
+            t0 = time.perf_counter()
+            ref = BFSSolver().solve(G, start, goal)
+            bfs_ms.append((time.perf_counter() - t0) * 1000)
+            bfs_len.append(ref.path_length)
+        for C in cluster_sizes:
+            solver = HPASolver(cluster_size=C)
+            t0 = time.perf_counter()
+            cg = solver.abstraction(grid)
+            build_s = time.perf_counter() - t0
+            hpa_ms, ratio = [], []
+            for (start, goal), ref_len in zip(pairs, bfs_len):
+                t0 = time.perf_counter()
+                res = solver.solve(G, start, goal)
+                hpa_ms.append((time.perf_counter() - t0) * 1000)
+                if res.reached != (ref_len > 0):
+                    raise AssertionError(f"HPA* y BFS no coinciden en alcanzabilidad {start} -> {goal}")
+                if ref_len:
+                    ratio.append(res.path_length / ref_len)
+            print(f"{seed}\t{C}\t{build_s:.2f}\t{len(cg.nodes)}\t{len(cg.adj_node)}\t{len(pairs)}\t"
+                  f"{np.median(hpa_ms):.1f}\t{np.max(hpa_ms):.1f}\t{np.median(bfs_ms):.1f}\t"
+                  f"{np.median(bfs_ms) / np.median(hpa_ms):.1f}x\t{np.mean(ratio):.4f}\t{np.max(ratio):.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--size", type=int, default=2001)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--clusters", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--braid", type=int, default=0,
+                        help="muros abiertos al azar para crear ciclos (0 = laberinto perfecto)")
+    args = parser.parse_args()
+    measure(args.size, args.seeds, args.queries, args.clusters, args.braid)
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+maze_stats.py
+
+Estadísticas estructurales de laberintos sin resolverlos uno a uno:
+
+    dead_ends          celdas abiertas con una sola vecina abierta (sin contar
+                       la entrada ni la salida)
+    junctions          celdas abiertas con 3 o 4 vecinas abiertas
+    branching_factor   salidas nuevas por cruce: media de (grado - 1) en los
+                       cruces (nan si no hay)
+    mean_degree        grado medio de las celdas abiertas
+    corridors          tramos máximos de celdas de grado 2, y su longitud
+                       (media, mediana, p90, máxima)
+    solution_length    celdas del camino más corto entrada -> salida
+                       (como len(path) en BFSSolver; inf si no se alcanza)
+    solution_fraction  solution_length / celdas abiertas
+
+El grado de cada celda es una convolución con una cruz, los pasillos se
+etiquetan con scipy.ndimage.label y la solución sale de wavefront_bfs; todo
+sobre lotes (B, H, W) de laberintos del mismo tamaño, sin bucles por celda.
+
+Convención de las matrices: 1=espacio, 0=pared (la de maze_water_solver).
+
+Uso:
+    python maze_stats.py --files output/*.maze --out output/maze_stats.tsv
+    python maze_stats.py --algorithm prims --size 201 --seeds 2000
+    python maze_stats.py --store output/store --algorithm prims
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import ndimage
+
+from wavefront import wavefront_bfs
+
+Coord = Tuple[int, int]  # (fila, columna)
+Case = Tuple[str, np.ndarray, Coord, Coord]  # (nombre, grid 1=espacio, start, goal)
+
+STATS_DTYPE = np.dtype([
+    ("name", "S96"),
+    ("rows", "<i4"),
+    ("cols", "<i4"),
+    ("open_cells", "<i8"),
+    ("dead_ends", "<i8"),
+    ("junctions", "<i8"),
+    ("branching_factor", "<f8"),
+    ("mean_degree", "<f8"),
+    ("corridors", "<i8"),
+    ("corridor_mean", "<f8"),
+    ("corridor_median", "<f8"),
+    ("corridor_p90", "<f8"),
+    ("corridor_max", "<i8"),
+    ("reached", "u1"),
+    ("solution_length", "<f8"),
+    ("solution_fraction", "<f8"),
+])
+
+# Vecindad 4-conexa dentro de cada laberinto del lote, sin unir laberintos
+CROSS = np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]], dtype=np.uint8)
+_LABEL_STRUCTURE = np.zeros((3, 3, 3), dtype=bool)
+_LABEL_STRUCTURE[1] = CROSS
+_LABEL_STRUCTURE[1, 1, 1] = True
+
+
+def degree(grids: np.ndarray) -> np.ndarray:
+    """Vecinas abiertas de cada celda abierta (0 en las paredes), (B, H, W) uint8."""
+    is_open = (np.asarray(grids) == 1).astype(np.uint8)
+    deg = ndimage.convolve(is_open, CROSS[None], mode="constant", cval=0)
+    return deg * is_open
+
+
+def batch_stats(grids: np.ndarray, starts: np.ndarray, goals: np.ndarray,
+                names: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Estadísticas de un lote de laberintos del mismo tamaño.
+
+    grids: (B, H, W) o (H, W), 1=espacio; starts, goals: (B, 2).
+    Devuelve un array estructurado STATS_DTYPE con una fila por laberinto.
+    """
+    grids = np.asarray(grids)
+    if grids.ndim == 2:
+        grids = grids[None]
+    B, H, W = grids.shape
+    starts = np.asarray(starts, dtype=np.int64).reshape(B, 2)
+    goals = np.asarray(goals, dtype=np.int64).reshape(B, 2)
+    bi = np.arange(B)
+    out = np.zeros(B, dtype=STATS_DTYPE)
+    out["name"] = [n.encode() for n in names] if names is not None else [str(i).encode() for i in bi]
+    out["rows"], out["cols"] = H, W
+
+    is_open = grids == 1
+    deg = degree(grids)
+    open_cells = is_open.sum(axis=(1, 2))
+    out["open_cells"] = open_cells
+
+    ends = deg == 1
+    ends[bi, starts[:, 0], starts[:, 1]] = False
+    ends[bi, goals[:, 0], goals[:, 1]] = False
+    out["dead_ends"] = ends.sum(axis=(1, 2))
+    junction = deg >= 3
+    junctions = junction.sum(axis=(1, 2))
+    out["junctions"] = junctions
+    exits = np.where(junction, deg.astype(np.int64) - 1, 0).sum(axis=(1, 2))
+    out["branching_factor"] = np.where(junctions > 0, exits / np.maximum(junctions, 1), np.nan)
+    out["mean_degree"] = deg.sum(axis=(1, 2), dtype=np.int64) / np.maximum(open_cells, 1)
+
+    # Pasillos: componentes 4-conexas de celdas de grado 2. ndimage.label
+    # numera en orden de recorrido, así que las etiquetas de cada laberinto
+    # son consecutivas y basta contar cuántas tiene cada uno.
+    labels, n = ndimage.label(deg == 2, structure=_LABEL_STRUCTURE)
+    sizes = np.bincount(labels.ravel(), minlength=n + 1)[1:]
+    owner = np.zeros(n + 1, dtype=np.int64)
+    owner[labels.reshape(B, -1)] = bi[:, None]
+    counts = np.bincount(owner[1:], minlength=B)
+    out["corridors"] = counts
+    for b, lengths in enumerate(np.split(sizes, np.cumsum(counts)[:-1])):
+        if lengths.size:
+            out["corridor_mean"][b] = lengths.mean()
+            out["corridor_median"][b] = np.median(lengths)
+            out["corridor_p90"][b] = np.percentile(lengths, 90)
+            out["corridor_max"][b] = lengths.max()
+
+    res = wavefront_bfs(grids, starts, goals, full=False)
+    out["reached"] = res.reached
+    out["solution_length"] = res.path_length
+    out["solution_fraction"] = np.where(res.reached, res.path_length / np.maximum(open_cells, 1), 0.0)
+    return out
+
+
+def maze_stats(grid: np.ndarray, start: Coord, goal: Coord, name: str = "") -> Dict[str, float]:
+    """Estadísticas de un solo laberinto como dict."""
+    row = batch_stats(grid, [start], [goal], [name])[0]
+    d = {f: row[f].item() for f in STATS_DTYPE.names}
+    d["name"] = d["name"].decode()
+    return d
+
+
+def stats_from_cases(cases: Iterable[Case], batch: int = 256) -> np.ndarray:
+    """
+    Estadísticas de una secuencia de casos (nombre, grid, start, goal) de
+    cualquier tamaño: se agrupan por forma en lotes de hasta `batch`.
+    """
+    pending: Dict[Tuple[int, int], List[Case]] = {}
+    parts = []
+
+    def flush(shape):
+        group = pending.pop(shape)
+        parts.append(batch_stats(np.stack([c[1] for c in group]),
+                                 [c[2] for c in group], [c[3] for c in group],
+                                 [c[0] for c in group]))
+
+    for case in cases:
+        shape = case[1].shape
+        pending.setdefault(shape, []).append(case)
+        if len(pending[shape]) >= batch:
+            flush(shape)
+    for shape in list(pending):
+        flush(shape)
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=STATS_DTYPE)
+
+
+# ---------------------------------------------------------------------
+# Fuentes de laberintos
+# ---------------------------------------------------------------------
+
+def _openings(grid: np.ndarray, algorithm: str, meta: Dict) -> Tuple[Coord, Coord]:
+    """Entrada y salida según el algoritmo; si no abre nada, las de find_entrance_exit."""
+    import maze_algorithms
+    from maze_water_solver import find_entrance_exit
+    start, goal = maze_algorithms.opening_cells(
+        algorithm, grid.shape[0], grid.shape[1],
+        meta["start_side"], meta["start_rel"], meta["end_side"], meta["end_rel"])
+    if start is None or goal is None:
+        return find_entrance_exit(grid)
+    return start, goal
+
+
+def file_cases(paths: Iterable[str]) -> Iterator[Case]:
+    """Casos de archivos .maze / .txt (read_maze)."""
+    import maze_algorithms
+    from maze_generation import parse_metadata, read_maze
+    for path in paths:
+        metadata, maze = read_maze(path)
+        meta = parse_metadata(metadata)
+        wall = maze_algorithms.WALL_VALUE.get(meta["algorithm"], 1)
+        grid = (np.asarray(maze) != wall).astype(np.uint8)
+        yield (os.path.basename(path), grid, *_openings(grid, meta["algorithm"], meta))
+
+
+def _build_case(spec) -> Case:
+    """Trabajo de un proceso del pool: genera un MazeSpec (sin escribir nada)."""
+    import maze_algorithms
+    from maze_generation import _build_spec, spec_name
+    maze = _build_spec(spec)
+    grid = (maze != maze_algorithms.WALL_VALUE[spec.algorithm]).astype(np.uint8)
+    return (spec_name(spec), grid, *_openings(grid, spec.algorithm, spec._asdict()))
+
+
+def spec_cases(specs: Iterable, workers: Optional[int] = None) -> Iterator[Case]:
+    """
+    Casos generados con los generadores de maze_generation (MazeSpec o
+    tuplas de as_spec), repartidos en un pool de procesos si workers > 1.
+    """
+    from maze_generation import as_spec
+    specs = [as_spec(s) for s in specs]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(_build_case, specs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_build_case, specs, chunksize=max(1, len(specs) // (workers * 8)))
+
+
+def store_cases(store, **filters) -> Iterator[Case]:
+    """Casos de un MazeStore (ver mazes_from_store)."""
+    from maze_water_solver import mazes_from_store
+    for rec, grid, start, goal in mazes_from_store(store, **filters):
+        yield f"{rec['algorithm']}#{rec['id']}", grid, start, goal
+
+
+# ---------------------------------------------------------------------
+# Tabla y resumen
+# ---------------------------------------------------------------------
+
+def write_table(stats: np.ndarray, path: str) -> None:
+    """Una fila por laberinto, separada por tabuladores."""
+    with open(path, "w") as f:
+        f.write("\t".join(STATS_DTYPE.names) + "\n")
+        for row in stats:
+            cells = []
+            for name in STATS_DTYPE.names:
+                v = row[name]
+                if name == "name":
+                    cells.append(v.decode())
+                elif STATS_DTYPE[name].kind == "f":
+                    cells.append(f"{v:.4f}")
+                else:
+                    cells.append(str(int(v)))
+            f.write("\t".join(cells) + "\n")
+
+
+def summarize(stats: np.ndarray) -> Dict[Tuple[int, int], Dict[str, float]]:
+    """Medias por tamaño (rows, cols); solution_* solo sobre los alcanzables."""
+    out: Dict[Tuple[int, int], Dict[str, float]] = {}
+    shapes = np.unique(stats[["rows", "cols"]])
+    for rows, cols in shapes.tolist():
+        sel = stats[(stats["rows"] == rows) & (stats["cols"] == cols)]
+        ok = sel[sel["reached"] == 1]
+        m = {"mazes": len(sel), "reached": float(sel["reached"].mean())}
+        for name in ("open_cells", "dead_ends", "junctions", "branching_factor", "mean_degree",
+                     "corridors", "corridor_mean", "corridor_median", "corridor_p90", "corridor_max"):
+            m[name] = float(np.nanmean(sel[name])) if len(sel) else float("nan")
+        for name in ("solution_length", "solution_fraction"):
+            m[name] = float(ok[name].mean()) if len(ok) else float("nan")
+        out[(rows, cols)] = m
+    return out
+
+
+def print_summary(summary: Dict[Tuple[int, int], Dict[str, float]]) -> None:
+    cols = ("mazes", "reached", "dead_ends", "junctions", "branching_factor", "corridors",
+            "corridor_mean", "corridor_max", "solution_length", "solution_fraction")
+    print("size\t" + "\t".join(cols))
+    for (rows, c), m in sorted(summary.items()):
+        print(f"{rows}x{c}\t" + "\t".join(
+            str(m[k]) if k == "mazes" else f"{m[k]:.3f}" for k in cols))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--files", nargs="+", help="archivos .maze / .txt")
+    parser.add_argument("--store", help="MazeStore")
+    parser.add_argument("--algorithm",
+                        help="algoritmo a generar (por defecto prims) o filtro de --store "
+                             "(por defecto, todo el almacén)")
+    parser.add_argument("--size", type=int, nargs="+", default=[201])
+    parser.add_argument("--seeds", type=int, default=1000, help="semillas 0..N-1 a generar")
+    parser.add_argument("--sides", type=float, nargs=4, default=[3, 0.5, 0, 0.5],
+                        metavar=("START_SIDE", "START_REL", "END_SIDE", "END_REL"))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--out", help="tabla por laberinto (TSV)")
+    args = parser.parse_args()
+
+    if args.files:
+        cases = file_cases(args.files)
+    elif args.store:
+        from maze_store import MazeStore
+        filters = {"algorithm": args.algorithm} if args.algorithm else {}
+        cases = store_cases(MazeStore(args.store, create=False), **filters)
+    else:
+        ss, sr, es, er = args.sides
+        cases = spec_cases([(args.algorithm or "prims", n, (int(ss), sr, int(es), er), sd)
+                            for n in args.size for sd in range(args.seeds)], args.workers)
+
+    t0 = time.perf_counter()
+    stats = stats_from_cases(cases, args.batch)
+    elapsed = time.perf_counter() - t0
+    print(f"# {len(stats)} laberintos en {elapsed:.2f}s ({len(stats) / max(elapsed, 1e-9) * 60:.0f}/min)",
+          file=sys.stderr)
+    if args.out:
+        write_table(stats, args.out)
+    print_summary(summarize(stats))
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+maze_store.py
+
+Almacén de muchos laberintos en un único directorio:
+
+    store/
+    ├── grids.bin   # matrices uint8 concatenadas (solo se añade al final)
+    └── index.npy   # índice estructurado (INDEX_DTYPE), una fila por laberinto
+
+El índice guarda los metadatos de cada laberinto (algoritmo, tamaño, lados y
+posiciones de entrada/salida, semilla, valor de muro, celdas de apertura y
+hash del contenido) junto con su desplazamiento en grids.bin. Las consultas
+son máscaras de NumPy sobre el índice y solo se cargan (con np.memmap, sin
+copia) las matrices seleccionadas.
+
+Uso:
+    store = MazeStore("output/store")
+    i = store.append(matriz, "prims", 21, 21, 3, 0.5, 0, 0.25, seed=1)
+    ids = store.query(algorithm="prims", width=21, start_side=3)
+    for i, grid in store.load_many(ids):
+        ...
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import maze_algorithms
+
+Coord = Tuple[int, int]  # (fila, columna)
+
+INDEX_DTYPE = np.dtype([
+    ("algorithm", "S16"),
+    ("width", "<u4"),
+    ("height", "<u4"),
+    ("rows", "<u4"),
+    ("cols", "<u4"),
+    ("start_side", "i1"),
+    ("start_rel", "<f8"),
+    ("end_side", "i1"),
+    ("end_rel", "<f8"),
+    ("seed", "<i8"),       # -1 = sin semilla
+    ("wall", "u1"),        # valor que representa un muro en la matriz
+    ("start_r", "<i4"),    # celdas de entrada/salida (-1 si no hay)
+    ("start_c", "<i4"),
+    ("end_r", "<i4"),
+    ("end_c", "<i4"),
+    ("hash", "S40"),       # sha1 (hex) de forma + contenido
+    ("offset", "<u8"),     # posición en grids.bin
+])
+
+
+def content_hash(maze: np.ndarray) -> str:
+    """sha1 de la forma y el contenido (uint8) de una matriz."""
+    data = np.ascontiguousarray(maze, dtype=np.uint8)
+    h = hashlib.sha1(f"{data.shape[0]}x{data.shape[1]}:".encode())
+    h.update(data.tobytes())
+    return h.hexdigest()
+
+
+class MazeStore:
+    """Archivo de laberintos con índice de metadatos y carga perezosa."""
+
+    def __init__(self, path: str, create: bool = True):
+        self.path = path
+        self.grids_path = os.path.join(path, "grids.bin")
+        self.index_path = os.path.join(path, "index.npy")
+        if not os.path.isdir(path):
+            if not create:
+                raise FileNotFoundError(f"No existe el almacén: {path}")
+            os.makedirs(path)
+        if os.path.exists(self.index_path):
+            self.index = np.load(self.index_path)
+        else:
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+        if not os.path.exists(self.grids_path):
+            open(self.grids_path, "wb").close()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self) -> str:
+        return f"MazeStore({self.path!r}, {len(self)} laberintos)"
+
+    # -----------------------------------------------------------------
+    # Escritura
+    # -----------------------------------------------------------------
+
+    def append(self, maze: np.ndarray, algorithm: str, width: int, height: int,
+               start_side: int, start_rel: float, end_side: int, end_rel: float,
+               seed: Optional[int] = None, wall: Optional[int] = None,
+               start: Optional[Coord] = None, goal: Optional[Coord] = None,
+               unique: bool = False) -> int:
+        """
+        Añade un laberinto y devuelve su id (posición en el índice).
+
+        wall y las celdas start/goal se deducen del algoritmo cuando es uno de
+        maze_algorithms; para otras fuentes hay que indicarlos. Con
+        unique=True, un contenido ya presente no se duplica (devuelve su id).
+        """
+        return self.extend([dict(
+            maze=maze, algorithm=algorithm, width=width, height=height,
+            start_side=start_side, start_rel=start_rel, end_side=end_side, end_rel=end_rel,
+            seed=seed, wall=wall, start=start, goal=goal,
+        )], unique=unique)[0]
+
+    def extend(self, records: Iterable[Dict], unique: bool = False) -> List[int]:
+        """
+        Añade varios laberintos (dicts con los argumentos de append) y
+        reescribe el índice una sola vez.
+        """
+        rows, ids = [], []
+        known = {h: i for i, h in enumerate(self.index["hash"])} if unique else {}
+        offset = os.path.getsize(self.grids_path)
+        with open(self.grids_path, "ab") as f:
+            for rec in records:
+                data = np.ascontiguousarray(rec["maze"], dtype=np.uint8)
+                digest = content_hash(data).encode()
+                if unique and digest in known:
+                    ids.append(known[digest])
+                    continue
+                row = self._make_row(data, rec, digest, offset)
+                data.tofile(f)
+                offset += data.nbytes
+                ids.append(len(self.index) + len(rows))
+                known[digest] = ids[-1]
+                rows.append(row)
+        if rows:
+            self.index = np.concatenate([self.index, np.array(rows, dtype=INDEX_DTYPE)])
+            self._save_index()
+        return ids
+
+    def _make_row(self, data: np.ndarray, rec: Dict, digest: bytes, offset: int) -> tuple:
+        algorithm = rec["algorithm"]
+        wall = rec.get("wall")
+        start, goal = rec.get("start"), rec.get("goal")
+        if algorithm in maze_algorithms.GENERATORS:
+            if wall is None:
+                wall = maze_algorithms.WALL_VALUE[algorithm]
+            if start is None and goal is None:
+                start, goal = maze_algorithms.opening_cells(
+                    algorithm, *data.shape, rec["start_side"], rec["start_rel"],
+                    rec["end_side"], rec["end_rel"])
+        if wall is None:
+            raise ValueError(f"Falta el valor de muro para el algoritmo {algorithm!r}")
+        start = start if start is not None else (-1, -1)
+        goal = goal if goal is not None else (-1, -1)
+        seed = rec.get("seed")
+        return (
+            algorithm.encode(), rec["width"], rec["height"], data.shape[0], data.shape[1],
+            rec["start_side"], rec["start_rel"], rec["end_side"], rec["end_rel"],
+            -1 if seed is None else seed, wall,
+            start[0], start[1], goal[0], goal[1], digest, offset,
+        )
+
+    def _save_index(self) -> None:
+        # Escritura atómica: un lector nunca ve un índice a medias
+        tmp = self.index_path + ".tmp.npy"
+        np.save(tmp, self.index)
+        os.replace(tmp, self.index_path)
+
+    def import_files(self, paths: Iterable[str], unique: bool = True) -> List[int]:
+        """Añade archivos .maze / .txt leídos con maze_generation.read_maze."""
+        from maze_generation import parse_metadata, read_maze
+        records = []
+        for p in paths:
+            metadata, matriz = read_maze(p)
+            records.append(dict(maze=matriz, **parse_metadata(metadata)))
+        return self.extend(records, unique=unique)
+
+    # -----------------------------------------------------------------
+    # Consultas y lectura
+    # -----------------------------------------------------------------
+
+    def query(self, **filters) -> np.ndarray:
+        """
+        Ids de los laberintos que cumplen todos los filtros. Cada filtro es
+        un campo de INDEX_DTYPE con un valor (igualdad), una lista/tupla de
+        valores admitidos o, para rangos, un slice(lo, hi) (hi excluido).
+
+            store.query(algorithm="prims", width=21, start_side=3)
+            store.query(width=slice(100, None), seed=[1, 2, 3])
+        """
+        mask = np.ones(len(self.index), dtype=bool)
+        for field, value in filters.items():
+            if field not in INDEX_DTYPE.names:
+                raise KeyError(f"Campo desconocido: {field}")
+            col = self.index[field]
+            if isinstance(value, str):
+                value = value.encode()
+            if isinstance(value, slice):
+                if value.start is not None:
+                    mask &= col >= value.start
+                if value.stop is not None:
+                    mask &= col < value.stop
+            elif isinstance(value, (list, tuple, set, np.ndarray)):
+                vals = [v.encode() if isinstance(v, str) else v for v in value]
+                mask &= np.isin(col, vals)
+            else:
+                mask &= col == value
+        return np.flatnonzero(mask)
+
+    def record(self, i: int) -> Dict:
+        """Metadatos del laberinto i como dict de tipos de Python."""
+        row = self.index[i]
+        d = {name: row[name].item() for name in INDEX_DTYPE.names}
+        d["algorithm"] = d["algorithm"].decode()
+        d["hash"] = d["hash"].decode()
+        d["seed"] = None if d["seed"] < 0 else d["seed"]
+        d["start"] = None if d["start_r"] < 0 else (d["start_r"], d["start_c"])
+        d["goal"] = None if d["end_r"] < 0 else (d["end_r"], d["end_c"])
+        d["id"] = int(i)
+        return d
+
+    def load(self, i: int) -> np.ndarray:
+        """Matriz del laberinto i como np.memmap de solo lectura."""
+        row = self.index[i]
+        return np.memmap(self.grids_path, dtype=np.uint8, mode="r",
+                         offset=int(row["offset"]), shape=(int(row["rows"]), int(row["cols"])))
+
+    def load_many(self, ids: Iterable[int]) -> Iterator[Tuple[int, np.ndarray]]:
+        """Genera (id, matriz) cargando solo los laberintos pedidos."""
+        for i in ids:
+            yield int(i), self.load(i)
+
+    def find(self, maze: np.ndarray) -> Optional[int]:
+        """Id de un laberinto con el mismo contenido, o None."""
+        hits = np.flatnonzero(self.index["hash"] == content_hash(maze).encode())
+        return int(hits[0]) if hits.size else None
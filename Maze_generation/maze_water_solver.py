@@ -21,13 +21,18 @@ Requisitos: numpy, matplotlib (para el gráfico)
 """
 
 from __future__ import annotations
+import json
 import math
 import random
-from typing import Dict, List, Optional, Set, Tuple
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 import matplotlib.pyplot as plt
 
+from maze_graph import DOWN, LEFT, NONE, RIGHT, ROOT, UP, MazeGraph, as_graph
+
 Coord = Tuple[int, int]  # (fila, columna)
 
 
@@ -110,22 +115,188 @@ def find_entrance_exit(grid: np.ndarray) -> Tuple[Coord, Coord]:
     return s, g
 
 
+# ---------------------------------------------------------------------
+# Lectura/escritura en un MazeStore (maze_store.py)
+# ---------------------------------------------------------------------
+
+def open_grid(maze: np.ndarray, wall: int) -> np.ndarray:
+    """Convierte una matriz con valor de muro `wall` a la convención 1=espacio."""
+    return (np.asarray(maze) != wall).astype(np.uint8)
+
+def save_to_store(store, grid: np.ndarray, seed: int) -> int:
+    """Guarda un laberinto de generate_maze (1=espacio) en el almacén."""
+    start, goal = find_entrance_exit(grid)
+    H, W = grid.shape
+    return store.append(
+        grid, "dfs", W, H,
+        3, start[1] / (W - 1), 0, goal[1] / (W - 1),
+        seed=seed, wall=0, start=start, goal=goal, unique=True,
+    )
+
+def mazes_from_store(store, **filters):
+    """
+    Genera (registro, grid, start, goal) para los laberintos del almacén que
+    cumplen los filtros (ver MazeStore.query). grid usa 1=espacio; se omiten
+    los laberintos sin entrada o salida registradas.
+    """
+    for i in store.query(**filters):
+        rec = store.record(i)
+        if rec["start"] is None or rec["goal"] is None:
+            continue
+        yield rec, open_grid(store.load(i), rec["wall"]), rec["start"], rec["goal"]
+
+
 # ---------------------------------------------------------------------
 # Resultados y base de solvers
 # ---------------------------------------------------------------------
 
 class SolveResult:
-    def __init__(self, path: List[Coord], visited: Set[Coord], reached: bool):
-        self.path = path
-        self.visited = visited
+    """
+    Resultado compacto de un solver.
+
+    path_array    int32 (n, 2): camino (fila, columna) de la entrada a la salida
+    visited_bits  uint8: máscara de visitadas (H, W) empaquetada por filas
+                  con np.packbits
+    visited_count, path_length: contadores precalculados
+
+    `path` (lista de tuplas) y `visited` (set de tuplas) se conservan como
+    propiedades por compatibilidad, pero se construyen en cada acceso: las
+    métricas deben leer los contadores. `visited` también admite una
+    máscara booleana (H, W) en el constructor.
+
+    stats: contadores y tiempos de la búsqueda si el solver está
+    instrumentado (BaseSolver.instrument), si no None.
+    """
+    __slots__ = ("path_array", "visited_bits", "shape", "visited_count",
+                 "reached", "visited_ratio", "stats")
+
+    def __init__(self, path, visited, reached: bool, shape: Optional[Tuple[int, int]] = None):
+        self.path_array = np.asarray(path, dtype=np.int32).reshape(-1, 2)
+        if isinstance(visited, np.ndarray) and visited.dtype == bool:
+            mask = visited
+        else:
+            cells = np.array(list(visited), dtype=np.int64).reshape(-1, 2)
+            if shape is None:
+                shape = tuple(np.maximum(cells.max(axis=0) + 1, 0)) if len(cells) else (0, 0)
+            mask = np.zeros(shape, dtype=bool)
+            mask[cells[:, 0], cells[:, 1]] = True
+        self.shape = mask.shape
+        self.visited_bits = np.packbits(mask, axis=1)
+        self.visited_count = int(np.count_nonzero(mask))
         self.reached = reached
         self.visited_ratio: float = float("nan")  # se completa en evaluate
+        self.stats: Optional[Dict[str, float]] = None
+
+    @property
+    def path_length(self) -> int:
+        return len(self.path_array)
+
+    @property
+    def path(self) -> List[Coord]:
+        return list(map(tuple, self.path_array.tolist()))
+
+    @property
+    def visited_mask(self) -> np.ndarray:
+        """Máscara booleana (H, W) de celdas visitadas."""
+        return np.unpackbits(self.visited_bits, axis=1, count=self.shape[1]).view(bool)
+
+    @property
+    def visited(self) -> Set[Coord]:
+        return set(map(tuple, np.argwhere(self.visited_mask).tolist()))
 
 class BaseSolver:
+    """
+    Los solvers aceptan como `grid` una matriz (1=espacio) o un MazeGraph
+    ya construido (maze_graph.py), reutilizable entre llamadas.
+
+    Instrumentación (opcional, ver instrument): cada solve rellena
+    SolveResult.stats con
+
+        expanded         celdas cuyos vecinos se examinaron (sin la salida)
+        neighbor_checks  vecinos abiertos examinados desde esas celdas
+        pushes           inserciones en la cola / heap
+        stale_pops       extracciones del heap de celdas ya cerradas
+        steps            pasos de los solvers que caminan (mano, aleatorio)
+        search_s         tiempo de búsqueda
+        path_s           tiempo de reconstrucción del camino y del resultado
+
+    Los contadores se deducen al final de los buffers de la búsqueda; en el
+    bucle solo se cuenta stale_pops, en una rama que ya existía. Sin
+    instrumentar, el coste es una comprobación por solve.
+    """
     name = "base"
-    def solve(self, grid: np.ndarray, start: Coord, goal: Coord) -> SolveResult:
+    shortest_paths = False  # True si el camino devuelto siempre es mínimo en pasos
+    instrumented = False
+    on_event: Optional[Callable[[str, Dict], None]] = None
+    trace_path: Optional[str] = None
+
+    def solve(self, grid, start: Coord, goal: Coord) -> SolveResult:
         raise NotImplementedError
 
+    def instrument(self, on_event: Optional[Callable[[str, Dict], None]] = None,
+                   trace: Optional[str] = None) -> "BaseSolver":
+        """
+        Activa las estadísticas. on_event(evento, datos) recibe "start"
+        (solver, start, goal) al empezar cada solve y "end" (las stats) al
+        terminar; con trace, los mismos eventos se añaden como líneas JSON
+        a ese archivo.
+        """
+        self.instrumented = True
+        self.on_event = on_event
+        self.trace_path = trace
+        return self
+
+    def uninstrument(self) -> "BaseSolver":
+        self.instrumented = False
+        self.on_event = None
+        self.trace_path = None
+        return self
+
+    def _emit(self, event: str, data: Dict) -> None:
+        if self.on_event is not None:
+            self.on_event(event, data)
+        if self.trace_path is not None:
+            with open(self.trace_path, "a") as f:
+                f.write(json.dumps({"event": event, **data}) + "\n")
+
+    def _begin(self, start: Coord, goal: Coord) -> float:
+        """Marca de tiempo del inicio de la búsqueda (0.0 sin instrumentar)."""
+        if not self.instrumented:
+            return 0.0
+        self._emit("start", {"solver": self.name, "start": list(start), "goal": list(goal)})
+        return time.perf_counter()
+
+    def _finish(self, G: MazeGraph, parent, goal: int, visited_mask: np.ndarray, t0: float,
+                expanded_mask: Optional[np.ndarray] = None, pushes: int = 0,
+                stale_pops: int = 0, steps: Optional[int] = None) -> SolveResult:
+        """_graph_result + stats si el solver está instrumentado."""
+        if not self.instrumented:
+            return _graph_result(G, parent, goal, visited_mask)
+        t1 = time.perf_counter()
+        res = _graph_result(G, parent, goal, visited_mask)
+        stats: Dict[str, float] = {"solver": self.name}
+        if expanded_mask is not None:
+            expanded_mask = expanded_mask.copy()
+            expanded_mask[goal] = False  # la búsqueda termina al sacar la salida
+            stats["expanded"] = int(expanded_mask.sum())
+            stats["neighbor_checks"] = int(np.diff(G.indptr)[expanded_mask].sum())
+            stats["pushes"] = pushes
+            stats["stale_pops"] = stale_pops
+        if steps is not None:
+            stats["steps"] = steps
+        stats["search_s"] = t1 - t0
+        stats["path_s"] = time.perf_counter() - t1
+        res.stats = stats
+        self._emit("end", stats)
+        return res
+
+def _graph_result(G: MazeGraph, parent, goal: int, visited_mask: np.ndarray) -> SolveResult:
+    """SolveResult a partir de los buffers planos de una búsqueda sobre G."""
+    reached = parent[goal] != NONE
+    ids = np.array(G.path_to(parent, goal) if reached else [], dtype=np.int32)
+    path = np.stack(np.divmod(ids, G.W), axis=1)
+    return SolveResult(path, visited_mask.reshape(G.H, G.W), reached)
+
 
 # ---------------------------------------------------------------------
 # Solvers clásicos
@@ -133,147 +304,470 @@ class BaseSolver:
 
 class BFSSolver(BaseSolver):
     name = "BFS (shortest-by-steps)"
+    shortest_paths = True
     def solve(self, grid, start, goal):
         from collections import deque
-        q = deque([start])
-        parent: Dict[Coord, Optional[Coord]] = {start: None}
-        visited: Set[Coord] = {start}
+        G = as_graph(grid)
+        ptr, ind = G.lists()
+        s, t = G.id(start), G.id(goal)
+        t0 = self._begin(start, goal)
+        parent = G.parent_buffer()  # != NONE -> descubierto
+        parent[s] = ROOT
+        q = deque([s])
         while q:
             u = q.popleft()
-            if u == goal:
+            if u == t:
                 break
-            for v in neighbors4(grid, *u):
-                if v not in visited:
-                    visited.add(v)
+            for v in ind[ptr[u]:ptr[u + 1]]:
+                if parent[v] == NONE:
                     parent[v] = u
                     q.append(v)
-        reached = goal in parent
-        path: List[Coord] = []
-        if reached:
-            cur = goal
-            while cur is not None:
-                path.append(cur)
-                cur = parent[cur]
-            path.reverse()
-        return SolveResult(path, visited, reached)
+        visited = np.frombuffer(parent, dtype=np.int32) != NONE
+        if not self.instrumented:
+            return _graph_result(G, parent, t, visited)
+        popped = visited.copy()
+        popped[list(q)] = False  # descubiertas que siguen en la cola
+        return self._finish(G, parent, t, visited, t0, expanded_mask=popped,
+                            pushes=int(visited.sum()))
 
 class AStarSolver(BaseSolver):
     name = "A* (Manhattan)"
+    shortest_paths = True
     def solve(self, grid, start, goal):
         import heapq
-        def h(a: Coord, b: Coord) -> int:
-            return abs(a[0] - b[0]) + abs(a[1] - b[1])
-        openh: List[Tuple[int, int, Coord, Optional[Coord]]] = []
-        heapq.heappush(openh, (h(start, goal), 0, start, None))
-        parent: Dict[Coord, Optional[Coord]] = {}
-        gscore: Dict[Coord, int] = {start: 0}
-        visited: Set[Coord] = set()
+        G = as_graph(grid)
+        ptr, ind = G.lists()
+        W = G.W
+        s, t = G.id(start), G.id(goal)
+        gr, gc = goal
+        def h(v: int) -> int:
+            r, c = divmod(v, W)
+            return abs(r - gr) + abs(c - gc)
+        t0 = self._begin(start, goal)
+        stale = 0
+        openh: List[Tuple[int, int, int, int]] = []
+        heapq.heappush(openh, (h(s), 0, s, ROOT))
+        parent = G.parent_buffer()
+        gscore = G.cost_buffer()
+        gscore[s] = 0
+        visited = G.visited_buffer()
         while openh:
             f, g, u, p = heapq.heappop(openh)
-            if u in visited:
+            if visited[u]:
+                stale += 1
                 continue
-            visited.add(u)
+            visited[u] = 1
             parent[u] = p
-            if u == goal:
+            if u == t:
                 break
-            for v in neighbors4(grid, *u):
-                ng = g + 1
-                if ng < gscore.get(v, 10**18):
+            ng = g + 1
+            for v in ind[ptr[u]:ptr[u + 1]]:
+                if ng < gscore[v]:
                     gscore[v] = ng
-                    heapq.heappush(openh, (ng + h(v, goal), ng, v, u))
-        reached = goal in parent
-        path: List[Coord] = []
-        if reached:
-            cur = goal
-            while cur is not None:
-                path.append(cur)
-                cur = parent[cur]
-            path.reverse()
-        return SolveResult(path, visited, reached)
+                    heapq.heappush(openh, (ng + h(v), ng, v, u))
+        closed = np.frombuffer(visited, dtype=np.uint8) == 1
+        return self._finish(G, parent, t, closed, t0, expanded_mask=closed,
+                            pushes=int(closed.sum()) + stale + len(openh), stale_pops=stale)
+
+class WalkStats:
+    """
+    Resultado de RandomWalkSolver.simulate para `walkers` caminatas
+    independientes desde la entrada.
+
+    hitting_times  int64 (walkers,): pasos hasta pisar la salida, -1 si no
+                   llegó en max_steps
+    visited        int64 (walkers,): celdas distintas que pisó cada caminata
+                   (hasta llegar o agotar los pasos)
+    union_visited  celdas pisadas por al menos una caminata
+    open_cells, max_steps
+    """
+    QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+    def __init__(self, hitting_times: np.ndarray, visited: np.ndarray, union_visited: int,
+                 open_cells: int, max_steps: int):
+        self.hitting_times = hitting_times
+        self.visited = visited
+        self.union_visited = union_visited
+        self.open_cells = open_cells
+        self.max_steps = max_steps
+
+    @property
+    def reached(self) -> np.ndarray:
+        return self.hitting_times >= 0
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Tiempo de llegada: media sobre las que llegan y cuantiles sobre todas
+        (las que no llegan cuentan como inf, así que un cuantil inf significa
+        "más de max_steps"). Cobertura: celdas distintas / celdas abiertas.
+        """
+        reached = self.reached
+        times = np.where(reached, self.hitting_times, np.inf).astype(float)
+        coverage = self.visited / max(self.open_cells, 1)
+        out = {
+            "walkers": int(times.size),
+            "reached": float(reached.mean()),
+            "hit_mean": float(times[reached].mean()) if reached.any() else math.inf,
+        }
+        for q in self.QUANTILES:
+            out[f"hit_q{int(q * 100)}"] = float(np.quantile(times, q, method="inverted_cdf"))
+        out["coverage_mean"] = float(coverage.mean())
+        out["coverage_q50"] = float(np.median(coverage))
+        out["coverage_union"] = self.union_visited / max(self.open_cells, 1)
+        return out
 
 class RandomWalkSolver(BaseSolver):
     name = "Random Walk"
     def __init__(self, max_steps: int = 100000, seed: int = 0):
         self.max_steps = max_steps
         self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
     def solve(self, grid, start, goal):
-        cur = start
-        visited: Set[Coord] = {cur}
-        parent: Dict[Coord, Optional[Coord]] = {cur: None}
+        G = as_graph(grid)
+        ptr, ind = G.lists()
+        cur, t = G.id(start), G.id(goal)
+        visited = G.visited_buffer()
+        visited[cur] = 1
+        parent = G.parent_buffer()
+        parent[cur] = ROOT
+        choice = self.rng.choice
+        t0 = self._begin(start, goal)
         steps = 0
-        while steps < self.max_steps and cur != goal:
+        while steps < self.max_steps and cur != t:
             steps += 1
-            nbs = neighbors4(grid, *cur)
+            nbs = ind[ptr[cur]:ptr[cur + 1]]
             if not nbs:
                 break
-            nxt = self.rng.choice(nbs)
-            if nxt not in parent:
+            nxt = choice(nbs)
+            if parent[nxt] == NONE:
                 parent[nxt] = cur
             cur = nxt
-            visited.add(cur)
-        reached = (cur == goal)
-        path: List[Coord] = []
-        if reached:
-            curp = cur
-            while curp is not None:
-                path.append(curp)
-                curp = parent[curp]
-            path.reverse()
-        return SolveResult(path, visited, reached)
+            visited[cur] = 1
+        # parent[t] solo se asigna al pisar t, que termina la caminata
+        return self._finish(G, parent, t, np.frombuffer(visited, dtype=np.uint8) == 1, t0, steps=steps)
+
+    def simulate(self, grid, start, goal, walkers: int = 1000, max_steps: Optional[int] = None,
+                 block: int = 256, max_bytes: int = 64 << 20) -> WalkStats:
+        """
+        Muchas caminatas independientes a la vez, vectorizadas con NumPy.
+
+        Cada paso es, para todas las caminatas activas, una tabla de vecinos
+        por celda (los vecinos abiertos de MazeGraph, compactados en (size,
+        4)) indexada con un número aleatorio por caminata; los números se
+        sacan en bloques de `block` pasos. La salida es absorbente y las
+        caminatas que llegan se retiran del lote al final de cada bloque.
+        Las caminatas se reparten en tandas para que la máscara de celdas
+        pisadas (caminatas x celdas) no supere max_bytes.
+
+        Misma elección que solve (vecino uniforme, se queda quieta en una
+        celda sin vecinos), pero con el RNG de NumPy: no reproduce la
+        caminata de solve para la misma semilla.
+        """
+        G = as_graph(grid)
+        max_steps = self.max_steps if max_steps is None else max_steps
+        s, t = G.id(start), G.id(goal)
+        size = G.size
+        deg = np.diff(G.indptr)
+        # table[i, k] = k-ésimo vecino abierto de i; sin vecinos, se queda en i
+        table = np.repeat(np.arange(size, dtype=np.int64)[:, None], 4, axis=1)
+        rows = np.repeat(np.arange(size), deg)
+        table[rows, np.arange(len(G.indices)) - G.indptr[rows]] = G.indices
+        degf = np.maximum(deg, 1).astype(np.float64)
+        table[t] = t  # absorbente
+        degf[t] = 1.0
+        table = table.ravel()
+
+        rng = self.np_rng
+        hitting = np.full(walkers, -1, dtype=np.int64)
+        visited = np.zeros(walkers, dtype=np.int64)
+        union = np.zeros(size, dtype=bool)
+        chunk = max(1, min(walkers, max_bytes // max(size, 1)))
+        for w0 in range(0, walkers, chunk):
+            n = min(chunk, walkers - w0)
+            seen = np.zeros(n * size, dtype=bool)
+            ids = np.arange(n)          # caminata (dentro de la tanda) de cada activa
+            off = ids * size
+            pos = np.full(n, s, dtype=np.int64)
+            seen[off + s] = True
+            if s == t:
+                hitting[w0:w0 + n] = 0
+                ids = ids[:0]
+            step = 0
+            while ids.size and step < max_steps:
+                nb = min(block, max_steps - step)
+                u = rng.random((nb, ids.size))
+                for j in range(nb):
+                    pos = table[4 * pos + (u[j] * degf[pos]).astype(np.int64)]
+                    seen[off + pos] = True
+                    at = pos == t
+                    if at.any():
+                        new = at & (hitting[w0 + ids] < 0)
+                        hitting[w0 + ids[new]] = step + j + 1
+                step += nb
+                active = hitting[w0 + ids] < 0
+                ids, off, pos = ids[active], off[active], pos[active]
+            seen = seen.reshape(n, size)
+            visited[w0:w0 + n] = seen.sum(axis=1)
+            union |= seen.any(axis=0)
+        return WalkStats(hitting, visited, int(union.sum()), G.open_cells, max_steps)
 
 class WallFollower(BaseSolver):
-    """Regla de la mano (izquierda o derecha)."""
+    """
+    Regla de la mano (izquierda o derecha).
+
+    El paso se compila una vez por laberinto y mano en una tabla de
+    transiciones de estados (celda, rumbo) -> (celda, rumbo), con id de
+    estado 4 * celda + rumbo; seguir la regla es solo indexar la tabla
+    (array("i"), 16 bytes por celda). Las tablas se comparten entre
+    instancias y llamadas por hash del contenido, así que también se
+    reutilizan con matrices sueltas (as_graph crea un MazeGraph nuevo en
+    cada llamada); se guardan las TABLE_CACHE últimas. Como la regla es
+    determinista, pasar dos veces por el mismo estado es un ciclo exacto:
+    la caminata se detiene ahí sin llegar.
+    """
     name = "Wall Follower (hand rule)"
+    # direcciones: 0=arriba,1=derecha,2=abajo,3=izquierda -> columna de MazeGraph.dirs
+    HEADING_COL = (UP, RIGHT, DOWN, LEFT)
+    TABLE_CACHE = 2
+    _tables: Dict[Tuple[str, bool], array] = {}  # (content_hash, left) -> tabla
+
     def __init__(self, left: bool = True):
         self.left = left
         self.name = ("Left-" if left else "Right-") + "hand Rule"
+
+    @classmethod
+    def transitions(cls, G: MazeGraph, left: bool = True) -> array:
+        """
+        Tabla de una mano (array("i") de size * 4): el siguiente estado de
+        cada estado. Desde el rumbo h se prueba (primero, h, primero + 1,
+        primero + 2) con primero = h - 1 (izquierda) o h + 1 (derecha); sin
+        salida, se da la vuelta sin moverse.
+        """
+        from maze_store import content_hash
+        key = (content_hash(G.grid), left)
+        table = cls._tables.get(key)
+        if table is not None:
+            return table
+        nb = G.dirs[:, list(cls.HEADING_COL)]  # (size, 4) vecino por rumbo
+        states = np.arange(G.size, dtype=np.int32) * 4
+        first_turn = -1 if left else 1
+        out = np.empty((G.size, 4), dtype=np.int32)
+        for h in range(4):
+            first = (h + first_turn) % 4
+            nxt = states + (h + 2) % 4  # dar la vuelta
+            for d in reversed((first, h, (first + 1) % 4, (first + 2) % 4)):
+                col = nb[:, d]
+                nxt = np.where(col != NONE, col * 4 + d, nxt)
+            out[:, h] = nxt
+        table = array("i")
+        table.frombytes(out.tobytes())
+        del out
+        while len(cls._tables) >= cls.TABLE_CACHE:
+            cls._tables.pop(next(iter(cls._tables)))
+        cls._tables[key] = table
+        return table
+
     def solve(self, grid, start, goal):
-        # direcciones: 0=arriba,1=derecha,2=abajo,3=izquierda
-        def left_of(d): return (d - 1) % 4
-        def right_of(d): return (d + 1) % 4
-        def move(p, d):
-            r, c = p
-            if d == 0: return (r - 1, c)
-            if d == 1: return (r, c + 1)
-            if d == 2: return (r + 1, c)
-            return (r, c - 1)
-        def can_step(p):
-            r, c = p
-            H, W = grid.shape
-            return 0 <= r < H and 0 <= c < W and grid[r, c] == 1
-
-        heading = 2  # empezar "mirando hacia abajo"
-        cur = start
-        visited: Set[Coord] = {cur}
-        parent: Dict[Coord, Optional[Coord]] = {cur: None}
-        safety = 0
-        while cur != goal and safety < grid.size * 10:
-            safety += 1
-            first = left_of(heading) if self.left else right_of(heading)
-            choices = [first, heading, (first + 1) % 4, (first + 2) % 4]
-            moved = False
-            for d in choices:
-                nxt = move(cur, d)
-                if can_step(nxt):
-                    if nxt not in parent:
-                        parent[nxt] = cur
-                    cur = nxt
-                    heading = d
-                    visited.add(cur)
-                    moved = True
-                    break
-            if not moved:
-                heading = (heading + 2) % 4  # dar la vuelta
-
-        reached = (cur == goal)
-        path: List[Coord] = []
-        if reached:
-            curp = cur
-            while curp is not None:
-                path.append(curp)
-                curp = parent[curp]
-            path.reverse()
-        return SolveResult(path, visited, reached)
+        G = as_graph(grid)
+        table = self.transitions(G, self.left)
+        cur, t = G.id(start), G.id(goal)
+        state = 4 * cur + 2  # empezar "mirando hacia abajo"
+        visited = G.visited_buffer()
+        visited[cur] = 1
+        parent = G.parent_buffer()
+        parent[cur] = ROOT
+        seen = bytearray(4 * G.size)
+        t0 = self._begin(start, goal)
+        steps = 0
+        while cur != t and not seen[state]:
+            seen[state] = 1
+            steps += 1
+            state = table[state]
+            nxt = state >> 2
+            if parent[nxt] == NONE:
+                parent[nxt] = cur
+            cur = nxt
+            visited[cur] = 1
+
+        return self._finish(G, parent, t, np.frombuffer(visited, dtype=np.uint8) == 1, t0, steps=steps)
+
+
+# ---------------------------------------------------------------------
+# Búsqueda bidireccional y jump point search (camino mínimo, como BFS)
+# ---------------------------------------------------------------------
+
+class BidirectionalBFSSolver(BaseSolver):
+    """
+    BFS simultáneo desde la entrada y desde la salida. Cada vez se expande
+    un nivel completo del frente más pequeño; al terminar un nivel en el que
+    los dos lados se han tocado, el mejor punto de encuentro da un camino
+    mínimo.
+    """
+    name = "Bidirectional BFS"
+    shortest_paths = True
+    def solve(self, grid, start, goal):
+        G = as_graph(grid)
+        ptr, ind = G.lists()
+        s, t = G.id(start), G.id(goal)
+        t0 = self._begin(start, goal)
+        parent = (G.parent_buffer(), G.parent_buffer())  # desde s, desde t
+        dist = (array("i", [-1]) * G.size, array("i", [-1]) * G.size)
+        parent[0][s] = ROOT
+        dist[0][s] = 0
+        frontier = ([s], [])
+        # Como BFS: una salida cerrada no es alcanzable (no hay búsqueda desde ella)
+        if G.open[t] or s == t:
+            parent[1][t] = ROOT
+            dist[1][t] = 0
+            frontier[1].append(t)
+        meet, best = (s, 0) if s == t else (NONE, -1)
+        while meet == NONE and frontier[0] and frontier[1]:
+            side = 0 if len(frontier[0]) <= len(frontier[1]) else 1
+            par, dst = parent[side], dist[side]
+            other = dist[1 - side]
+            nxt = []
+            for u in frontier[side]:
+                du = dst[u] + 1
+                for v in ind[ptr[u]:ptr[u + 1]]:
+                    if par[v] == NONE:
+                        par[v] = u
+                        dst[v] = du
+                        nxt.append(v)
+                        if other[v] >= 0 and (meet == NONE or du + other[v] < best):
+                            meet, best = v, du + other[v]
+            frontier[side][:] = nxt
+
+        visited = ((np.frombuffer(parent[0], dtype=np.int32) != NONE)
+                   | (np.frombuffer(parent[1], dtype=np.int32) != NONE))
+        path_parent = parent[0]
+        if meet != NONE:
+            # Unir las dos mitades: los padres del lado de la salida se invierten
+            prev, cur = meet, parent[1][meet]
+            while cur != ROOT:
+                path_parent[cur] = prev
+                prev, cur = cur, parent[1][cur]
+        if not self.instrumented:
+            return _graph_result(G, path_parent, t, visited)
+        waiting = visited.copy()
+        waiting[frontier[0] + frontier[1]] = False
+        return self._finish(G, path_parent, t, visited, t0, expanded_mask=waiting,
+                            pushes=int(visited.sum()))
+
+class JumpPointSolver(BaseSolver):
+    """
+    Jump point search para rejillas 4-conexas (A* Manhattan sobre puntos de
+    salto). Orden canónico: vertical antes que horizontal.
+
+    - Un avance horizontal continúa hasta una celda con vecino forzado: un
+      vertical abierto cuyo equivalente en la celda anterior está cerrado.
+    - Un avance vertical se detiene en cualquier celda desde la que un
+      barrido horizontal encuentra un punto de salto (o la salida).
+    - Sucesores: tras un avance vertical, seguir y girar a ambos lados; tras
+      uno horizontal, seguir y los verticales forzados; desde la entrada,
+      las cuatro direcciones.
+
+    Visitadas: todas las celdas recorridas por los barridos. En pasillos
+    estrechos casi todas son puntos de salto; la ganancia está en las
+    zonas abiertas.
+    """
+    name = "Jump Point Search (4-connected)"
+    shortest_paths = True
+    OPPOSITE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+    def solve(self, grid, start, goal):
+        import heapq
+        G = as_graph(grid)
+        step = G.dir_list()  # vecino abierto de i en la dirección k: step[4*i + k]
+        W = G.W
+        s, t = G.id(start), G.id(goal)
+        gr, gc = goal
+        t0 = self._begin(start, goal)
+        seen = G.visited_buffer()  # celdas recorridas por los barridos
+        seen[s] = 1
+
+        def hjump(cur: int, d: int) -> int:
+            back = LEFT if d == RIGHT else RIGHT
+            while True:
+                nxt = step[4 * cur + d]
+                if nxt == NONE:
+                    return NONE
+                cur = nxt
+                seen[cur] = 1
+                if cur == t:
+                    return cur
+                prev = step[4 * cur + back]
+                if (step[4 * cur + UP] != NONE and step[4 * prev + UP] == NONE) or \
+                        (step[4 * cur + DOWN] != NONE and step[4 * prev + DOWN] == NONE):
+                    return cur
+
+        def vjump(cur: int, d: int) -> int:
+            while True:
+                nxt = step[4 * cur + d]
+                if nxt == NONE:
+                    return NONE
+                cur = nxt
+                seen[cur] = 1
+                if cur == t or hjump(cur, LEFT) != NONE or hjump(cur, RIGHT) != NONE:
+                    return cur
+
+        def h(v: int) -> int:
+            r, c = divmod(v, W)
+            return abs(r - gr) + abs(c - gc)
+
+        parent = {s: ROOT}
+        gscore = {s: 0}
+        closed = set()
+        openh = [(h(s), 0, s, -1)]
+        stale = 0
+        pushes = 1
+        while openh:
+            f, g, u, d = heapq.heappop(openh)
+            if u in closed:
+                stale += 1
+                continue
+            closed.add(u)
+            if u == t:
+                break
+            if d == -1:
+                dirs = (UP, DOWN, LEFT, RIGHT)
+            elif d in (UP, DOWN):
+                dirs = (d, LEFT, RIGHT)
+            else:
+                prev = step[4 * u + self.OPPOSITE[d]]
+                dirs = [d] + [k for k in (UP, DOWN)
+                              if step[4 * u + k] != NONE and step[4 * prev + k] == NONE]
+            for k in dirs:
+                v = (vjump if k in (UP, DOWN) else hjump)(u, k)
+                if v == NONE:
+                    continue
+                ng = g + (abs(v - u) // W if k in (UP, DOWN) else abs(v - u))
+                if ng < gscore.get(v, ng + 1):
+                    gscore[v] = ng
+                    parent[v] = u
+                    heapq.heappush(openh, (ng + h(v), ng, v, k))
+                    pushes += 1
+
+        # Camino de celdas: rellenar los tramos rectos entre puntos de salto
+        cell_parent = G.parent_buffer()
+        if t in closed:
+            jumps = [t]
+            while parent[jumps[-1]] != ROOT:
+                jumps.append(parent[jumps[-1]])
+            jumps.reverse()
+            cell_parent[s] = ROOT
+            for a, b in zip(jumps, jumps[1:]):
+                inc = (1 if b > a else -1) * (1 if a // W == b // W else W)
+                for v in range(a + inc, b + inc, inc):
+                    cell_parent[v] = v - inc
+        visited = np.frombuffer(seen, dtype=np.uint8) == 1
+        if not self.instrumented:
+            return _graph_result(G, cell_parent, t, visited)
+        expanded = np.zeros(G.size, dtype=bool)
+        expanded[list(closed)] = True
+        res = self._finish(G, cell_parent, t, visited, t0, expanded_mask=expanded,
+                           pushes=pushes, stale_pops=stale)
+        res.stats["neighbor_checks"] = int(visited.sum())  # celdas barridas
+        return res
 
 
 # ---------------------------------------------------------------------
@@ -284,72 +778,119 @@ class WaterSolver(BaseSolver):
     """
     Solver "agua": prioriza ir más abajo (fila mayor), penaliza subir y
     penaliza levemente el desplazamiento lateral.
+
+    mode="flow" simula en su lugar el llenado del laberinto como autómata
+    celular sobre toda la rejilla (water_flow.py): visitadas = celdas
+    mojadas al llegar el agua a la salida, camino = recorrido hacia atrás
+    por tiempos de mojado. Para muchos laberintos a la vez, usar
+    water_flow.flow_fill directamente.
     """
     name = "Water (gravity-biased best-first)"
-    def __init__(self, gravity_bias: float = 1.0, side_cost: float = 0.1, up_cost: float = 1.0):
+    MODES = ("search", "flow")
+    def __init__(self, gravity_bias: float = 1.0, side_cost: float = 0.1, up_cost: float = 1.0,
+                 mode: str = "search"):
+        if mode not in self.MODES:
+            raise ValueError(f"Modo desconocido: {mode!r} (opciones: {', '.join(self.MODES)})")
         self.gbias = gravity_bias
         self.side_cost = side_cost
         self.up_cost = up_cost
+        self.mode = mode
+        if mode == "flow":
+            self.name = "Water (flow CA)"
 
     def solve(self, grid, start, goal):
+        if self.mode == "flow":
+            return self._solve_flow(grid, start, goal)
         import heapq
-        def h(a: Coord, b: Coord) -> int:
-            return abs(a[0] - b[0]) + abs(a[1] - b[1])
-        def move_penalty(u: Coord, v: Coord) -> float:
-            dr = v[0] - u[0]; dc = v[1] - u[1]
-            if dr > 0 and dc == 0:   # bajar
-                return 0.0
-            if dr == 0 and dc != 0:  # lateral
-                return self.side_cost
-            if dr < 0 and dc == 0:   # subir
-                return self.up_cost
-            return 0.5
-        def priority(v: Coord) -> Tuple[float, float]:
+        G = as_graph(grid)
+        ptr, ind = G.lists()
+        W = G.W
+        s, t = G.id(start), G.id(goal)
+        gr, gc = goal
+        gbias = self.gbias
+        # Penalización de cada movimiento según el desplazamiento de id (v - u)
+        move_penalty = {W: 0.0,              # bajar
+                        -W: self.up_cost,    # subir
+                        1: self.side_cost,   # lateral
+                        -1: self.side_cost}
+        def priority(v: int) -> Tuple[float, float]:
             # prioridad principal: ir "más abajo" -> -row
-            return (-self.gbias * v[0], h(v, goal))
+            r, c = divmod(v, W)
+            return (-gbias * r, abs(r - gr) + abs(c - gc))
 
-        openh: List[Tuple[Tuple[float, float], float, Coord]] = []
-        parent: Dict[Coord, Optional[Coord]] = {start: None}
-        gcost: Dict[Coord, float] = {start: 0.0}
-        visited: Set[Coord] = set()
-        heapq.heappush(openh, (priority(start), 0.0, start))
+        openh: List[Tuple[Tuple[float, float], float, int]] = []
+        parent = G.parent_buffer()
+        parent[s] = ROOT
+        gcost = G.cost_buffer()
+        gcost[s] = 0.0
+        visited = G.visited_buffer()
+        t0 = self._begin(start, goal)
+        stale = 0
+        heapq.heappush(openh, (priority(s), 0.0, s))
 
         while openh:
             pr, g, u = heapq.heappop(openh)
-            if u in visited:
+            if visited[u]:
+                stale += 1
                 continue
-            visited.add(u)
-            if u == goal:
+            visited[u] = 1
+            if u == t:
                 break
-            for v in neighbors4(grid, *u):
-                newc = gcost[u] + 1.0 + move_penalty(u, v)
-                if newc < gcost.get(v, 10**18):
+            gu = gcost[u]
+            for v in ind[ptr[u]:ptr[u + 1]]:
+                newc = gu + 1.0 + move_penalty[v - u]
+                if newc < gcost[v]:
                     gcost[v] = newc
                     parent[v] = u
                     heapq.heappush(openh, (priority(v), newc, v))
 
-        reached = (goal in parent)
-        path: List[Coord] = []
-        if reached:
-            cur = goal
-            while cur is not None:
-                path.append(cur)
-                cur = parent[cur]
-            path.reverse()
-        return SolveResult(path, visited, reached)
+        closed = np.frombuffer(visited, dtype=np.uint8) == 1
+        return self._finish(G, parent, t, closed, t0, expanded_mask=closed,
+                            pushes=int(closed.sum()) + stale + len(openh), stale_pops=stale)
+
+    def _solve_flow(self, grid, start, goal):
+        from water_flow import flow_fill, flow_path
+        G = as_graph(grid)
+        t0 = self._begin(start, goal)
+        res = flow_fill(G.grid, [start], [goal], self.gbias, self.side_cost, self.up_cost)
+        wet_time = res.wet_time[0]
+        parent = G.parent_buffer()
+        cells = [G.id(p) for p in flow_path(wet_time, goal)]
+        parent[G.id(start)] = ROOT
+        for a, b in zip(cells, cells[1:]):
+            parent[b] = a
+        limit = wet_time.max() if not res.reached[0] else res.time_to_exit[0]
+        wetted = ((wet_time >= 0) & (wet_time <= limit)).ravel()
+        return self._finish(G, parent, G.id(goal), wetted, t0, steps=res.steps)
 
 
 # ---------------------------------------------------------------------
 # Evaluación
 # ---------------------------------------------------------------------
 
-def evaluate_solver(grid: np.ndarray, solver: BaseSolver, start: Coord, goal: Coord) -> Dict[str, float]:
+# Parámetros para el "agua"
+WATER_PARAMS = dict(gravity_bias=1.0, side_cost=0.1, up_cost=1.0)
+
+def make_solvers(seed: int) -> List[BaseSolver]:
+    """Solvers de la comparación; seed solo afecta a la caminata aleatoria."""
+    return [
+        WaterSolver(**WATER_PARAMS),
+        WallFollower(left=True),
+        WallFollower(left=False),
+        BFSSolver(),
+        AStarSolver(),
+        BidirectionalBFSSolver(),
+        JumpPointSolver(),
+        RandomWalkSolver(seed=seed, max_steps=100000),
+    ]
+
+def evaluate_solver(grid, solver: BaseSolver, start: Coord, goal: Coord) -> Dict[str, float]:
     res = solver.solve(grid, start, goal)
-    open_cells = int(grid.sum())
-    visited = len(res.visited)
+    open_cells = grid.open_cells if isinstance(grid, MazeGraph) else int(grid.sum())
+    visited = res.visited_count
     visited_ratio = visited / max(open_cells, 1)
     res.visited_ratio = visited_ratio
-    path_len = len(res.path) if res.reached else math.inf
+    path_len = res.path_length if res.reached else math.inf
     return {
         "name": solver.name,
         "reached": 1.0 if res.reached else 0.0,
@@ -358,6 +899,7 @@ def evaluate_solver(grid: np.ndarray, solver: BaseSolver, start: Coord, goal: Co
         "visited_ratio": visited_ratio,
         "efficiency": 1.0 - visited_ratio,
         "path_length": path_len,
+        **{k: v for k, v in (res.stats or {}).items() if k != "solver"},
     }
 
 
@@ -366,46 +908,128 @@ def evaluate_solver(grid: np.ndarray, solver: BaseSolver, start: Coord, goal: Co
 # ---------------------------------------------------------------------
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compara solvers de laberintos por tamaño.")
+    parser.add_argument("--store", help="leer los laberintos de este MazeStore en lugar de generarlos")
+    parser.add_argument("--algorithm", help="filtro de algoritmo para --store")
+    parser.add_argument("--save-store", help="guardar los laberintos generados en este MazeStore")
+    parser.add_argument("--trace", help="instrumentar los solvers y añadir sus eventos (JSON) a este archivo")
+    parser.add_argument("--wavefront", action="store_true",
+                        help="resolver BFS de todas las semillas de cada tamaño en un solo lote (wavefront.py)")
+    parser.add_argument("--flow", action="store_true",
+                        help="añadir el autómata de agua (water_flow.py), en un lote por tamaño")
+    parser.add_argument("--walkers", type=int, default=0,
+                        help="añadir N caminatas aleatorias vectorizadas por laberinto "
+                             "(distribución del tiempo de llegada y cobertura)")
+    args = parser.parse_args()
+
     # Rango de tamaños: desde 10x10 (ajustado a 11x11) en pasos de 10
     sizes_raw = list(range(10, 62, 5))  # pasos de 2 desde 10 hasta 60 (incluye 60)
     sizes = [ensure_odd(n) for n in sizes_raw]
     seeds = [1, 7, 11, 23, 37]  # promediaremos sobre estas semillas
 
-    # Parámetros para el "agua"
-    water_params = dict(gravity_bias=1.0, side_cost=0.1, up_cost=1.0)
-
-    # Lista de solvers
-    def make_solvers(seed: int) -> List[BaseSolver]:
-        return [
-            WaterSolver(**water_params),
-            WallFollower(left=True),
-            WallFollower(left=False),
-            BFSSolver(),
-            AStarSolver(),
-            RandomWalkSolver(seed=seed, max_steps=100000),
-        ]
+    # Casos a evaluar por tamaño: (semilla, grid, start, goal)
+    cases: Dict[int, List[Tuple[int, np.ndarray, Coord, Coord]]] = {}
+    if args.store:
+        from maze_store import MazeStore
+        filters = {"algorithm": args.algorithm} if args.algorithm else {}
+        for rec, grid, start, goal in mazes_from_store(MazeStore(args.store, create=False), **filters):
+            sd = rec["seed"] if rec["seed"] is not None else rec["id"]
+            cases.setdefault(grid.shape[0], []).append((sd, grid, start, goal))
+        sizes = sorted(cases)
+    else:
+        save_store = None
+        if args.save_store:
+            from maze_store import MazeStore
+            save_store = MazeStore(args.save_store)
+        for N in sizes:
+            for sd in seeds:
+                grid = generate_maze(N, N, seed=sd)
+                if save_store is not None:
+                    save_to_store(save_store, grid, sd)
+                cases.setdefault(N, []).append((sd, grid, *find_entrance_exit(grid)))
 
     # Recopilar eficiencia promedio por tamaño y por algoritmo
-    alg_names = None
     efficiencies: Dict[str, List[float]] = {}
 
     print("name\tsize\treached\tvisited\topen_cells\tvisited_ratio\tefficiency\tpath_length")
 
+    def wavefront_metrics(batch) -> List[Dict[str, float]]:
+        """Métricas de BFS para un lote de casos del mismo tamaño, en una pasada."""
+        from wavefront import wavefront_bfs
+        res = wavefront_bfs(np.stack([c[1] for c in batch]),
+                            np.array([c[2] for c in batch]), np.array([c[3] for c in batch]),
+                            full=False)
+        out = []
+        for k, (sd, grid, start, goal) in enumerate(batch):
+            open_cells = int(grid.sum())
+            visited_ratio = int(res.visited[k]) / max(open_cells, 1)
+            out.append({
+                "name": "BFS (wavefront batch)",
+                "reached": 1.0 if res.reached[k] else 0.0,
+                "visited": int(res.visited[k]),
+                "open_cells": open_cells,
+                "visited_ratio": visited_ratio,
+                "efficiency": 1.0 - visited_ratio,
+                "path_length": int(res.path_length[k]) if res.reached[k] else math.inf,
+            })
+        return out
+
+    def flow_metrics(batch) -> List[Dict[str, float]]:
+        """Métricas del autómata de agua para un lote de casos del mismo tamaño."""
+        from water_flow import flow_fill, flow_path
+        res = flow_fill(np.stack([c[1] for c in batch]),
+                        np.array([c[2] for c in batch]), np.array([c[3] for c in batch]),
+                        **WATER_PARAMS)
+        return [{
+            "name": "Water (flow CA batch)",
+            "reached": 1.0 if res.reached[k] else 0.0,
+            "visited": int(res.wetted[k]),
+            "open_cells": int(res.open_cells[k]),
+            "visited_ratio": float(res.wetted_ratio[k]),
+            "efficiency": float(res.efficiency[k]),
+            "path_length": len(flow_path(res.wet_time[k], goal)) if res.reached[k] else math.inf,
+        } for k, (sd, grid, start, goal) in enumerate(batch)]
+
+    def batch_by_shape(cases_n, metrics_fn) -> Dict[int, Dict[str, float]]:
+        # Agrupar por forma: en un MazeStore puede haber varias con N filas
+        shapes: Dict[Tuple[int, int], List[int]] = {}
+        for k, case in enumerate(cases_n):
+            shapes.setdefault(case[1].shape, []).append(k)
+        out: Dict[int, Dict[str, float]] = {}
+        for ks in shapes.values():
+            out.update(zip(ks, metrics_fn([cases_n[k] for k in ks])))
+        return out
+
     for N in sizes:
         eff_accum: Dict[str, List[float]] = {}
-        for sd in seeds:
-            grid = generate_maze(N, N, seed=sd)
-            start, goal = find_entrance_exit(grid)
+        batched = batch_by_shape(cases[N], wavefront_metrics) if args.wavefront else {}
+        flowed = batch_by_shape(cases[N], flow_metrics) if args.flow else {}
+        for k, (sd, grid, start, goal) in enumerate(cases[N]):
+            rows = []
             for solver in make_solvers(sd):
-                metrics = evaluate_solver(grid, solver, start, goal)
-                if alg_names is None:
-                    alg_names = []
-                if solver.name not in eff_accum:
-                    eff_accum[solver.name] = []
-                eff_accum[solver.name].append(metrics["efficiency"])
+                if args.trace:
+                    solver.instrument(trace=args.trace)
+                if args.wavefront and isinstance(solver, BFSSolver):
+                    rows.append(batched[k])
+                else:
+                    rows.append(evaluate_solver(grid, solver, start, goal))
+            if args.flow:
+                rows.append(flowed[k])
+            if args.walkers:
+                walk = RandomWalkSolver(seed=sd, max_steps=100000).simulate(
+                    grid, start, goal, walkers=args.walkers).summary()
+                print(f"# Random Walk ({args.walkers} walkers)\t{N}x{grid.shape[1]}\t"
+                      + "\t".join(f"{key}={val:.3g}" for key, val in walk.items()))
+                eff_accum.setdefault(f"Random Walk ({args.walkers} walkers)", []).append(
+                    1.0 - walk["coverage_mean"])
+            for metrics in rows:
+                if metrics["name"] not in eff_accum:
+                    eff_accum[metrics["name"]] = []
+                eff_accum[metrics["name"]].append(metrics["efficiency"])
                 # Línea detallada (una por semilla) para referencia
                 print(
-                    f"{solver.name}\t{N}x{N}\t{int(metrics['reached'])}\t"
+                    f"{metrics['name']}\t{N}x{grid.shape[1]}\t{int(metrics['reached'])}\t"
                     f"{metrics['visited']}\t{metrics['open_cells']}\t"
                     f"{metrics['visited_ratio']:.3f}\t{metrics['efficiency']:.3f}\t"
                     f"{metrics['path_length'] if math.isfinite(metrics['path_length']) else 'inf'}"
@@ -68,7 +68,7 @@ if (require.main === module) {
         parseInt(endSide),
         parseFloat(endCoord)
     );
-    console.log(result);
+    console.log(JSON.stringify(result)); // console.log abrevia arreglos de más de 100 elementos
 } else {
     module.exports = aldousBroderMaze;
 }
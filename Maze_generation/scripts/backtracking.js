@@ -71,7 +71,7 @@ if (require.main === module) {
         parseInt(endSide),
         parseFloat(endRel)
     );
-    console.log(result);
+    console.log(JSON.stringify(result)); // console.log abrevia arreglos de más de 100 elementos
 } else {
     module.exports = backtrackingMaze;
 }
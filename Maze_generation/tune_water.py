@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+tune_water.py
+
+Búsqueda de parámetros de WaterSolver (gravity_bias, side_cost, up_cost)
+sobre un corpus de laberintos con semilla, en un pool de procesos y con
+evaluaciones memorizadas en disco.
+
+Candidatos: rejilla (producto de los valores dados) o muestreo aleatorio
+(valores en [mín, máx]). Se filtran por successive halving: todos se
+evalúan sobre pocos laberintos, pasa 1/eta de ellos a la ronda siguiente y
+cada ronda multiplica por eta los laberintos, hasta el corpus completo. Los
+laberintos de cada ronda son un prefijo del corpus barajado: lo evaluado en
+una ronda se reutiliza en la siguiente.
+
+Cada evaluación (parámetros, hash del laberinto) se añade a un archivo de
+registros fijos (EvalMemo): al relanzar o refinar la búsqueda solo se
+ejecuta lo que falta. Cada tarea del pool es un laberinto con la lista de
+parámetros pendientes: el MazeGraph se construye una sola vez.
+
+En un laberinto perfecto el camino es único (longitud relativa siempre 1)
+y el orden de expansión del modo "search" solo depende del signo de
+gravity_bias; braid abre muros al azar para crear ciclos y que los costes
+cambien el camino. Con --mode flow se ajusta el autómata de agua
+(water_flow.py), donde los tres parámetros cambian la velocidad de avance.
+
+Objetivos por candidato: eficiencia media (1 - visitadas / abiertas, como
+evaluate_solver) y longitud relativa media del camino (longitud / la de
+BFSSolver). Para pasar de ronda se ordena por capas de Pareto (la frontera,
+después la frontera del resto...) y dentro de cada capa por eficiencia. La
+salida es la frontera de Pareto de los candidatos de la última ronda.
+
+Uso:
+    python tune_water.py --sizes 51 101 201 --seeds 10 --braid 0.02
+    python tune_water.py --search random --samples 200 --gravity-bias 0 4 --plot pareto.png
+"""
+
+from __future__ import annotations
+import argparse
+import itertools
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from incremental_solver import random_edits
+from maze_graph import MazeGraph
+from maze_store import content_hash
+from maze_water_solver import (BFSSolver, WATER_PARAMS, WaterSolver, ensure_odd, evaluate_solver,
+                               find_entrance_exit, generate_maze, mazes_from_store)
+
+PARAM_NAMES = ("gravity_bias", "side_cost", "up_cost")
+
+# Valores por defecto: rejilla (--search grid) o rango [mín, máx] (--search random)
+GRID_SPACE = {
+    "gravity_bias": [0.0, 0.5, 1.0, 2.0, 4.0],
+    "side_cost": [0.0, 0.05, 0.1, 0.5, 1.0],
+    "up_cost": [0.0, 0.5, 1.0, 2.0, 4.0],
+}
+RANDOM_SPACE = {
+    "gravity_bias": [0.0, 4.0],
+    "side_cost": [0.0, 1.0],
+    "up_cost": [0.0, 4.0],
+}
+
+MEMO_DTYPE = np.dtype([
+    ("maze", "S40"),          # content_hash del laberinto
+    ("gravity_bias", "<f8"),
+    ("side_cost", "<f8"),
+    ("up_cost", "<f8"),
+    ("reached", "u1"),
+    ("visited", "<i8"),
+    ("efficiency", "<f8"),
+    ("path_length", "<f8"),   # inf si no se alcanza la salida
+    ("seconds", "<f8"),
+])
+
+Params = Tuple[float, float, float]  # (gravity_bias, side_cost, up_cost)
+Case = Tuple[str, np.ndarray, Tuple[int, int], Tuple[int, int], int]  # (hash, grid, start, goal, longitud BFS)
+
+
+def canonical(params: Sequence[float]) -> Params:
+    """Parámetros redondeados: la misma clave para 0.1 y 0.1000000001."""
+    return tuple(round(float(p), 6) for p in params)
+
+
+class EvalMemo:
+    """
+    Evaluaciones (laberinto, parámetros) en un archivo de registros
+    MEMO_DTYPE, solo de añadir. Un registro incompleto al final (escritura
+    interrumpida) se descarta al abrir.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.rows: Dict[Tuple[str, Params], np.void] = {}
+        if os.path.exists(path):
+            n = os.path.getsize(path) // MEMO_DTYPE.itemsize
+            table = np.fromfile(path, dtype=MEMO_DTYPE, count=n)
+            for row in table:
+                self.rows[self._key(row)] = row
+
+    @staticmethod
+    def _key(row) -> Tuple[str, Params]:
+        return row["maze"].decode(), canonical([row[name] for name in PARAM_NAMES])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get(self, maze: str, params: Params):
+        return self.rows.get((maze, params))
+
+    def append(self, rows: Sequence[tuple]) -> None:
+        if not rows:
+            return
+        table = np.array(rows, dtype=MEMO_DTYPE)
+        with open(self.path, "r+b" if os.path.exists(self.path) else "wb") as f:
+            # Solo registros completos: el archivo puede tener claves repetidas
+            # (otro proceso, o la misma evaluación escrita dos veces)
+            f.truncate(os.path.getsize(self.path) // MEMO_DTYPE.itemsize * MEMO_DTYPE.itemsize)
+            f.seek(0, os.SEEK_END)
+            table.tofile(f)
+        for row in table:
+            self.rows[self._key(row)] = row
+
+
+# ---------------------------------------------------------------------
+# Corpus y candidatos
+# ---------------------------------------------------------------------
+
+def build_corpus(sizes: Sequence[int] = (51, 101, 201), seeds: Sequence[int] = range(10),
+                 store: Optional[str] = None, algorithm: Optional[str] = None,
+                 braid: float = 0.0) -> List[Case]:
+    """
+    Laberintos de generate_maze (tamaños × semillas) o de un MazeStore, con
+    su hash y la longitud del camino de BFSSolver (referencia de longitud).
+    braid: fracción de las celdas abiertas que se añaden abriendo muros
+    entre espacios (semilla: posición del laberinto en el corpus).
+    """
+    if store:
+        from maze_store import MazeStore
+        filters = {"algorithm": algorithm} if algorithm else {}
+        raw = [(grid, start, goal)
+               for _, grid, start, goal in mazes_from_store(MazeStore(store, create=False), **filters)]
+    else:
+        raw = []
+        for N in sizes:
+            for sd in seeds:
+                grid = generate_maze(ensure_odd(N), ensure_odd(N), seed=sd)
+                raw.append((grid, *find_entrance_exit(grid)))
+    corpus = []
+    for k, (grid, start, goal) in enumerate(raw):
+        if braid:
+            grid = grid.copy()
+            n = int(braid * grid.sum())
+            for (r, c), value in random_edits(grid, n, np.random.default_rng(k), "open"):
+                grid[r, c] = value
+        ref = BFSSolver().solve(grid, start, goal)
+        if ref.reached:
+            corpus.append((content_hash(grid), grid, tuple(start), tuple(goal), ref.path_length))
+    return corpus
+
+def grid_candidates(space: Dict[str, Sequence[float]]) -> List[Params]:
+    """Producto de los valores de cada parámetro (sin repetidos)."""
+    return list(dict.fromkeys(canonical(p) for p in itertools.product(*(space[name] for name in PARAM_NAMES))))
+
+def random_candidates(space: Dict[str, Sequence[float]], n: int, seed: int = 0) -> List[Params]:
+    """n candidatos uniformes en [mín, máx] de cada parámetro."""
+    rng = np.random.default_rng(seed)
+    cols = [rng.uniform(min(space[name]), max(space[name]), size=n) for name in PARAM_NAMES]
+    return list(dict.fromkeys(canonical(p) for p in zip(*cols)))
+
+
+# ---------------------------------------------------------------------
+# Evaluación en paralelo
+# ---------------------------------------------------------------------
+
+def run_case(grid: np.ndarray, start, goal, params_list: Sequence[Params],
+             mode: str = "search") -> List[tuple]:
+    """Evalúa WaterSolver con cada juego de parámetros sobre un laberinto."""
+    G = MazeGraph(grid)
+    rows = []
+    for params in params_list:
+        t0 = time.perf_counter()
+        m = evaluate_solver(G, WaterSolver(**dict(zip(PARAM_NAMES, params)), mode=mode), start, goal)
+        rows.append((*params, int(m["reached"]), m["visited"], m["efficiency"],
+                     m["path_length"], time.perf_counter() - t0))
+    return rows
+
+def evaluate(candidates: Sequence[Params], cases: Sequence[Case], memo: EvalMemo,
+             workers: Optional[int] = None, mode: str = "search") -> int:
+    """Evalúa lo que falta en memo de candidates × cases; devuelve cuántas evaluaciones se hicieron."""
+    tasks = []
+    for key, grid, start, goal, _ in cases:
+        missing = [p for p in candidates if memo.get(key, p) is None]
+        if missing:
+            tasks.append((key, grid, start, goal, missing))
+    if not tasks:
+        return 0
+    total = sum(len(t[4]) for t in tasks)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = {ex.submit(run_case, grid, start, goal, missing, mode): key
+                   for key, grid, start, goal, missing in tasks}
+        for fut in as_completed(futures):
+            key = futures[fut]
+            rows = [(key.encode(), *row) for row in fut.result()]
+            memo.append(rows)
+            done += len(rows)
+            print(f"# {done}/{total} evaluaciones", file=sys.stderr, flush=True)
+    return done
+
+def score(candidates: Sequence[Params], cases: Sequence[Case], memo: EvalMemo) -> np.ndarray:
+    """
+    (len(candidates), 2): eficiencia media y longitud relativa media
+    (longitud / BFS, inf si algún laberinto no se resuelve).
+    """
+    out = np.zeros((len(candidates), 2))
+    for i, p in enumerate(candidates):
+        rows = [memo.get(key, p) for key, *_ in cases]
+        out[i, 0] = np.mean([row["efficiency"] for row in rows])
+        out[i, 1] = np.mean([row["path_length"] / case[4] for row, case in zip(rows, cases)])
+    return out
+
+
+# ---------------------------------------------------------------------
+# Pareto y successive halving
+# ---------------------------------------------------------------------
+
+def pareto_front(scores: np.ndarray) -> np.ndarray:
+    """Índices no dominados (eficiencia máxima, longitud relativa mínima)."""
+    eff, length = scores[:, 0], scores[:, 1]
+    dominated = ((eff[None, :] >= eff[:, None]) & (length[None, :] <= length[:, None])
+                 & ((eff[None, :] > eff[:, None]) | (length[None, :] < length[:, None]))).any(axis=1)
+    return np.flatnonzero(~dominated)
+
+def pareto_rank(scores: np.ndarray) -> np.ndarray:
+    """Orden por capas de Pareto y, dentro de cada capa, por eficiencia descendente."""
+    remaining = np.arange(len(scores))
+    order = []
+    while remaining.size:
+        front = remaining[pareto_front(scores[remaining])]
+        order.extend(front[np.argsort(-scores[front, 0], kind="stable")])
+        remaining = np.setdiff1d(remaining, front)
+    return np.array(order, dtype=np.int64)
+
+def successive_halving(candidates: Sequence[Params], corpus: Sequence[Case], memo: EvalMemo,
+                       eta: int = 3, min_mazes: int = 3, seed: int = 0,
+                       workers: Optional[int] = None, mode: str = "search") -> List[Dict[str, object]]:
+    """
+    Rondas de successive halving. Devuelve, por ronda, los candidatos
+    evaluados, sus objetivos y el número de laberintos usados.
+    """
+    order = np.random.default_rng(seed).permutation(len(corpus))
+    corpus = [corpus[k] for k in order]
+    rounds = 0
+    while (len(candidates) > eta ** rounds and len(corpus) >= min_mazes * eta ** (rounds + 1)):
+        rounds += 1
+    alive = list(candidates)
+    history = []
+    for r in range(rounds + 1):
+        cases = corpus[:max(1, math.ceil(len(corpus) / eta ** (rounds - r)))]
+        t0 = time.perf_counter()
+        ran = evaluate(alive, cases, memo, workers, mode)
+        scores = score(alive, cases, memo)
+        history.append({"candidates": alive, "scores": scores, "mazes": len(cases)})
+        print(f"# ronda {r}: {len(alive)} candidatos x {len(cases)} laberintos, "
+              f"{ran} evaluaciones nuevas, {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+        if r < rounds:
+            keep = max(1, math.ceil(len(alive) / eta))
+            alive = [alive[i] for i in pareto_rank(scores)[:keep]]
+    return history
+
+
+# ---------------------------------------------------------------------
+# Salida
+# ---------------------------------------------------------------------
+
+def print_front(candidates: Sequence[Params], scores: np.ndarray) -> None:
+    """
+    Frontera de Pareto ordenada por longitud relativa. Los candidatos con
+    los mismos objetivos se agrupan: se muestra el primero y cuántos hay.
+    """
+    front = pareto_front(scores)
+    front = front[np.argsort(scores[front, 1], kind="stable")]
+    print("\t".join(PARAM_NAMES) + "\tefficiency\tpath_ratio\tties")
+    groups: Dict[Tuple[float, float], List[int]] = {}
+    for i in front:
+        groups.setdefault(tuple(scores[i]), []).append(i)
+    for (eff, ratio), members in groups.items():
+        print("\t".join(f"{v:g}" for v in candidates[members[0]])
+              + f"\t{eff:.4f}\t{ratio:.4f}\t{len(members)}")
+
+def plot_front(candidates: Sequence[Params], scores: np.ndarray, out: str = None) -> None:
+    """Eficiencia vs longitud relativa de todos los candidatos, frontera destacada."""
+    import matplotlib
+    if out:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    front = pareto_front(scores)
+    front = front[np.argsort(scores[front, 1], kind="stable")]
+    plt.figure(figsize=(8, 5))
+    plt.scatter(scores[:, 1], scores[:, 0], alpha=0.4, label="candidatos")
+    plt.plot(scores[front, 1], scores[front, 0], "r-x", label="frontera de Pareto")
+    default = canonical([WATER_PARAMS[name] for name in PARAM_NAMES])
+    if default in candidates:
+        i = list(candidates).index(default)
+        plt.scatter(scores[i, 1], scores[i, 0], marker="*", s=150, c="k", label="WATER_PARAMS")
+    plt.xlabel("Longitud relativa del camino (vs BFS)")
+    plt.ylabel("Eficiencia")
+    plt.title("WaterSolver: eficiencia vs longitud")
+    plt.grid(True, linestyle="--", alpha=0.7)
+    plt.legend()
+    plt.tight_layout()
+    if out:
+        plt.savefig(out, dpi=150)
+    else:
+        plt.show()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[51, 101, 201])
+    parser.add_argument("--seeds", type=int, default=10, help="semillas 0..N-1")
+    parser.add_argument("--store", help="usar los laberintos de este MazeStore en lugar de generarlos")
+    parser.add_argument("--algorithm", help="filtro de algoritmo para --store")
+    parser.add_argument("--braid", type=float, default=0.0,
+                        help="fracción de celdas abiertas añadidas abriendo muros (ciclos)")
+    parser.add_argument("--mode", choices=WaterSolver.MODES, default="search")
+    parser.add_argument("--search", choices=("grid", "random"), default="grid")
+    parser.add_argument("--samples", type=int, default=100, help="candidatos de --search random")
+    for name in PARAM_NAMES:
+        parser.add_argument("--" + name.replace("_", "-"), type=float, nargs="+",
+                            help="valores (grid) o mín máx (random)")
+    parser.add_argument("--eta", type=int, default=3, help="factor de successive halving")
+    parser.add_argument("--min-mazes", type=int, default=3, help="laberintos de la primera ronda (mínimo)")
+    parser.add_argument("--seed", type=int, default=0, help="semilla del muestreo y del orden del corpus")
+    parser.add_argument("--memo", help="archivo de evaluaciones (por defecto output/tune_water/<mode>.bin)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--plot", nargs="?", const="", default=None,
+                        help="graficar la última ronda (a este archivo si se indica)")
+    args = parser.parse_args()
+
+    base = GRID_SPACE if args.search == "grid" else RANDOM_SPACE
+    space = {name: getattr(args, name) or base[name] for name in PARAM_NAMES}
+    if args.search == "grid":
+        candidates = grid_candidates(space)
+    else:
+        candidates = random_candidates(space, args.samples, args.seed)
+
+    corpus = build_corpus(args.sizes, range(args.seeds), args.store, args.algorithm, args.braid)
+    memo = EvalMemo(args.memo or os.path.join("output", "tune_water", f"{args.mode}.bin"))
+    print(f"# {len(candidates)} candidatos, {len(corpus)} laberintos, "
+          f"{len(memo)} evaluaciones memorizadas", file=sys.stderr)
+    history = successive_halving(candidates, corpus, memo, args.eta, args.min_mazes,
+                                 args.seed, args.workers, args.mode)
+    last = history[-1]
+    print_front(last["candidates"], last["scores"])
+    if args.plot is not None:
+        plot_front(last["candidates"], last["scores"], args.plot or None)
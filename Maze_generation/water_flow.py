@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+water_flow.py
+
+Simulación de agua como autómata celular sobre la rejilla completa, para
+lotes de laberintos del mismo tamaño (1=espacio, 0=pared).
+
+Cada celda seca acumula "carga" de sus vecinas mojadas en cada paso y se
+moja al llegar a 1. La carga que aporta cada vecina depende de la
+dirección, con los mismos parámetros que WaterSolver:
+
+    desde arriba (caer)      1
+    desde un lado            1 / (1 + side_cost), solo si la vecina tiene
+                             apoyo (pared o agua debajo): el agua no se
+                             extiende en el aire, cae
+    desde abajo (subir)      1 / (1 + up_cost + gravity_bias)
+
+Todo el lote avanza a la vez con desplazamientos de arrays. La simulación
+termina cuando todas las salidas están mojadas, cuando ya no queda ninguna
+celda seca que reciba agua, o tras max_steps pasos.
+
+Es un modelo barato para descartar laberintos antes de la simulación de
+fluidos en GPU, no una simulación física (no conserva masa).
+"""
+
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+
+
+class FlowResult:
+    """
+    Resultado de flow_fill para un lote de B laberintos.
+
+    wet_time      int32 (B, H, W): paso en que se mojó cada celda, -1 seca
+    reached       bool (B,): la salida llegó a mojarse
+    time_to_exit  int (B,): paso en que se mojó la salida, -1 si no
+    wetted        int (B,): celdas mojadas al llegar a la salida (o al
+                  terminar, si no se llegó); equivale a "visited"
+    open_cells    int (B,)
+    wetted_ratio, efficiency: como visited_ratio / efficiency de
+                  evaluate_solver
+    steps         pasos simulados
+    """
+    def __init__(self, wet_time: np.ndarray, reached: np.ndarray, time_to_exit: np.ndarray,
+                 wetted: np.ndarray, open_cells: np.ndarray, steps: int):
+        self.wet_time = wet_time
+        self.reached = reached
+        self.time_to_exit = time_to_exit
+        self.wetted = wetted
+        self.open_cells = open_cells
+        self.wetted_ratio = wetted / np.maximum(open_cells, 1)
+        self.efficiency = 1.0 - self.wetted_ratio
+        self.steps = steps
+
+
+def flow_rates(gravity_bias: float = 1.0, side_cost: float = 0.1, up_cost: float = 1.0):
+    """Carga por paso que aporta una vecina mojada: (arriba, lado, abajo)."""
+    return 1.0, 1.0 / (1.0 + side_cost), 1.0 / (1.0 + up_cost + gravity_bias)
+
+
+def flow_fill(grids: np.ndarray, starts: np.ndarray, goals: Optional[np.ndarray] = None,
+              gravity_bias: float = 1.0, side_cost: float = 0.1, up_cost: float = 1.0,
+              max_steps: Optional[int] = None) -> FlowResult:
+    """
+    Simula el agua desde las entradas de un lote de laberintos.
+
+    grids: (B, H, W) o (H, W); starts, goals: (B, 2) celdas (fila, columna).
+    Sin goals se simula hasta que el agua deja de avanzar.
+
+    En cada paso, las vecinas mojadas de cada celda se codifican en 4 bits
+    (arriba, abajo, izquierda apoyada, derecha apoyada) y la carga se lee de
+    una tabla de 16 valores. Los laberintos que terminan (salida mojada o
+    agua detenida) se retiran del lote para no seguir calculándolos.
+    """
+    grids = np.asarray(grids)
+    if grids.ndim == 2:
+        grids = grids[None]
+    B, H, W = grids.shape
+    starts = np.asarray(starts, dtype=np.int64).reshape(B, 2)
+    if goals is not None:
+        goals = np.asarray(goals, dtype=np.int64).reshape(B, 2)
+    if max_steps is None:
+        max_steps = 4 * H * W
+    down_rate, side_rate, up_rate = flow_rates(gravity_bias, side_cost, up_cost)
+    code_bits = np.arange(16)
+    table = (down_rate * (code_bits & 1) + up_rate * (code_bits >> 1 & 1)
+             + side_rate * ((code_bits >> 2 & 1) + (code_bits >> 3 & 1))).astype(np.float32)
+
+    # Estado del lote activo. wet/wall con borde de pared (vecinos = cortes
+    # fijos); el resto solo sobre las celdas interiores.
+    wall = np.ones((B, H + 2, W + 2), dtype=np.uint8)
+    wall[:, 1:-1, 1:-1] = grids != 1
+    wet = np.zeros_like(wall)
+    bi = np.arange(B)
+    wet[bi, starts[:, 0] + 1, starts[:, 1] + 1] = 1
+    dry = (1 - wall[:, 1:-1, 1:-1]) & (1 - wet[:, 1:-1, 1:-1])
+    load = np.zeros((B, H, W), dtype=np.float32)
+    times = np.where(wet[:, 1:-1, 1:-1] == 1, 0, -1).astype(np.int32)
+    active = bi  # índice original de cada fila del lote activo
+
+    wet_time = np.full((B, H, W), -1, dtype=np.int32)
+    open_cells = (grids == 1).sum(axis=(1, 2))
+
+    def retire(keep: np.ndarray):
+        nonlocal wall, wet, dry, load, times, active
+        wet_time[active[~keep]] = times[~keep]
+        wall, wet, dry, load, times, active = (
+            wall[keep], wet[keep], dry[keep], load[keep], times[keep], active[keep])
+
+    step = 0
+    while active.size and step < max_steps:
+        if goals is not None:
+            g = goals[active]
+            finished = wet[np.arange(active.size), g[:, 0] + 1, g[:, 1] + 1] == 1
+            if finished.any():
+                retire(~finished)
+                if not active.size:
+                    break
+        # Una vecina lateral solo aporta si está apoyada (pared o agua debajo)
+        sup = wet[:, 1:-1, :] & (wall[:, 2:, :] | wet[:, 2:, :])
+        code = (wet[:, :-2, 1:-1] | (wet[:, 2:, 1:-1] << 1)
+                | (sup[:, :, :-2] << 2) | (sup[:, :, 2:] << 3))
+        code *= dry
+        if step % 32 == 0:
+            moving = code.any(axis=(1, 2))
+            if not moving.all():
+                retire(moving)
+                code = code[moving]
+                if not active.size:
+                    break
+        step += 1
+        load += table[code]
+        newly = (load >= 1.0) & (code > 0)
+        wet[:, 1:-1, 1:-1] |= newly
+        dry &= ~newly
+        times[newly] = step
+    if active.size:
+        retire(np.zeros(active.size, dtype=bool))
+
+    if goals is None:
+        reached = np.zeros(B, dtype=bool)
+        time_to_exit = np.full(B, -1)
+        wetted = (wet_time >= 0).sum(axis=(1, 2))
+    else:
+        time_to_exit = wet_time[bi, goals[:, 0], goals[:, 1]].astype(np.int64)
+        reached = time_to_exit >= 0
+        limit = np.where(reached, time_to_exit, np.iinfo(np.int32).max)
+        wetted = ((wet_time >= 0) & (wet_time <= limit[:, None, None])).sum(axis=(1, 2))
+    return FlowResult(wet_time, reached, time_to_exit, wetted, open_cells, step)
+
+
+def flow_path(wet_time: np.ndarray, goal) -> list:
+    """
+    Camino de la entrada a goal siguiendo los tiempos de mojado hacia atrás:
+    desde cada celda, la vecina mojada antes (la de menor tiempo). Vacío si
+    goal está seca.
+    """
+    H, W = wet_time.shape
+    r, c = goal
+    if wet_time[r, c] < 0:
+        return []
+    path = [(r, c)]
+    while wet_time[r, c] > 0:
+        best = None
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < H and 0 <= nc < W and 0 <= wet_time[nr, nc] < wet_time[r, c]:
+                if best is None or wet_time[nr, nc] < wet_time[best]:
+                    best = (nr, nc)
+        r, c = best
+        path.append((r, c))
+    path.reverse()
+    return path
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+wavefront.py
+
+BFS por frentes de onda sobre lotes de laberintos del mismo tamaño.
+
+En lugar de expandir una celda por iteración (BFSSolver), se avanza el
+frente completo de todos los laberintos a la vez: una iteración = un nivel
+de distancia en todo el lote.
+
+El lote se guarda plano, con un borde de pared alrededor de cada laberinto,
+y el frente es un array de ids planos. Los vecinos de todo el frente son
+cuatro desplazamientos del array (±1, ±ancho) que no necesitan comprobar
+límites gracias al borde, y una máscara de celdas no visitadas los filtra.
+Así el coste de cada nivel es proporcional al tamaño del frente, que en un
+laberinto es muy delgado, y no al del lote completo.
+
+Convención de las matrices: 1=espacio, 0=pared (la de maze_water_solver).
+"""
+
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+
+
+class WavefrontResult:
+    """
+    Resultado de wavefront_bfs para un lote de B laberintos.
+
+    dist        int32 (B, H, W): pasos desde la entrada, -1 si no se alcanza
+    reached     bool (B,): la salida es alcanzable
+    path_length float (B,): celdas del camino más corto (como len(path) en
+                BFSSolver), inf si no se alcanza
+    settled     int (B,): celdas a distancia <= la de la salida (todas las
+                alcanzadas si no hay salida); cota inferior de las
+                visitadas por BFSSolver, que además descubre parte del
+                nivel siguiente
+    visited     int (B,): celdas descubiertas por BFSSolver al sacar la
+                salida de la cola (su visited_count): settled más las del
+                nivel siguiente descubiertas por las celdas que van antes
+                que la salida en la cola. Sin goals, igual que settled.
+    """
+    def __init__(self, dist: np.ndarray, reached: np.ndarray,
+                 path_length: np.ndarray, settled: np.ndarray,
+                 visited: Optional[np.ndarray] = None):
+        self.dist = dist
+        self.reached = reached
+        self.path_length = path_length
+        self.settled = settled
+        self.visited = settled if visited is None else visited
+
+
+def wavefront_bfs(grids: np.ndarray, starts: np.ndarray, goals: Optional[np.ndarray] = None,
+                  full: bool = True) -> WavefrontResult:
+    """
+    BFS simultáneo sobre un lote de laberintos.
+
+    Parámetros
+    ----------
+    grids : array (B, H, W) o (H, W)
+        Laberintos apilados (1=espacio)
+    starts, goals : array (B, 2)
+        Celdas (fila, columna) de entrada y salida de cada laberinto
+    full : bool
+        True: calcula el campo de distancias completo. False: cada
+        laberinto deja de expandirse al alcanzar su salida (el campo queda
+        parcial, pero reached/path_length/settled no cambian).
+    """
+    grids = np.asarray(grids)
+    if grids.ndim == 2:
+        grids = grids[None]
+    B, H, W = grids.shape
+    Hp, Wp = H + 2, W + 2
+    N = Hp * Wp
+    bi = np.arange(B)
+
+    def flat(cells) -> np.ndarray:
+        cells = np.asarray(cells, dtype=np.int64).reshape(B, 2)
+        return bi * N + (cells[:, 0] + 1) * Wp + cells[:, 1] + 1
+
+    padded = np.zeros((B, Hp, Wp), dtype=bool)
+    padded[:, 1:-1, 1:-1] = grids == 1
+    unvisited = padded.ravel()
+    dist = np.full(B * N, -1, dtype=np.int32)
+    owner = np.zeros(B * N, dtype=np.int32)
+    offsets = np.array([-Wp, Wp, -1, 1])
+
+    frontier = flat(starts)
+    unvisited[frontier] = False
+    dist[frontier] = 0
+    if goals is not None:
+        g = flat(goals)
+        done = dist[g] >= 0  # salida == entrada: BFSSolver no expande nada
+        extra = np.zeros(B, dtype=np.int64)
+
+    d = 0
+    while frontier.size:
+        d += 1
+        # Vecinos en el orden de la cola de BFSSolver (por celda del frente,
+        # arriba, abajo, izquierda, derecha)
+        cand = (frontier[:, None] + offsets).ravel()
+        cand = cand[unvisited[cand]]
+        # Quitar duplicados sin ordenar conservando la primera aparición: se
+        # escribe al revés y solo sobrevive la última escritura
+        idx = np.arange(cand.size, dtype=np.int32)
+        owner[cand[::-1]] = idx[::-1]
+        cand = cand[owner[cand] == idx]
+        unvisited[cand] = False
+        dist[cand] = d
+        frontier = cand
+        if goals is not None:
+            newly = ~done & (dist[g] >= 0)
+            if newly.any():
+                done |= newly
+                extra += _partial_level(cand, g, newly, unvisited, offsets, N, B)
+                if not full:
+                    frontier = frontier[~done[frontier // N]]
+
+    dgoal = dist[g] if goals is not None else None
+    dist = dist.reshape(B, Hp, Wp)[:, 1:-1, 1:-1]
+    if dgoal is None:
+        reached = np.zeros(B, dtype=bool)
+        path_length = np.full(B, np.inf)
+        settled = (dist >= 0).sum(axis=(1, 2))
+    else:
+        reached = dgoal >= 0
+        path_length = np.where(reached, dgoal + 1.0, np.inf)
+        limit = np.where(reached, dgoal, np.iinfo(np.int32).max)
+        settled = ((dist >= 0) & (dist <= limit[:, None, None])).sum(axis=(1, 2))
+        return WavefrontResult(dist, reached, path_length, settled, settled + extra)
+    return WavefrontResult(dist, reached, path_length, settled)
+
+
+def _partial_level(level: np.ndarray, g: np.ndarray, newly: np.ndarray, unvisited: np.ndarray,
+                   offsets: np.ndarray, N: int, B: int) -> np.ndarray:
+    """
+    Para los laberintos de `newly`, cuya salida está en `level` (un nivel
+    en orden de cola), celdas del nivel siguiente que BFSSolver descubre
+    antes de sacar la salida: vecinas no visitadas de las celdas de su
+    nivel que van antes que la salida.
+    """
+    maze = level // N
+    goal_pos = np.full(B, -1, dtype=np.int64)
+    is_goal = level == g[maze]
+    goal_pos[maze[is_goal]] = np.flatnonzero(is_goal)
+    before = newly[maze] & (np.arange(level.size) < goal_pos[maze])
+    nb = (level[before][:, None] + offsets).ravel()
+    nb = np.unique(nb[unvisited[nb]])
+    return np.bincount(nb // N, minlength=B)